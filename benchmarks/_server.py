@@ -0,0 +1,350 @@
+"""A tiny OpenAI-compatible server used by the benchmarks."""
+
+from __future__ import annotations
+
+import base64
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from typing_extensions import Self
+
+_PLACEHOLDERS: Dict[str, Any] = {
+    "string": "mock",
+    "integer": 1,
+    "number": 1.0,
+    "boolean": True,
+    "array": [],
+    "object": {},
+}
+
+
+def _placeholder_json(schema: Dict[str, Any]) -> str:
+    """Build a JSON object with a placeholder for each property of the schema."""
+    properties = schema.get("properties") or {}
+    return json.dumps(
+        {
+            name: _PLACEHOLDERS.get(prop.get("type", "string"), "mock")
+            for name, prop in properties.items()
+        },
+    )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockServer
+
+    def setup(self) -> None:
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Every new connection pays the simulated TCP+TLS handshake.
+        with self.server.lock:
+            self.server.connections += 1
+        if self.server.handshake_delay:
+            time.sleep(self.server.handshake_delay)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, message: str) -> None:
+        data = json.dumps({"error": {"message": message, "type": "rate_limit"}})
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data.encode())
+
+    def _send_events(self, events: Iterator[Dict[str, Any]]) -> None:
+        """Send server-sent events with chunked transfer encoding."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        interval = self.server.token_interval
+        for index, event in enumerate(events):
+            if interval and index:
+                time.sleep(interval)
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_POST(self) -> None:
+        payload = self._read_json()
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.active += 1
+            overloaded = (
+                self.server.capacity is not None
+                and self.server.active > self.server.capacity
+            )
+            if overloaded:
+                self.server.rejected += 1
+        try:
+            if overloaded:
+                self._send_error(429, "Too many concurrent requests")
+                return
+            latency = self.server.latency
+            slow = random.random() < self.server.slow_fraction  # noqa: S311
+            if slow:
+                latency = self.server.slow_latency
+            if latency:
+                time.sleep(latency)
+            self._respond(payload)
+        finally:
+            with self.server.lock:
+                self.server.active -= 1
+
+    def _respond(self, payload: Dict[str, Any]) -> None:
+        if self.path.endswith("/embeddings"):
+            inputs = payload.get("input") or []
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            vector: Any = [0.1] * self.server.dimensions
+            if payload.get("encoding_format") == "base64":
+                vector = base64.b64encode(array("f", vector).tobytes()).decode()
+            self._send_json(
+                {
+                    "object": "list",
+                    "model": payload.get("model", "mock"),
+                    "data": [
+                        {
+                            "object": "embedding",
+                            "index": i,
+                            "embedding": vector,
+                        }
+                        for i in range(len(inputs))
+                    ],
+                    "usage": {
+                        "prompt_tokens": len(inputs),
+                        "total_tokens": len(inputs),
+                    },
+                },
+            )
+            return
+        if payload.get("stream"):
+            self._send_events(self._chat_events(payload))
+            return
+        tools = self._called_tools(payload)
+        guided = self._guided_schema(payload)
+        message: Dict[str, Any] = {"role": "assistant", "content": None}
+        if tools:
+            message["tool_calls"] = [
+                {
+                    "id": "call_mock",
+                    "type": "function",
+                    "function": {
+                        "name": tools[0]["function"]["name"],
+                        "arguments": _placeholder_json(
+                            tools[0]["function"].get("parameters") or {},
+                        ),
+                    },
+                },
+            ]
+        elif guided is not None:
+            message["content"] = _placeholder_json(guided)
+        else:
+            message["content"] = "Hello! " * self.server.output_tokens
+        if self.server.reasoning_tokens:
+            message["reasoning_content"] = "Hmm. " * self.server.reasoning_tokens
+        self._send_json(
+            {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "mock"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": message,
+                        "finish_reason": "tool_calls" if tools else "stop",
+                    },
+                ],
+                "usage": self._usage(),
+            },
+        )
+
+    def _called_tools(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Return the offered tools if the answer calls one, else an empty list."""
+        tools = payload.get("tools") or []
+        tool_choice = payload.get("tool_choice")
+        forced = isinstance(tool_choice, dict) or tool_choice == "required"
+        if tools and not forced and random.random() >= self.server.tool_call_rate:  # noqa: S311
+            return []
+        return tools
+
+    def _guided_schema(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        response_format = payload.get("response_format") or {}
+        if response_format.get("type") != "json_schema":
+            return None
+        return response_format.get("json_schema", {}).get("schema") or {}
+
+    def _usage(self) -> Dict[str, int]:
+        completion = self.server.output_tokens + self.server.reasoning_tokens
+        return {
+            "prompt_tokens": 5,
+            "completion_tokens": completion,
+            "total_tokens": 5 + completion,
+        }
+
+    def _chat_events(self, payload: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        base = {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": payload.get("model", "mock"),
+        }
+
+        def event(
+            delta: Dict[str, Any],
+            finish: Optional[str] = None,
+        ) -> Dict[str, Any]:
+            choice = {"index": 0, "delta": delta, "finish_reason": finish}
+            return {**base, "choices": [choice]}
+
+        yield event({"role": "assistant", "content": ""})
+        for _ in range(self.server.reasoning_tokens):
+            yield event({"reasoning_content": "Hmm. "})
+        tools = self._called_tools(payload)
+        guided = self._guided_schema(payload)
+        if tools:
+            arguments = _placeholder_json(tools[0]["function"].get("parameters") or {})
+            yield event(
+                {
+                    "tool_calls": [
+                        {
+                            "index": 0,
+                            "id": "call_mock",
+                            "type": "function",
+                            "function": {
+                                "name": tools[0]["function"]["name"],
+                                "arguments": "",
+                            },
+                        },
+                    ],
+                },
+            )
+            step = max(len(arguments) // max(self.server.output_tokens, 1), 1)
+            pieces: List[str] = [
+                arguments[i : i + step] for i in range(0, len(arguments), step)
+            ]
+            for piece in pieces:
+                yield event(
+                    {"tool_calls": [{"index": 0, "function": {"arguments": piece}}]},
+                )
+        elif guided is not None:
+            content = _placeholder_json(guided)
+            step = max(len(content) // max(self.server.output_tokens, 1), 1)
+            for i in range(0, len(content), step):
+                yield event({"content": content[i : i + step]})
+        else:
+            for _ in range(self.server.output_tokens):
+                yield event({"content": "Hello! "})
+        yield event({}, "tool_calls" if tools else "stop")
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            yield {**base, "choices": [], "usage": self._usage()}
+
+
+class MockServer(ThreadingHTTPServer):
+    """Serve chat completions and embeddings on a local port.
+
+    Chat completions can be streamed, carry `reasoning_content` and answer
+    requests with `tools` by calling the first tool with placeholder
+    arguments for each property of its schema. Requests with a
+    `json_schema` response format are answered with such placeholders as
+    the content.
+
+    Args:
+        latency: Seconds to wait before answering each request.
+        handshake_delay: Seconds to wait on every new connection, emulating
+            the round trips of a TCP+TLS handshake to a remote provider.
+        dimensions: Size of the returned embedding vectors.
+        capacity: Concurrent requests served before answering 429.
+        slow_fraction: Fraction of requests answered after `slow_latency`
+            instead of `latency`, to emulate a latency tail.
+        slow_latency: Latency of the slow requests.
+        output_tokens: Content chunks (or tool argument pieces) per answer.
+        reasoning_tokens: `reasoning_content` chunks sent before the content.
+        token_interval: Seconds between streamed chunks, the inverse of the
+            emulated decoding speed.
+        tool_call_rate: Probability of calling the first tool when
+            `tool_choice` does not force it; otherwise the answer is prose.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        handshake_delay: float = 0.0,
+        dimensions: int = 8,
+        capacity: Optional[int] = None,
+        slow_fraction: float = 0.0,
+        slow_latency: float = 0.0,
+        output_tokens: int = 1,
+        reasoning_tokens: int = 0,
+        token_interval: float = 0.0,
+        tool_call_rate: float = 1.0,
+        address: Tuple[str, int] = ("127.0.0.1", 0),
+    ) -> None:
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.handshake_delay = handshake_delay
+        self.dimensions = dimensions
+        self.capacity = capacity
+        self.slow_fraction = slow_fraction
+        self.slow_latency = slow_latency
+        self.output_tokens = output_tokens
+        self.reasoning_tokens = reasoning_tokens
+        self.token_interval = token_interval
+        self.tool_call_rate = tool_call_rate
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.active = 0
+        self.rejected = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Cancelled requests (e.g. hedging losers) close the socket early.
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self) -> Self:
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,76 @@
+"""Bulk generation with fixed `max_concurrency` vs. `abatch_adaptive`.
+
+The mock server answers 429 above `--capacity` concurrent requests.
+Run with ``python -m benchmarks.bench_adaptive``.
+"""
+
+import argparse
+import asyncio
+import time
+from functools import partial
+from typing import Any, Callable, Coroutine, List, Tuple
+
+from langchain_core.language_models import LanguageModelInput
+
+from langchain_openailike_llms_adapters import close_all, get_openai_like_llm_instance
+from langchain_openailike_llms_adapters.adaptive import AIMDController
+
+from ._server import MockServer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prompts", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--capacity", type=int, default=16)
+    parser.add_argument("--fixed", type=int, nargs="+", default=[4, 128])
+    args = parser.parse_args()
+
+    prompts: List[LanguageModelInput] = [f"prompt {i}" for i in range(args.prompts)]
+    with MockServer(latency=args.latency_ms / 1000, capacity=args.capacity) as server:
+        model = get_openai_like_llm_instance(
+            "mock",
+            provider="vllm",
+            model_kwargs={"api_base": server.base_url, "max_retries": 0},
+        )
+        retrying = model.model_copy(update={"max_retries": 5})
+
+        async def fixed(concurrency: int) -> int:
+            results = await retrying.abatch(
+                prompts,
+                config={"max_concurrency": concurrency},
+                return_exceptions=True,
+            )
+            return sum(not isinstance(r, Exception) for r in results)
+
+        async def adaptive(controller: AIMDController) -> int:
+            done = 0
+            async for _, result in model.abatch_adaptive(
+                prompts,
+                controller=controller,
+                max_attempts=20,
+                return_exceptions=True,
+            ):
+                done += not isinstance(result, Exception)
+            return done
+
+        runs: List[Tuple[str, Callable[[], Coroutine[Any, Any, int]]]] = [
+            (f"fixed max_concurrency={c}", partial(fixed, c)) for c in args.fixed
+        ]
+        controller = AIMDController(initial=4, maximum=512)
+        runs.append(("adaptive", lambda: adaptive(controller)))
+        for name, run in runs:
+            server.rejected = 0
+            start = time.perf_counter()
+            ok = asyncio.run(run())
+            elapsed = time.perf_counter() - start
+            print(  # noqa: T201
+                f"{name:<26} {elapsed:7.2f}s  {ok / elapsed:8.1f} req/s  "
+                f"ok={ok:<5} 429s={server.rejected}",
+            )
+            close_all()
+        print(f"adaptive settled at concurrency {controller.limit}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""CPU cost per streamed chunk, with and without the text-delta fast path.
+
+Times the conversion of single content and reasoning deltas, then a whole
+`stream()` over a canned response of parsed SDK chunks, so no network or
+server time is included.
+
+Run with ``python -m benchmarks.bench_chunk_conversion``.
+"""
+
+import argparse
+import time
+from typing import Any, Callable, Dict, Iterator, List
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessageChunk
+from openai.types.chat import ChatCompletionChunk
+
+from langchain_openailike_llms_adapters import get_openai_like_llm_instance, utils
+
+
+def _chunk(delta: Dict[str, Any], **extra: Any) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "mock",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        **extra,
+    }
+
+
+def _per_call_us(fn: Callable[[], Any], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=50_000)
+    parser.add_argument("--chunks", type=int, default=2000, help="chunks per stream")
+    args = parser.parse_args()
+
+    model = get_openai_like_llm_instance(
+        "mock",
+        provider="vllm",
+        model_kwargs={"api_base": "http://127.0.0.1:1/v1"},
+    )
+    # Dumped the way the parent's `_stream` hands chunks to the converter.
+    deltas = {
+        "content": ChatCompletionChunk.model_validate(
+            _chunk({"content": "Hello "}),
+        ).model_dump(),
+        "reasoning": ChatCompletionChunk.model_validate(
+            _chunk({"reasoning_content": "Hmm "}),
+        ).model_dump(),
+    }
+    print("per conversion:")  # noqa: T201
+    for name, chunk in deltas.items():
+        full = _per_call_us(
+            lambda: model._convert_any_chunk(chunk, AIMessageChunk, {}),  # noqa: SLF001
+            args.number,
+        )
+        fast = _per_call_us(
+            lambda: model._convert_chunk_to_generation_chunk(  # noqa: SLF001
+                chunk,
+                AIMessageChunk,
+                {},
+            ),
+            args.number,
+        )
+        print(  # noqa: T201
+            f"  {name:>10}: full {full:6.2f}us  fast path {fast:6.2f}us  "
+            f"({full / fast:4.1f}x)",
+        )
+
+    half = args.chunks // 2
+    canned: List[ChatCompletionChunk] = [
+        ChatCompletionChunk.model_validate(
+            _chunk({"role": "assistant", "content": ""}),
+        ),
+        *(
+            ChatCompletionChunk.model_validate(_chunk({"reasoning_content": "Hmm "}))
+            for _ in range(half)
+        ),
+        *(
+            ChatCompletionChunk.model_validate(_chunk({"content": "Hello "}))
+            for _ in range(args.chunks - half)
+        ),
+    ]
+
+    def create(**kwargs: Any) -> Iterator[ChatCompletionChunk]:
+        return iter(canned)
+
+    class _Stream:
+        def __init__(self) -> None:
+            self._chunks = create()
+
+        def __enter__(self) -> Iterator[ChatCompletionChunk]:
+            return self._chunks
+
+        def __exit__(self, *args: object) -> None:
+            pass
+
+    def consume() -> None:
+        for _ in model.stream("Say hello"):
+            pass
+
+    print(f"per chunk of stream() over {len(canned)} chunks:")  # noqa: T201
+    with patch.object(model.client, "create", side_effect=lambda **_: _Stream()):
+        consume()
+        fast = _per_call_us(consume, 5) / len(canned)
+        with patch.object(utils, "_parse_text_delta", return_value=None):
+            full = _per_call_us(consume, 5) / len(canned)
+    print(  # noqa: T201
+        f"  full {full:6.2f}us  fast path {fast:6.2f}us  saved {full - fast:5.2f}us",
+    )
+
+
+if __name__ == "__main__":
+    main()
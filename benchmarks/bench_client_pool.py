@@ -0,0 +1,58 @@
+"""Measure the handshake time saved by the shared client pool.
+
+Run with ``python -m benchmarks.bench_client_pool``.
+"""
+
+import argparse
+import time
+
+from langchain_openailike_llms_adapters import close_all, get_openai_like_llm_instance
+
+from ._server import MockServer
+
+
+def _run(server: MockServer, n: int, *, share_client: bool) -> dict:
+    connections = server.connections
+    start = time.perf_counter()
+    for _ in range(n):
+        # One instance per request, like a typical request handler.
+        model = get_openai_like_llm_instance(
+            "mock-model",
+            provider="vllm",
+            model_kwargs={"api_base": server.base_url, "share_client": share_client},
+        )
+        model.invoke("Hello")
+    elapsed = time.perf_counter() - start
+    close_all()
+    return {
+        "share_client": share_client,
+        "requests": n,
+        "connections": server.connections - connections,
+        "total_s": round(elapsed, 4),
+        "per_request_ms": round(elapsed / n * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=200)
+    parser.add_argument(
+        "--handshake-ms",
+        type=float,
+        default=30.0,
+        help="simulated TCP+TLS handshake cost per new connection",
+    )
+    args = parser.parse_args()
+
+    with MockServer(handshake_delay=args.handshake_ms / 1000) as server:
+        unshared = _run(server, args.n, share_client=False)
+        shared = _run(server, args.n, share_client=True)
+
+    for result in (unshared, shared):
+        print(result)  # noqa: T201
+    saved = unshared["total_s"] - shared["total_s"]
+    print(f"handshake time saved: {saved:.3f}s over {args.n} requests")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
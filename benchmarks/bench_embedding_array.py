@@ -0,0 +1,58 @@
+"""Compare `embed_documents` with the base64/NumPy `embed_documents_array` path.
+
+Run with ``python -m benchmarks.bench_embedding_array``.
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from langchain_openailike_llms_adapters import close_all, get_openai_like_embedding
+
+from ._server import MockServer
+
+
+def _measure(fn):  # type: ignore[no-untyped-def]
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=1024)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    args = parser.parse_args()
+
+    texts = [f"document {i}" for i in range(args.texts)]
+    with MockServer(dimensions=args.dimensions) as server:
+        emb = get_openai_like_embedding(
+            "mock-embedding",
+            "vllm",
+            chunk_size=args.chunk_size,
+            model_kwargs={"openai_api_base": server.base_url},
+        )
+        emb.embed_documents(texts[:10])  # warm up the connection
+        for name, fn in (
+            ("embed_documents", lambda: emb.embed_documents(texts)),
+            ("embed_documents_array", lambda: emb.embed_documents_array(texts)),
+        ):
+            result, elapsed, peak = _measure(fn)
+            assert len(result) == len(texts)  # noqa: S101
+            del result
+            print(  # noqa: T201
+                f"{name:>22}: {elapsed:7.3f}s  "
+                f"peak traced memory {peak / 2**20:9.1f} MiB",
+            )
+    close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Embedding throughput with and without `max_concurrency` against a mock server.
+
+Run with ``python -m benchmarks.bench_embedding_concurrency``.
+"""
+
+import argparse
+import asyncio
+import time
+
+from langchain_openailike_llms_adapters import close_all, get_openai_like_embedding
+
+from ._server import MockServer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=25)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    texts = [f"document {i}" for i in range(args.texts)]
+    with MockServer(latency=args.latency_ms / 1000, dimensions=256) as server:
+        for concurrency in args.concurrency:
+            emb = get_openai_like_embedding(
+                "mock-embedding",
+                "vllm",
+                chunk_size=args.chunk_size,
+                model_kwargs={
+                    "openai_api_base": server.base_url,
+                    "max_concurrency": concurrency,
+                },
+            )
+            for mode in ("sync", "async"):
+                start = time.perf_counter()
+                if mode == "sync":
+                    vectors = emb.embed_documents(texts)
+                else:
+                    vectors = asyncio.run(emb.aembed_documents(texts))
+                elapsed = time.perf_counter() - start
+                assert len(vectors) == len(texts)  # noqa: S101
+                print(  # noqa: T201
+                    f"{mode:>5} max_concurrency={concurrency:<3} "
+                    f"{elapsed:7.3f}s  {len(texts) / elapsed:9.1f} texts/s",
+                )
+            close_all()
+
+
+if __name__ == "__main__":
+    main()
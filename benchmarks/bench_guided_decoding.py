@@ -0,0 +1,93 @@
+"""Parse success and latency of `with_structured_output` against a mock server.
+
+Compares function calling, when the model is not forced to call the tool,
+with guided decoding.
+
+Failed parses are retried until the output parses, as callers do, so the
+latency includes the re-requests.
+
+Run with ``python -m benchmarks.bench_guided_decoding``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Optional
+
+from pydantic import BaseModel
+
+from langchain_openailike_llms_adapters import (
+    capability_registry,
+    close_all,
+    get_openai_like_llm_instance,
+)
+
+from ._server import MockServer
+
+
+class Person(BaseModel):
+    """A person mentioned in the text."""
+
+    name: str
+    age: int
+    email: Optional[str] = None
+
+
+MODELS = {
+    # Provider capabilities of the two setups compared.
+    "function_calling": {"tool_choice": False, "json_schema": False},
+    "guided": {"tool_choice": False, "json_schema": True},
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--tool-call-rate", type=float, default=0.7)
+    parser.add_argument("--max-attempts", type=int, default=5)
+    args = parser.parse_args()
+
+    with MockServer(
+        latency=args.latency_ms / 1000,
+        tool_call_rate=args.tool_call_rate,
+    ) as server:
+        for name, capabilities in MODELS.items():
+            model_name = f"bench-{name}"
+            capability_registry.register("vllm", model_name, **capabilities)
+            model = get_openai_like_llm_instance(
+                model_name,
+                provider="vllm",
+                model_kwargs={"api_base": server.base_url},
+            )
+            structured = model.with_structured_output(Person, method="json_schema")
+
+            first_try = succeeded = 0
+            latencies = []
+            before = server.requests
+            for i in range(args.requests):
+                start = time.perf_counter()
+                for attempt in range(args.max_attempts):
+                    try:
+                        result = structured.invoke(f"Who is mentioned in text {i}?")
+                    except ValueError:
+                        result = None
+                    if result is not None:
+                        succeeded += 1
+                        first_try += attempt == 0
+                        break
+                latencies.append(time.perf_counter() - start)
+            sent = server.requests - before
+            print(  # noqa: T201
+                f"{name:16}  first try={first_try / args.requests:6.1%}  "
+                f"succeeded={succeeded / args.requests:6.1%}  "
+                f"mean={statistics.mean(latencies) * 1000:6.1f}ms  "
+                f"requests/call={sent / args.requests:4.2f}",
+            )
+            close_all()
+
+
+if __name__ == "__main__":
+    main()
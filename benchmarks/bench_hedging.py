@@ -0,0 +1,73 @@
+"""Tail latency of `ainvoke` with and without hedging.
+
+Measured against a mock server where a fraction of requests is slow.
+
+Run with ``python -m benchmarks.bench_hedging``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Optional
+
+from langchain_openailike_llms_adapters import close_all, get_openai_like_llm_instance
+from langchain_openailike_llms_adapters.hedging import HedgePolicy
+from langchain_openailike_llms_adapters.utils import ChatModelExtraParams
+
+from ._server import MockServer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--slow-ms", type=float, default=500.0)
+    parser.add_argument("--slow-fraction", type=float, default=0.03)
+    args = parser.parse_args()
+
+    with MockServer(
+        latency=args.latency_ms / 1000,
+        slow_latency=args.slow_ms / 1000,
+        slow_fraction=args.slow_fraction,
+    ) as server:
+        for hedging in (None, HedgePolicy(percentile=0.95, budget=0.05)):
+            model_kwargs: ChatModelExtraParams = {"api_base": server.base_url}
+            if hedging is not None:
+                model_kwargs["hedging"] = hedging
+            model = get_openai_like_llm_instance(
+                "mock",
+                provider="vllm",
+                model_kwargs=model_kwargs,
+            )
+
+            async def run(policy: Optional[HedgePolicy] = hedging) -> List[float]:
+                semaphore = asyncio.Semaphore(args.concurrency)
+                latencies: List[float] = []
+
+                async def one(i: int) -> None:
+                    async with semaphore:
+                        start = time.perf_counter()
+                        await model.ainvoke(f"prompt {i}")
+                        latencies.append(time.perf_counter() - start)
+
+                await asyncio.gather(*(one(i) for i in range(args.requests)))
+                return latencies
+
+            before = server.requests
+            latencies = sorted(asyncio.run(run()))
+            p50 = statistics.median(latencies) * 1000
+            p99 = latencies[int(len(latencies) * 0.99)] * 1000
+            extra = (server.requests - before) / args.requests - 1
+            print(  # noqa: T201
+                f"hedging={'on ' if hedging else 'off'}  p50={p50:6.1f}ms  "
+                f"p99={p99:6.1f}ms  extra requests={extra:5.1%}",
+            )
+            close_all()
+
+
+if __name__ == "__main__":
+    main()
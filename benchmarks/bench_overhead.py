@@ -0,0 +1,281 @@
+"""Overhead of the adapter over the raw `openai` SDK against a local mock server.
+
+Every scenario sends the same request through the plain SDK and through the
+adapter, alternating between the two, and reports the median time per call
+of each. Their difference is the adapter's own overhead.
+
+Save the results and compare later runs against them with::
+
+    python -m benchmarks.bench_overhead --output baseline.json
+    python -m benchmarks.bench_overhead --baseline baseline.json --threshold 0.25
+
+The second run exits with status 1 when the overhead of a scenario grew by
+more than `--threshold` over the baseline. Growth smaller than `--min-delta-us`
+or than 3% of the raw call time is treated as noise.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import openai
+from openai.types.chat import ChatCompletionMessageParam, ChatCompletionToolParam
+from pydantic import BaseModel
+
+from langchain_openailike_llms_adapters import (
+    __version__,
+    close_all,
+    get_openai_like_embedding,
+    get_openai_like_llm_instance,
+)
+
+from ._server import MockServer
+
+MESSAGES: List[ChatCompletionMessageParam] = [{"role": "user", "content": "Say hello"}]
+
+
+class Answer(BaseModel):
+    """Answer with a name and a score."""
+
+    name: str
+    score: int
+
+
+ANSWER_TOOL: ChatCompletionToolParam = {
+    "type": "function",
+    "function": {
+        "name": "Answer",
+        "description": Answer.__doc__ or "",
+        "parameters": Answer.model_json_schema(),
+    },
+}
+
+
+def _time_pair(
+    raw: Callable[[], Any],
+    adapter: Callable[[], Any],
+    iterations: int,
+    warmup: int,
+) -> Tuple[float, float]:
+    for _ in range(warmup):
+        raw()
+        adapter()
+    raw_times: List[float] = []
+    adapter_times: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        raw()
+        raw_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        adapter()
+        adapter_times.append(time.perf_counter() - start)
+    return statistics.median(raw_times), statistics.median(adapter_times)
+
+
+async def _atime_pair(
+    raw: Callable[[], Awaitable[Any]],
+    adapter: Callable[[], Awaitable[Any]],
+    iterations: int,
+    warmup: int,
+) -> Tuple[float, float]:
+    for _ in range(warmup):
+        await raw()
+        await adapter()
+    raw_times: List[float] = []
+    adapter_times: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await raw()
+        raw_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        await adapter()
+        adapter_times.append(time.perf_counter() - start)
+    return statistics.median(raw_times), statistics.median(adapter_times)
+
+
+def run_scenarios(server: MockServer, iterations: int, warmup: int) -> Dict[str, Any]:
+    client = openai.OpenAI(base_url=server.base_url, api_key="sk-mock")
+    model = get_openai_like_llm_instance(
+        "mock",
+        provider="vllm",
+        model_kwargs={"api_base": server.base_url},
+    )
+    structured = model.with_structured_output(Answer)
+    embeddings = get_openai_like_embedding(
+        "mock-embedding",
+        "vllm",
+        model_kwargs={"openai_api_base": server.base_url},
+    )
+    texts = [f"document {i}" for i in range(64)]
+
+    def raw_stream() -> None:
+        for _ in client.chat.completions.create(
+            model="mock",
+            messages=MESSAGES,
+            stream=True,
+            stream_options={"include_usage": True},
+        ):
+            pass
+
+    def adapter_stream() -> None:
+        for _ in model.stream("Say hello"):
+            pass
+
+    def raw_structured() -> Answer:
+        response = client.chat.completions.create(
+            model="mock",
+            messages=MESSAGES,
+            tools=[ANSWER_TOOL],
+        )
+        tool_call = response.choices[0].message.tool_calls[0]  # type: ignore[index]
+        return Answer.model_validate_json(tool_call.function.arguments)
+
+    scenarios: Dict[str, Tuple[Callable[[], Any], Callable[[], Any]]] = {
+        "invoke": (
+            lambda: client.chat.completions.create(model="mock", messages=MESSAGES),
+            lambda: model.invoke("Say hello"),
+        ),
+        "stream": (raw_stream, adapter_stream),
+        "with_structured_output": (
+            raw_structured,
+            lambda: structured.invoke("Say hello"),
+        ),
+        "embed_documents": (
+            lambda: [
+                d.embedding
+                for d in client.embeddings.create(
+                    model="mock-embedding",
+                    input=texts,
+                ).data
+            ],
+            lambda: embeddings.embed_documents(texts),
+        ),
+    }
+    results: Dict[str, Any] = {}
+    for name, (raw, adapter) in scenarios.items():
+        results[name] = _result(*_time_pair(raw, adapter, iterations, warmup))
+
+    async def run_async() -> Tuple[float, float]:
+        async_client = openai.AsyncOpenAI(base_url=server.base_url, api_key="sk-mock")
+
+        async def raw_astream() -> None:
+            stream = await async_client.chat.completions.create(
+                model="mock",
+                messages=MESSAGES,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            async for _ in stream:
+                pass
+
+        async def adapter_astream() -> None:
+            async for _ in model.astream("Say hello"):
+                pass
+
+        try:
+            return await _atime_pair(raw_astream, adapter_astream, iterations, warmup)
+        finally:
+            await async_client.close()
+
+    results["astream"] = _result(*asyncio.run(run_async()))
+    client.close()
+    return results
+
+
+def _result(raw: float, adapter: float) -> Dict[str, float]:
+    return {
+        "raw_us": round(raw * 1e6, 1),
+        "adapter_us": round(adapter * 1e6, 1),
+        "overhead_us": round((adapter - raw) * 1e6, 1),
+    }
+
+
+def find_regressions(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    min_delta_us: float,
+) -> List[str]:
+    """Describe every scenario whose overhead grew past the threshold."""
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        current = results.get(name)
+        if current is None:
+            continue
+        before, after = base["overhead_us"], current["overhead_us"]
+        noise = max(min_delta_us, 0.03 * current["raw_us"])
+        if after - before > noise and after > before * (1 + threshold):
+            regressions.append(
+                f"{name}: overhead {before:.1f}us -> {after:.1f}us "
+                f"(+{after - before:.1f}us)",
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--tokens", type=int, default=32, help="chunks per answer")
+    parser.add_argument("--reasoning-tokens", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--min-delta-us", type=float, default=100.0)
+    args = parser.parse_args()
+
+    with MockServer(
+        latency=args.latency_ms / 1000,
+        output_tokens=args.tokens,
+        reasoning_tokens=args.reasoning_tokens,
+        dimensions=256,
+    ) as server:
+        scenarios = run_scenarios(server, args.iterations, args.warmup)
+    close_all()
+
+    results = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "openai": openai.__version__,
+        "settings": {
+            "iterations": args.iterations,
+            "tokens": args.tokens,
+            "reasoning_tokens": args.reasoning_tokens,
+            "latency_ms": args.latency_ms,
+        },
+        "scenarios": scenarios,
+    }
+    print(f"{'scenario':>24} {'raw':>10} {'adapter':>10} {'overhead':>10}")  # noqa: T201
+    for name, result in scenarios.items():
+        print(  # noqa: T201
+            f"{name:>24} {result['raw_us']:>8.1f}us {result['adapter_us']:>8.1f}us "
+            f"{result['overhead_us']:>8.1f}us",
+        )
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = find_regressions(
+            scenarios,
+            baseline,
+            args.threshold,
+            args.min_delta_us,
+        )
+        if regressions:
+            print("Overhead regressions:", *regressions, sep="\n  ")  # noqa: T201
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
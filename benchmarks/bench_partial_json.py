@@ -0,0 +1,82 @@
+"""Parse streamed tool arguments by reparsing against incremental parsing.
+
+Compares `parse_partial_json` on the growing prefix after every delta, as
+langchain's tool parsers do, with feeding each delta to `PartialJsonParser`.
+
+Run with ``python -m benchmarks.bench_partial_json``.
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Callable, List
+
+from langchain_core.utils.json import parse_partial_json
+
+from langchain_openailike_llms_adapters.structured import PartialJsonParser
+
+
+def _document(records: int) -> str:
+    return json.dumps(
+        {
+            "title": "Extracted records",
+            "records": [
+                {
+                    "id": i,
+                    "name": f"record {i}",
+                    "tags": ["alpha", "beta"],
+                    "summary": "a short description of the record " * 2,
+                }
+                for i in range(records)
+            ],
+        },
+    )
+
+
+def _seconds(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--delta-chars", type=int, default=4)
+    args = parser.parse_args()
+
+    for records in args.records:
+        text = _document(records)
+        deltas: List[str] = [
+            text[i : i + args.delta_chars]
+            for i in range(0, len(text), args.delta_chars)
+        ]
+
+        def reparse() -> Any:
+            prefix = ""
+            value = None
+            for delta in deltas:
+                prefix += delta
+                value = parse_partial_json(prefix)
+            return value
+
+        def incremental() -> Any:
+            partial = PartialJsonParser()
+            value = None
+            for delta in deltas:
+                if partial.feed(delta):
+                    value = partial.value()
+            return value
+
+        assert reparse() == incremental() == json.loads(text)  # noqa: S101
+        full = _seconds(reparse)
+        fast = _seconds(incremental)
+        print(  # noqa: T201
+            f"{len(text):>8} chars in {len(deltas):>6} deltas: "
+            f"reparse {full * 1000:9.1f}ms  incremental {fast * 1000:8.1f}ms  "
+            f"({full / fast:5.1f}x)",
+        )
+
+
+if __name__ == "__main__":
+    main()
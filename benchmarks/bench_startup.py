@@ -0,0 +1,56 @@
+"""Measure cold import time and time-to-first-instance in fresh interpreters.
+
+Run with ``python -m benchmarks.bench_startup``.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+_PROBE = """
+import json, time
+start = time.perf_counter()
+import langchain_openailike_llms_adapters as adapters
+imported = time.perf_counter()
+model = adapters.get_openai_like_llm_instance(
+    "mock-model", provider="vllm", model_kwargs={"api_base": "http://127.0.0.1:1/v1"}
+)
+created = time.perf_counter()
+model.root_client
+client = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_instance_ms": (created - imported) * 1000,
+    "first_client_ms": (client - created) * 1000,
+}))
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=10, help="number of fresh processes")
+    args = parser.parse_args()
+
+    runs = [
+        json.loads(
+            subprocess.run(  # noqa: S603
+                [sys.executable, "-c", _PROBE],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout,
+        )
+        for _ in range(args.n)
+    ]
+    for key in runs[0]:
+        values = [run[key] for run in runs]
+        print(  # noqa: T201
+            f"{key:>18}: median {statistics.median(values):8.2f} ms"
+            f"  min {min(values):8.2f} ms",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Merge a long reasoning stream with and without `StreamAccumulator`.
+
+Compares langchain's `generate_from_stream` with the adapter's linear-time
+`StreamAccumulator`.
+
+Run with ``python -m benchmarks.bench_stream_accumulator``.
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Any, Callable, List
+
+from langchain_core.language_models.chat_models import generate_from_stream
+from langchain_core.outputs import ChatGenerationChunk
+
+from langchain_openailike_llms_adapters.streaming import (
+    generate_from_chunks,
+    text_chunk,
+)
+
+
+def _measure(fn: Callable[[], Any]) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--reasoning-tokens",
+        type=int,
+        nargs="+",
+        default=[1000, 5000, 15000, 30000],
+    )
+    parser.add_argument("--content-tokens", type=int, default=2000)
+    args = parser.parse_args()
+
+    for reasoning_tokens in args.reasoning_tokens:
+        chunks: List[ChatGenerationChunk] = [
+            *(text_chunk("", reasoning="think ") for _ in range(reasoning_tokens)),
+            *(text_chunk("word ") for _ in range(args.content_tokens)),
+        ]
+        results = []
+        for name, fn in (
+            ("generate_from_stream", lambda: generate_from_stream(iter(chunks))),
+            ("StreamAccumulator", lambda: generate_from_chunks(chunks)),
+        ):
+            result, elapsed, peak = _measure(fn)
+            results.append(result)
+            print(  # noqa: T201
+                f"{reasoning_tokens:>6} reasoning chunks  {name:>20}: "
+                f"{elapsed * 1000:9.1f}ms  peak traced memory {peak / 2**20:7.1f} MiB",
+            )
+        assert results[0] == results[1]  # noqa: S101
+
+
+if __name__ == "__main__":
+    main()
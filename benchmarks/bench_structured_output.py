@@ -0,0 +1,120 @@
+"""Cost of `with_structured_output` with and without the cached tool conversion.
+
+Uses a nested Pydantic schema.
+
+Times building the runnable and a whole `invoke` over a canned tool call
+response, so no network or server time is included.
+
+Run with ``python -m benchmarks.bench_structured_output``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Callable, List, Optional
+from unittest.mock import patch
+
+from openai.types.chat import ChatCompletion
+from pydantic import BaseModel
+
+from langchain_openailike_llms_adapters import get_openai_like_llm_instance, tools
+
+
+class Address(BaseModel):
+    street: str
+    city: str
+    zip: Optional[str] = None
+
+
+class Item(BaseModel):
+    name: str
+    quantity: int
+    tags: List[str]
+    ship_to: Address
+
+
+class Order(BaseModel):
+    """An order with its items and addresses."""
+
+    id: str
+    items: List[Item]
+    shipping: Address
+    billing: Optional[Address] = None
+    notes: Optional[str] = None
+
+
+ARGUMENTS = (
+    '{"id": "1", "items": [{"name": "a", "quantity": 1, "tags": [], '
+    '"ship_to": {"street": "s", "city": "c"}}], '
+    '"shipping": {"street": "s", "city": "c"}}'
+)
+
+
+def _response() -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "mock",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "tool_calls",
+                    "message": {
+                        "role": "assistant",
+                        "content": None,
+                        "tool_calls": [
+                            {
+                                "id": "call_1",
+                                "type": "function",
+                                "function": {"name": "Order", "arguments": ARGUMENTS},
+                            },
+                        ],
+                    },
+                },
+            ],
+        },
+    )
+
+
+def _per_call_us(fn: Callable[[], Any], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=500)
+    args = parser.parse_args()
+
+    model = get_openai_like_llm_instance(
+        "mock",
+        provider="vllm",
+        model_kwargs={"api_base": "http://127.0.0.1:1/v1"},
+    )
+    response = _response()
+
+    def build() -> Any:
+        return model.with_structured_output(Order)
+
+    def build_and_invoke() -> Any:
+        return model.with_structured_output(Order).invoke("Order something")
+
+    with patch.object(model.client, "create", return_value=response):
+        assert isinstance(build_and_invoke(), Order)  # noqa: S101
+        for name, fn in (("build", build), ("build + invoke", build_and_invoke)):
+            cached = _per_call_us(fn, args.number)
+            with patch.object(tools, "_cacheable", return_value=False):
+                uncached = _per_call_us(fn, args.number)
+            print(  # noqa: T201
+                f"{name:>15}: uncached {uncached:8.1f}us  cached {cached:8.1f}us  "
+                f"({uncached / cached:5.1f}x)",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,93 @@
-from .adapters import get_openai_like_llm_instance,get_openai_like_embedding
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
+if TYPE_CHECKING:
+    from .adapters import (
+        get_openai_like_embedding,
+        get_openai_like_failover_llm,
+        get_openai_like_llm_instance,
+    )
+    from .batch import BatchJob, BatchRequestError
+    from .cache import InMemoryResponseCache, SQLiteResponseCache
+    from .capabilities import (
+        CapabilityRegistry,
+        ModelCapabilities,
+        capability_registry,
+    )
+    from .clients import client_registry, close_all, configure_client_pool
+    from .embedding_cache import MmapEmbeddingCache
+    from .failover import ChatFailoverModel, CircuitBreaker, NoAvailableProviderError
+    from .hedging import HedgePolicy
+    from .metrics import MetricsRegistry, metrics_registry
+    from .provider import register_provider
+    from .ratelimit import QuotaLimiter, configure_rate_limit
 
-__all__ = ["get_openai_like_llm_instance","get_openai_like_embedding"]
+# Submodules pull in `langchain_openai` and `openai`, so they are only
+# imported when one of their names is first accessed.
+_LAZY_IMPORTS = {
+    "get_openai_like_llm_instance": "adapters",
+    "get_openai_like_embedding": "adapters",
+    "get_openai_like_failover_llm": "adapters",
+    "client_registry": "clients",
+    "close_all": "clients",
+    "configure_client_pool": "clients",
+    "BatchJob": "batch",
+    "BatchRequestError": "batch",
+    "InMemoryResponseCache": "cache",
+    "SQLiteResponseCache": "cache",
+    "CapabilityRegistry": "capabilities",
+    "ModelCapabilities": "capabilities",
+    "capability_registry": "capabilities",
+    "MmapEmbeddingCache": "embedding_cache",
+    "ChatFailoverModel": "failover",
+    "CircuitBreaker": "failover",
+    "NoAvailableProviderError": "failover",
+    "HedgePolicy": "hedging",
+    "MetricsRegistry": "metrics",
+    "metrics_registry": "metrics",
+    "register_provider": "provider",
+    "QuotaLimiter": "ratelimit",
+    "configure_rate_limit": "ratelimit",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")  # noqa: EM102
+    value = getattr(import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return list(__all__)
+
+
+__all__ = [
+    "BatchJob",
+    "BatchRequestError",
+    "CapabilityRegistry",
+    "ChatFailoverModel",
+    "CircuitBreaker",
+    "HedgePolicy",
+    "InMemoryResponseCache",
+    "MetricsRegistry",
+    "MmapEmbeddingCache",
+    "ModelCapabilities",
+    "NoAvailableProviderError",
+    "QuotaLimiter",
+    "SQLiteResponseCache",
+    "capability_registry",
+    "client_registry",
+    "close_all",
+    "configure_client_pool",
+    "configure_rate_limit",
+    "get_openai_like_embedding",
+    "get_openai_like_failover_llm",
+    "get_openai_like_llm_instance",
+    "metrics_registry",
+    "register_provider",
+]
 
 __version__ = "0.2.1"
@@ -2,37 +2,48 @@ from __future__ import annotations
 
 from functools import cache
 from typing import (
+    TYPE_CHECKING,
     Any,
     Optional,
+    Sequence,
+    Tuple,
     Type,
+    Union,
 )
 
 from .provider import _get_provider_with_model, provider_emb_list, provider_list
-from .utils import (
-    ChatCustomOpenAILikeModel,
-    ChatModelExtraParams,
-    OpenAILikeEmbedding,
-    _create_openai_like_chat_model,
-    _create_openai_like_embbeding,
-)
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+
+    # `utils` imports langchain_openai/openai, which dominate import time, so
+    # it is loaded on the first call instead of at import.
+    from .failover import ChatFailoverModel
+    from .utils import (
+        ChatCustomOpenAILikeModel,
+        ChatModelExtraParams,
+        OpenAILikeEmbedding,
+    )
 
 
 def get_openai_like_llm_instance(
     model: str,
     *,
-    provider: Optional[provider_list] = None,
+    provider: Optional[Union[provider_list, str]] = None,
     model_kwargs: Optional[ChatModelExtraParams] = None,
 ) -> ChatCustomOpenAILikeModel:
-    """
-    Get an instance of a chat model that is compatible with the OpenAI API.
+    """Get an instance of a chat model that is compatible with the OpenAI API.
 
     Args:
         model: The model to use.
         provider: The provider to use.
         model_kwargs: Extra params to pass to the model.
+
     Returns:
         An instance of a chat model that is compatible with the OpenAI API.
+
     """
+    from .utils import _create_openai_like_chat_model
 
     if provider is None:
         provider = _get_provider_with_model(model)
@@ -44,32 +55,89 @@ def get_openai_like_llm_instance(
     return chat_model(model=model, **model_kwargs)
 
 
+def get_openai_like_failover_llm(
+    candidates: Sequence[
+        Union[
+            Tuple[Union[provider_list, str], str],
+            Tuple[Union[provider_list, str], str, ChatModelExtraParams],
+        ]
+    ],
+    *,
+    model_kwargs: Optional[ChatModelExtraParams] = None,
+    breaker_kwargs: Optional[dict[str, Any]] = None,
+) -> ChatFailoverModel:
+    """Get a chat model that fails over between providers.
+
+    Args:
+        candidates: `(provider, model)` or `(provider, model, model_kwargs)`
+            tuples in order of preference.
+        model_kwargs: Extra params passed to every model. `max_retries`
+            defaults to 0, failing over replaces retrying a provider that is down.
+        breaker_kwargs: Settings for providers' circuit breakers, see
+            `CircuitBreaker`. Breakers are shared per provider in the process,
+            so the settings only apply to breakers that do not exist yet.
+
+    Returns:
+        A chat model that tries the candidates in order and skips providers
+        whose circuit is open.
+
+    """
+    from .failover import ChatFailoverModel, get_circuit_breaker
+
+    if not candidates:
+        raise ValueError("At least one (provider, model) candidate is required")
+
+    models: list[BaseChatModel] = []
+    breakers = []
+    for provider, model, *rest in candidates:
+        kwargs: dict[str, Any] = {"max_retries": 0, **(model_kwargs or {})}
+        if rest:
+            kwargs.update(rest[0])
+        models.append(
+            get_openai_like_llm_instance(
+                model,
+                provider=provider,
+                model_kwargs=kwargs,  # type: ignore[arg-type]
+            ),
+        )
+        breakers.append(get_circuit_breaker(provider, **(breaker_kwargs or {})))
+    return ChatFailoverModel(models=models, breakers=breakers)
+
+
 @cache
 def create_openai_like_chat_model(
-    provider: provider_list,
+    provider: Union[provider_list, str],
 ) -> Type[ChatCustomOpenAILikeModel]:
+    from .utils import _create_openai_like_chat_model
+
     return _create_openai_like_chat_model(provider)
 
 
 def get_openai_like_embedding(
     model: str,
-    provider: provider_emb_list,
+    provider: Union[provider_emb_list, str],
     dimensions: Optional[int] = None,
     chunk_size: Optional[int] = None,
     max_retries: Optional[int] = None,
     model_kwargs: Optional[dict[str, Any]] = None,
 ) -> OpenAILikeEmbedding:
     """Get an instance of an embedding model that is compatible with the OpenAI API.
+
     Args:
         model: The model to use.
         provider: The provider to use.
         dimensions: The dimensions of the embedding.
-        chunk_size: The size of the chunk to use when embedding.
+        chunk_size: The maximum number of texts per request. Defaults to the
+            provider's batch limit.
         max_retries: The maximum number of retries to use when embedding.
         model_kwargs: Extra params to pass to the model.
+
     Returns:
         An instance of an embedding model that is compatible with the OpenAI API.
+
     """
+    from .utils import _create_openai_like_embbeding
+
     model_kwargs = model_kwargs or {}
     if max_retries:
         model_kwargs["max_retries"] = max_retries
@@ -0,0 +1,231 @@
+"""Adaptive (AIMD) concurrency for bulk generation."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import openai
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Errors that mean "slow down". The input is retried at lower concurrency.
+OVERLOAD_ERRORS: Tuple[type, ...] = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APIConnectionError,
+)
+
+
+class AIMDController:
+    """Find the highest sustainable concurrency by AIMD.
+
+    AIMD is additive increase, multiplicative decrease.
+
+    Every successful request grows the limit by `increase / limit`, i.e. by
+    `increase` per round of requests. An overload error (429, 5xx, timeout) or
+    a latency EWMA above `latency_tolerance` times the best one seen cuts the
+    limit by `decrease`. Cuts happen at most once per observed latency, so a
+    burst of failures from one round only counts once.
+
+    Args:
+        initial: Starting concurrency.
+        minimum: Lowest concurrency.
+        maximum: Highest concurrency.
+        increase: Additive increase per round of successful requests.
+        decrease: Factor the limit is multiplied with on overload.
+        latency_tolerance: Latency growth over the baseline treated as overload.
+        decay: Weight of the newest sample in the latency EWMA.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 256,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+        decay: float = 0.1,
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.decay = decay
+        self._limit = float(min(max(initial, minimum), maximum))
+        self.latency: Optional[float] = None
+        self.baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def _cut(self, now: float) -> None:
+        if now - self._last_decrease < (self.latency or 0.0):
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.minimum), self._limit * self.decrease)
+
+    def on_success(self, latency: float) -> None:
+        with self._lock:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.decay * (latency - self.latency)
+            if self.baseline is None or self.latency < self.baseline:
+                self.baseline = self.latency
+            if self.latency > self.baseline * self.latency_tolerance:
+                self._cut(time.monotonic())
+            else:
+                self._limit = min(
+                    float(self.maximum),
+                    self._limit + self.increase / self._limit,
+                )
+
+    def on_overload(self) -> None:
+        with self._lock:
+            self._cut(time.monotonic())
+
+
+def run_adaptive(
+    fn: Callable[[T], R],
+    inputs: Iterable[T],
+    controller: AIMDController,
+    *,
+    max_attempts: int = 3,
+    return_exceptions: bool = False,
+) -> Iterator[Tuple[int, Union[R, Exception]]]:
+    """Call `fn` on every input from a thread pool sized by `controller`.
+
+    `inputs` is consumed lazily, so it can be a generator over millions of
+    prompts.
+
+    Yields:
+        `(index, output)` pairs in completion order.
+
+    """
+    source = enumerate(inputs)
+    retries: Deque[Tuple[int, T, int]] = deque()
+    items: Dict[Future, Tuple[int, T, int]] = {}
+    exhausted = False
+
+    def call(item: T) -> Tuple[Union[R, BaseException], float]:
+        start = time.monotonic()
+        try:
+            return fn(item), time.monotonic() - start
+        except Exception as e:
+            return e, time.monotonic() - start
+
+    with ThreadPoolExecutor(max_workers=controller.maximum) as pool:
+        while True:
+            while len(items) < controller.limit:
+                if retries:
+                    index, item, attempt = retries.popleft()
+                elif not exhausted:
+                    try:
+                        index, item = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        continue
+                    attempt = 1
+                else:
+                    break
+                items[pool.submit(call, item)] = (index, item, attempt)
+            if not items:
+                return
+            done, _ = wait(items, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, item, attempt = items.pop(future)
+                output, latency = future.result()
+                if isinstance(output, OVERLOAD_ERRORS):
+                    controller.on_overload()
+                    if attempt < max_attempts:
+                        retries.append((index, item, attempt + 1))
+                        continue
+                elif not isinstance(output, Exception):
+                    controller.on_success(latency)
+                if isinstance(output, Exception) and not return_exceptions:
+                    raise output
+                yield index, output  # type: ignore[misc]
+
+
+async def arun_adaptive(
+    fn: Callable[[T], Awaitable[R]],
+    inputs: Iterable[T],
+    controller: AIMDController,
+    *,
+    max_attempts: int = 3,
+    return_exceptions: bool = False,
+) -> AsyncIterator[Tuple[int, Union[R, Exception]]]:
+    """Async variant of `run_adaptive`, running `fn` as tasks."""
+    source = enumerate(inputs)
+    retries: Deque[Tuple[int, T, int]] = deque()
+    tasks: Set[asyncio.Task] = set()
+    exhausted = False
+
+    async def call(index: int, item: T, attempt: int) -> Tuple[Any, ...]:
+        start = time.monotonic()
+        try:
+            output: Any = await fn(item)
+        except Exception as e:
+            output = e
+        return index, item, attempt, output, time.monotonic() - start
+
+    try:
+        while True:
+            while len(tasks) < controller.limit:
+                if retries:
+                    index, item, attempt = retries.popleft()
+                elif not exhausted:
+                    try:
+                        index, item = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        continue
+                    attempt = 1
+                else:
+                    break
+                tasks.add(asyncio.create_task(call(index, item, attempt)))
+            if not tasks:
+                return
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, item, attempt, output, latency = task.result()
+                if isinstance(output, OVERLOAD_ERRORS):
+                    controller.on_overload()
+                    if attempt < max_attempts:
+                        retries.append((index, item, attempt + 1))
+                        continue
+                elif not isinstance(output, Exception):
+                    controller.on_success(latency)
+                if isinstance(output, Exception) and not return_exceptions:
+                    raise output
+                yield index, output
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,335 @@
+"""Client-side load balancing over several OpenAI-compatible endpoints."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Literal, Optional, Sequence, Tuple, Union
+
+import httpx
+
+BalancingStrategy = Literal["least_outstanding", "ewma"]
+
+
+def split_endpoints(api_base: Union[str, Sequence[str]]) -> List[str]:
+    """Turn an `api_base` value into a list of endpoints.
+
+    Accepts a list, or a comma separated string so the `*_API_BASE`
+    environment variables can name several endpoints.
+    """
+    if isinstance(api_base, str):
+        api_base = api_base.split(",")
+    return [url.strip() for url in api_base if url and url.strip()]
+
+
+class Endpoint:
+    """Routing state of one endpoint."""
+
+    __slots__ = ("ejected_until", "ewma", "failures", "outstanding", "url")
+
+    def __init__(self, url: str) -> None:
+        self.url = httpx.URL(url)
+        self.outstanding = 0
+        self.ewma: Optional[float] = None
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def __repr__(self) -> str:
+        return f"Endpoint({str(self.url)!r})"
+
+
+class LoadBalancer:
+    """Pick an endpoint for every request and track endpoint health.
+
+    Endpoints are chosen either by the fewest in-flight requests
+    (`least_outstanding`) or by the lowest latency EWMA weighted by in-flight
+    requests (`ewma`). Health is checked passively on real traffic: after
+    `max_failures` consecutive failures (connection errors or 5xx responses)
+    an endpoint is taken out of rotation for `cooldown` seconds. Afterwards it
+    receives requests again; one success puts it back into full rotation,
+    one failure ejects it for another `cooldown`. If every endpoint is
+    ejected, the one that comes back first is used rather than failing.
+
+    Args:
+        endpoints: Base URLs, e.g. `["http://gpu-1:8000/v1", "http://gpu-2:8000/v1"]`.
+        strategy: `"least_outstanding"` or `"ewma"`.
+        max_failures: Consecutive failures before an endpoint is ejected.
+        cooldown: Seconds an ejected endpoint stays out of rotation.
+        decay: Weight of the newest sample in the latency EWMA.
+
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[str],
+        *,
+        strategy: BalancingStrategy = "least_outstanding",
+        max_failures: int = 3,
+        cooldown: float = 10.0,
+        decay: float = 0.3,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("LoadBalancer needs at least one endpoint")
+        if strategy not in ("least_outstanding", "ewma"):
+            raise ValueError(f"Unknown load balancing strategy: {strategy}")  # noqa: EM102
+        self.endpoints = [Endpoint(url) for url in endpoints]
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.decay = decay
+        self._lock = threading.Lock()
+
+    @property
+    def key(self) -> Tuple:
+        return (tuple(str(e.url) for e in self.endpoints), self.strategy)
+
+    @property
+    def primary(self) -> httpx.URL:
+        """The URL the OpenAI client is configured with.
+
+        Requests are rewritten from it to the chosen endpoint.
+        """
+        return self.endpoints[0].url
+
+    def _score(self, endpoint: Endpoint) -> float:
+        if self.strategy == "ewma":
+            # Endpoints without samples score 0 so they get probed first.
+            return (endpoint.ewma or 0.0) * (endpoint.outstanding + 1)
+        return endpoint.outstanding
+
+    def acquire(self) -> Endpoint:
+        """Choose an endpoint and count the request as in flight on it."""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [e for e in self.endpoints if e.ejected_until <= now]
+            if healthy:
+                best = min(self._score(e) for e in healthy)
+                endpoint = random.choice(  # noqa: S311
+                    [e for e in healthy if self._score(e) == best],
+                )
+            else:
+                endpoint = min(self.endpoints, key=lambda e: e.ejected_until)
+            endpoint.outstanding += 1
+            return endpoint
+
+    def release(
+        self,
+        endpoint: Endpoint,
+        *,
+        ok: Optional[bool],
+        latency: Optional[float] = None,
+    ) -> None:
+        """Record the outcome of a request started with `acquire`.
+
+        `ok=None` (e.g. the request was cancelled) only ends the request
+        without touching the endpoint's health.
+        """
+        with self._lock:
+            endpoint.outstanding = max(endpoint.outstanding - 1, 0)
+            if latency is not None:
+                if endpoint.ewma is None:
+                    endpoint.ewma = latency
+                else:
+                    endpoint.ewma += self.decay * (latency - endpoint.ewma)
+            if ok is None:
+                return
+            if ok:
+                endpoint.failures = 0
+                endpoint.ejected_until = 0.0
+                return
+            endpoint.failures += 1
+            if endpoint.failures >= self.max_failures:
+                endpoint.ejected_until = time.monotonic() + self.cooldown
+
+    def route(self, request: httpx.Request, endpoint: Endpoint) -> None:
+        """Point `request`, built against `primary`, at `endpoint`."""
+        prefix = self.primary.path.rstrip("/")
+        path = request.url.path
+        if path.startswith(prefix):
+            path = path[len(prefix) :]
+        request.url = endpoint.url.copy_with(
+            path=endpoint.url.path.rstrip("/") + path,
+            query=request.url.query or None,
+        )
+        request.headers["Host"] = request.url.netloc.decode("ascii")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": str(e.url),
+                    "outstanding": e.outstanding,
+                    "ewma": e.ewma,
+                    "failures": e.failures,
+                    "healthy": e.ejected_until <= now,
+                }
+                for e in self.endpoints
+            ]
+
+
+def _is_failure(response: httpx.Response) -> bool:
+    return response.status_code >= 500
+
+
+class _TrackedStream(httpx.SyncByteStream):
+    def __init__(self, stream: Any, on_close: Any) -> None:
+        self._stream = stream
+        self._on_close = on_close
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._on_close()
+
+
+class _AsyncTrackedStream(httpx.AsyncByteStream):
+    def __init__(self, stream: Any, on_close: Any) -> None:
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self) -> Any:
+        async for part in self._stream:
+            yield part
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._on_close()
+
+
+class _Release:
+    """Release an endpoint exactly once, when the response body is closed."""
+
+    __slots__ = ("balancer", "done", "endpoint", "latency", "ok")
+
+    def __init__(
+        self,
+        balancer: LoadBalancer,
+        endpoint: Endpoint,
+        *,
+        ok: bool,
+        latency: float,
+    ) -> None:
+        self.balancer = balancer
+        self.endpoint = endpoint
+        self.ok = ok
+        self.latency = latency
+        self.done = False
+
+    def __call__(self) -> None:
+        if not self.done:
+            self.done = True
+            self.balancer.release(self.endpoint, ok=self.ok, latency=self.latency)
+
+
+class BalancedTransport(httpx.BaseTransport):
+    """httpx transport that sends every request through a `LoadBalancer`.
+
+    Streaming responses count as in flight until closed.
+    """
+
+    def __init__(
+        self,
+        balancer: LoadBalancer,
+        transport: Optional[httpx.BaseTransport] = None,
+        **transport_kwargs: Any,
+    ) -> None:
+        self.balancer = balancer
+        self._transport = transport or httpx.HTTPTransport(**transport_kwargs)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = self.balancer.acquire()
+        self.balancer.route(request, endpoint)
+        start = time.monotonic()
+        try:
+            response = self._transport.handle_request(request)
+        except httpx.TransportError:
+            self.balancer.release(endpoint, ok=False)
+            raise
+        except BaseException:
+            self.balancer.release(endpoint, ok=None)
+            raise
+        # Latency is time to headers, which is what matters for streams too.
+        release = _Release(
+            self.balancer,
+            endpoint,
+            ok=not _is_failure(response),
+            latency=time.monotonic() - start,
+        )
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncBalancedTransport(httpx.AsyncBaseTransport):
+    """Async variant of `BalancedTransport`."""
+
+    def __init__(
+        self,
+        balancer: LoadBalancer,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        **transport_kwargs: Any,
+    ) -> None:
+        self.balancer = balancer
+        self._transport = transport or httpx.AsyncHTTPTransport(**transport_kwargs)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = self.balancer.acquire()
+        self.balancer.route(request, endpoint)
+        start = time.monotonic()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TransportError:
+            self.balancer.release(endpoint, ok=False)
+            raise
+        except BaseException:
+            self.balancer.release(endpoint, ok=None)
+            raise
+        release = _Release(
+            self.balancer,
+            endpoint,
+            ok=not _is_failure(response),
+            latency=time.monotonic() - start,
+        )
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_AsyncTrackedStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+_balancers: Dict[Tuple, LoadBalancer] = {}
+_balancers_lock = threading.Lock()
+
+
+def get_load_balancer(
+    endpoints: Sequence[str],
+    strategy: BalancingStrategy = "least_outstanding",
+) -> LoadBalancer:
+    """Return the process-wide balancer for these endpoints and strategy.
+
+    Sharing it lets every model instance see the same health and load state.
+    """
+    key = (tuple(endpoints), strategy)
+    with _balancers_lock:
+        balancer = _balancers.get(key)
+        if balancer is None:
+            balancer = _balancers[key] = LoadBalancer(endpoints, strategy=strategy)
+        return balancer
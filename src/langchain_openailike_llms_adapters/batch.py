@@ -0,0 +1,364 @@
+"""Offline jobs through the OpenAI-compatible `/v1/files` + `/v1/batches` API."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.outputs import ChatResult
+
+if TYPE_CHECKING:
+    from .utils import ChatCustomOpenAILikeModel
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+# Batches created this many seconds before the recorded submission time are
+# not looked at when resuming, allowing for clock skew with the provider.
+_CLOCK_SKEW = 300
+
+
+class BatchRequestError(RuntimeError):
+    """A request of an offline batch job did not produce a response."""
+
+    def __init__(self, index: int, error: Any) -> None:
+        super().__init__(f"Batch request {index} failed: {error}")
+        self.index = index
+        self.error = error
+
+
+class BatchJob:
+    """Run chat requests through a provider's offline batch API.
+
+    Requests are written as JSONL, split into shards of at most `shard_size`
+    requests and `max_shard_bytes` bytes, uploaded with `files.create` and
+    submitted with `batches.create`. Statuses are polled with exponential
+    backoff from `poll_interval` up to `max_poll_interval` seconds, and
+    results are mapped back to `ChatResult` objects in input order.
+
+    With `state_path`, the file and batch ids are saved after every step, so
+    running the same job again after a crash picks up the submitted batches
+    instead of paying for them twice. Batches are tagged with the job's
+    fingerprint and shard in their `metadata`. If the process died while a
+    batch was being created, it is found by those tags on resume instead of
+    being created again.
+
+    Args:
+        model: Chat model whose client, model name and params are used.
+        inputs: One input (a prompt or a list of messages) per request.
+        state_path: JSON file the progress is saved to.
+        shard_size: Maximum number of requests per batch file.
+        max_shard_bytes: Maximum size of a batch file.
+        completion_window: Completion window passed to the provider.
+        poll_interval: First delay between status checks.
+        max_poll_interval: Longest delay between status checks.
+        **kwargs: Extra request params, as for `invoke`.
+
+    """
+
+    def __init__(
+        self,
+        model: ChatCustomOpenAILikeModel,
+        inputs: Sequence[LanguageModelInput],
+        *,
+        state_path: Optional[Union[str, Path]] = None,
+        shard_size: int = 50_000,
+        max_shard_bytes: int = 100 * 1024 * 1024,
+        completion_window: str = "24h",
+        poll_interval: float = 5.0,
+        max_poll_interval: float = 60.0,
+        **kwargs: Any,
+    ) -> None:
+        self.model = model
+        self.completion_window = completion_window
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.state_path = Path(state_path) if state_path is not None else None
+        lines = [
+            _dump_line(index, model, input_, kwargs)
+            for index, input_ in enumerate(inputs)
+        ]
+        self.size = len(lines)
+        fingerprint = hashlib.sha256(b"".join(lines)).hexdigest()
+        self.state = self._load_state(fingerprint)
+        if self.state is None:
+            self.state = {
+                "fingerprint": fingerprint,
+                "shards": [
+                    {"start": start, "end": end}
+                    for start, end in _shard(lines, shard_size, max_shard_bytes)
+                ],
+            }
+            self._save_state()
+        self._lines = lines
+
+    def _load_state(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        if self.state_path is None or not self.state_path.exists():
+            return None
+        state = json.loads(self.state_path.read_text())
+        if state.get("fingerprint") != fingerprint:
+            msg = (
+                f"{self.state_path} belongs to a different batch job, "
+                "remove it or use another state_path"
+            )
+            raise ValueError(msg)
+        return state
+
+    def _save_state(self) -> None:
+        if self.state_path is None:
+            return
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=1))
+        os.replace(tmp, self.state_path)
+
+    @property
+    def shards(self) -> List[Dict[str, Any]]:
+        return self.state["shards"]  # type: ignore[index]
+
+    def _shard_file(self, shard: Dict[str, Any]) -> tuple:
+        data = b"".join(self._lines[shard["start"] : shard["end"]])
+        return (f"batch-{shard['start']}-{shard['end']}.jsonl", data)
+
+    def _metadata(self, shard: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            "batch_job": self.state["fingerprint"],  # type: ignore[index]
+            "shard_start": str(shard["start"]),
+        }
+
+    def _start_submitting(self, shard: Dict[str, Any]) -> None:
+        """Record that a batch is about to be created for `shard`."""
+        shard["submitting"] = int(time.time())
+        self._save_state()
+
+    def _is_submitted(self, shard: Dict[str, Any], batch: Any) -> Optional[bool]:
+        """Whether `batch` was created for `shard`, None once past its time."""
+        if batch.created_at < shard["submitting"] - _CLOCK_SKEW:
+            # Listed newest first, so every further batch is older still.
+            return None
+        if batch.input_file_id != shard["file_id"]:
+            return False
+        return (batch.metadata or {}) == self._metadata(shard)
+
+    def _submitted(self, shard: Dict[str, Any], batch: Any) -> None:
+        shard.pop("submitting", None)
+        shard["batch_id"] = batch.id
+        self._update(shard, batch)
+
+    def _update(self, shard: Dict[str, Any], batch: Any) -> None:
+        shard["status"] = batch.status
+        shard["output_file_id"] = batch.output_file_id
+        shard["error_file_id"] = batch.error_file_id
+        self._save_state()
+
+    def _pending(self) -> List[Dict[str, Any]]:
+        return [s for s in self.shards if s.get("status") not in TERMINAL_STATUSES]
+
+    def _next_delay(self, delay: float) -> float:
+        return min(delay * 2, self.max_poll_interval)
+
+    def _collect(
+        self,
+        contents: Dict[str, str],
+        *,
+        return_exceptions: bool,
+    ) -> List[Union[ChatResult, Exception]]:
+        results: List[Union[ChatResult, Exception, None]] = [None] * self.size
+        for shard in self.shards:
+            for key in ("output_file_id", "error_file_id"):
+                file_id = shard.get(key)
+                if file_id:
+                    for index, item in _parse_output(contents[file_id]):
+                        results[index] = self._to_result(index, item)
+            if shard.get("status") != "completed":
+                for index in range(shard["start"], shard["end"]):
+                    if results[index] is None:
+                        results[index] = BatchRequestError(
+                            index,
+                            f"batch {shard.get('batch_id')} {shard.get('status')}",
+                        )
+        final: List[Union[ChatResult, Exception]] = []
+        for index, result in enumerate(results):
+            if result is None:
+                result = BatchRequestError(index, "missing from the batch output")
+            if isinstance(result, Exception) and not return_exceptions:
+                raise result
+            final.append(result)
+        return final
+
+    def _to_result(
+        self,
+        index: int,
+        item: Dict[str, Any],
+    ) -> Union[ChatResult, Exception]:
+        response = item.get("response") or {}
+        body = response.get("body")
+        if item.get("error") or response.get("status_code", 200) >= 400 or not body:
+            return BatchRequestError(index, item.get("error") or body)
+        return self.model._create_chat_result(body)  # noqa: SLF001
+
+    def run(
+        self,
+        *,
+        return_exceptions: bool = False,
+    ) -> List[Union[ChatResult, Exception]]:
+        """Submit the missing shards, wait for every batch and return the results.
+
+        Args:
+            return_exceptions: Return a `BatchRequestError` for failed requests
+                instead of raising the first one.
+
+        """
+        client = self.model.root_client
+        for shard in self.shards:
+            if "file_id" not in shard:
+                uploaded = client.files.create(
+                    file=self._shard_file(shard),
+                    purpose="batch",
+                )
+                shard["file_id"] = uploaded.id
+                self._save_state()
+            if "batch_id" in shard:
+                continue
+            if "submitting" in shard:
+                for batch in client.batches.list(limit=100):
+                    found = self._is_submitted(shard, batch)
+                    if found is None:
+                        break
+                    if found:
+                        self._submitted(shard, batch)
+                        break
+                if "batch_id" in shard:
+                    continue
+            self._start_submitting(shard)
+            batch = client.batches.create(
+                input_file_id=shard["file_id"],
+                endpoint=BATCH_ENDPOINT,
+                completion_window=self.completion_window,  # type: ignore[arg-type]
+                metadata=self._metadata(shard),
+            )
+            self._submitted(shard, batch)
+        delay = self.poll_interval
+        while pending := self._pending():
+            for shard in pending:
+                self._update(shard, client.batches.retrieve(shard["batch_id"]))
+            if any(s.get("status") not in TERMINAL_STATUSES for s in self.shards):
+                time.sleep(delay)
+                delay = self._next_delay(delay)
+        contents = {
+            file_id: client.files.content(file_id).text
+            for shard in self.shards
+            for file_id in (shard.get("output_file_id"), shard.get("error_file_id"))
+            if file_id
+        }
+        return self._collect(contents, return_exceptions=return_exceptions)
+
+    async def arun(
+        self,
+        *,
+        return_exceptions: bool = False,
+    ) -> List[Union[ChatResult, Exception]]:
+        """Async variant of `run`."""
+        client = self.model.root_async_client
+        for shard in self.shards:
+            if "file_id" not in shard:
+                uploaded = await client.files.create(
+                    file=self._shard_file(shard),
+                    purpose="batch",
+                )
+                shard["file_id"] = uploaded.id
+                self._save_state()
+            if "batch_id" in shard:
+                continue
+            if "submitting" in shard:
+                async for batch in client.batches.list(limit=100):
+                    found = self._is_submitted(shard, batch)
+                    if found is None:
+                        break
+                    if found:
+                        self._submitted(shard, batch)
+                        break
+                if "batch_id" in shard:
+                    continue
+            self._start_submitting(shard)
+            batch = await client.batches.create(
+                input_file_id=shard["file_id"],
+                endpoint=BATCH_ENDPOINT,
+                completion_window=self.completion_window,  # type: ignore[arg-type]
+                metadata=self._metadata(shard),
+            )
+            self._submitted(shard, batch)
+        delay = self.poll_interval
+        while pending := self._pending():
+            batches = await asyncio.gather(
+                *(client.batches.retrieve(shard["batch_id"]) for shard in pending),
+            )
+            for shard, batch in zip(pending, batches):
+                self._update(shard, batch)
+            if any(s.get("status") not in TERMINAL_STATUSES for s in self.shards):
+                await asyncio.sleep(delay)
+                delay = self._next_delay(delay)
+        file_ids = [
+            file_id
+            for shard in self.shards
+            for file_id in (shard.get("output_file_id"), shard.get("error_file_id"))
+            if file_id
+        ]
+        responses = await asyncio.gather(*(client.files.content(f) for f in file_ids))
+        contents = {f: r.text for f, r in zip(file_ids, responses)}
+        return self._collect(contents, return_exceptions=return_exceptions)
+
+
+def _dump_line(
+    index: int,
+    model: ChatCustomOpenAILikeModel,
+    input_: LanguageModelInput,
+    kwargs: Dict[str, Any],
+) -> bytes:
+    body = model._get_request_payload(input_, **kwargs)  # noqa: SLF001
+    # Batch requests are never streamed.
+    body.pop("stream", None)
+    body.pop("stream_options", None)
+    line = {
+        "custom_id": f"request-{index}",
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": body,
+    }
+    return (json.dumps(line, ensure_ascii=False, default=str) + "\n").encode()
+
+
+def _shard(lines: List[bytes], max_items: int, max_bytes: int) -> Iterator[tuple]:
+    start = 0
+    size = 0
+    for index, line in enumerate(lines):
+        full = index - start >= max_items or size + len(line) > max_bytes
+        if index > start and full:
+            yield start, index
+            start, size = index, 0
+        size += len(line)
+    if start < len(lines):
+        yield start, len(lines)
+
+
+def _parse_output(text: str) -> Iterator[tuple]:
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        custom_id = str(item.get("custom_id", ""))
+        if custom_id.startswith("request-"):
+            yield int(custom_id[len("request-") :]), item
@@ -0,0 +1,78 @@
+"""Pack embedding inputs into request batches by item count and token budget."""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+import openai
+
+# Phrases providers use when a request carries too many inputs or tokens.
+_TOO_LARGE_HINTS = (
+    "batch size",
+    "too many input",
+    "too many item",
+    "number of input",
+    "array too long",
+    "per request",
+)
+# A single input over the model's context length fails in any batch.
+_CONTEXT_HINTS = (
+    "context length",
+    "context_length",
+    "context window",
+    "maximum context",
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens in `text` without a tokenizer.
+
+    ASCII text averages about four characters per token, while CJK and other
+    non-ASCII characters are usually one token each.
+    """
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def pack_batches(
+    texts: List[str],
+    max_items: int,
+    max_tokens: Optional[int] = None,
+) -> List[List[str]]:
+    """Split `texts` in order into batches within both limits.
+
+    Each batch holds at most `max_items` texts and `max_tokens` estimated
+    tokens. A single text above the token budget still gets a batch of its
+    own.
+    """
+    max_items = max(max_items, 1)
+    if max_tokens is None:
+        return [texts[i : i + max_items] for i in range(0, len(texts), max_items)]
+
+    batches: List[List[str]] = []
+    batch: List[str] = []
+    batch_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if batch and (len(batch) >= max_items or batch_tokens + tokens > max_tokens):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def is_batch_too_large(error: Exception) -> bool:
+    """Whether the provider rejected a request because the batch was too big."""
+    if not isinstance(error, openai.APIStatusError):
+        return False
+    if error.status_code == 413:
+        return True
+    if error.status_code not in (400, 422):
+        return False
+    message = str(error).lower()
+    if any(hint in message for hint in _CONTEXT_HINTS):
+        return False
+    return any(hint in message for hint in _TOO_LARGE_HINTS)
@@ -0,0 +1,260 @@
+"""Response caches for `ChatCustomOpenAILikeModel`."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+from langchain_core.load import dumpd, load
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Transport-only options that do not change the generated response.
+_IGNORED_PAYLOAD_KEYS = ("stream", "stream_options")
+
+
+def response_cache_key(payload: Dict[str, Any]) -> str:
+    """Return a stable hash of a chat completion request payload.
+
+    The payload already carries the messages, model, bound tools and every
+    effective default param (including `extra_body` thinking options), so two
+    requests get the same key exactly when the provider would see the same
+    request.
+    """
+    data = {k: v for k, v in payload.items() if k not in _IGNORED_PAYLOAD_KEYS}
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _dump_result(result: ChatResult) -> str:
+    return json.dumps(
+        {
+            "generations": [
+                {
+                    "message": dumpd(generation.message),
+                    "generation_info": generation.generation_info,
+                }
+                for generation in result.generations
+            ],
+            "llm_output": result.llm_output,
+        },
+        default=str,
+    )
+
+
+def _load_result(raw: str) -> ChatResult:
+    data = json.loads(raw)
+    return ChatResult(
+        generations=[
+            ChatGeneration(
+                message=load(generation["message"]),
+                generation_info=generation["generation_info"],
+            )
+            for generation in data["generations"]
+        ],
+        llm_output=data["llm_output"],
+    )
+
+
+def result_to_chunks(result: ChatResult) -> Iterator[ChatGenerationChunk]:
+    """Replay a cached single-generation result as a stream of one chunk."""
+    generation = result.generations[0]
+    message: BaseMessage = generation.message
+    if isinstance(message, AIMessage):
+        chunk = AIMessageChunk(
+            content=message.content,
+            additional_kwargs=message.additional_kwargs,
+            response_metadata=message.response_metadata,
+            usage_metadata=message.usage_metadata,
+            id=message.id,
+            tool_call_chunks=[
+                {
+                    "name": tool_call["name"],
+                    "args": json.dumps(tool_call["args"], ensure_ascii=False),
+                    "id": tool_call["id"],
+                    "index": index,
+                }
+                for index, tool_call in enumerate(message.tool_calls)
+            ],
+        )
+    else:
+        chunk = AIMessageChunk(content=message.content)
+    yield ChatGenerationChunk(
+        message=chunk,
+        generation_info=generation.generation_info,
+    )
+
+
+class BaseResponseCache(ABC):
+    """Interface for response caches used by `ChatCustomOpenAILikeModel`.
+
+    Implementations store `ChatResult` objects under the key produced by
+    `response_cache_key` and keep hit/miss counters.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[ChatResult]:
+        """Return the cached result for `key`, or None."""
+
+    @abstractmethod
+    def _set(self, key: str, result: ChatResult) -> None:
+        """Store `result` under `key`."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every cached result."""
+
+    def lookup(self, key: str) -> Optional[ChatResult]:
+        result = self._get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def update(self, key: str, result: ChatResult) -> None:
+        self._set(key, result)
+
+    async def alookup(self, key: str) -> Optional[ChatResult]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.lookup, key)
+
+    async def aupdate(self, key: str, result: ChatResult) -> None:
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            self.update,
+            key,
+            result,
+        )
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class InMemoryResponseCache(BaseResponseCache):
+    """An in-process LRU cache with optional time-to-live.
+
+    Args:
+        max_size: Maximum number of cached responses. The least recently used
+            entry is evicted first.
+        ttl: Seconds a response stays valid. None keeps it until evicted.
+
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None) -> None:
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[str, Tuple[float, ChatResult]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[ChatResult]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            created, result = item
+            if self.ttl is not None and time.time() - created > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            # Callers mutate message metadata, so hand out a copy.
+            return result.model_copy(deep=True)
+
+    def _set(self, key: str, result: ChatResult) -> None:
+        with self._lock:
+            self._data[key] = (time.time(), result)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    async def alookup(self, key: str) -> Optional[ChatResult]:
+        return self.lookup(key)
+
+    async def aupdate(self, key: str, result: ChatResult) -> None:
+        self.update(key, result)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteResponseCache(BaseResponseCache):
+    """A persistent cache in a SQLite file that several processes can share.
+
+    Args:
+        database_path: Path of the SQLite database file.
+        ttl: Seconds a response stays valid. None keeps it forever.
+
+    """
+
+    def __init__(
+        self,
+        database_path: Union[str, Path] = ".openailike_cache.db",
+        ttl: Optional[float] = None,
+    ) -> None:
+        super().__init__()
+        self.database_path = str(database_path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.database_path,
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        # WAL lets readers in other processes proceed while one writes.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_responses "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)",
+        )
+
+    def _get(self, key: str) -> Optional[ChatResult]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM chat_responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and time.time() - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM chat_responses WHERE key = ?", (key,))
+                return None
+        return _load_result(row[0])
+
+    def _set(self, key: str, result: ChatResult) -> None:
+        value = _dump_result(result)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_responses (key, value, created) "
+                "VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chat_responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,286 @@
+"""What each provider's models support, looked up by model name."""
+
+from __future__ import annotations
+
+import fnmatch
+import json
+import re
+import threading
+import time
+from importlib import resources
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    List,
+    Literal,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+)
+
+import httpx
+
+
+class ModelCapabilities(NamedTuple):
+    """Capabilities of a model. None means unknown, so the default applies."""
+
+    force_streaming: Optional[Literal["always", "thinking"]] = None
+    """The API only answers streaming requests, always or while thinking."""
+    thinking: Optional[Literal["optional", "default", "always"]] = None
+    """Whether the model can think, thinks unless `enable_thinking=False`,
+    or always thinks."""
+    tool_choice: Optional[bool] = None
+    """Accepts `tool_choice` naming a function."""
+    parallel_tool_calls: Optional[bool] = None
+    """Accepts the `parallel_tool_calls` parameter."""
+    json_schema: Optional[bool] = None
+    """Accepts `response_format={"type": "json_schema", ...}`."""
+    context_length: Optional[int] = None
+    """Maximum number of tokens of prompt and answer."""
+    max_batch_size: Optional[int] = None
+    """Maximum number of inputs per embedding request."""
+
+    def thinks(self, *, enable_thinking: Optional[bool]) -> bool:
+        """Whether a request with this `enable_thinking` setting thinks."""
+        if self.thinking == "always" or enable_thinking:
+            return True
+        return enable_thinking is None and self.thinking == "default"
+
+    def streaming_required(self, *, enable_thinking: Optional[bool]) -> bool:
+        """Whether a request with this `enable_thinking` setting must stream."""
+        if self.force_streaming == "thinking":
+            return self.thinks(enable_thinking=enable_thinking)
+        return self.force_streaming == "always"
+
+
+_EMPTY = ModelCapabilities()
+_GLOB_CHARS = re.compile(r"[*?\[]")
+_ANY = fnmatch.translate("*")
+
+
+def _api_name(provider: str) -> str:
+    from .provider import providers
+
+    # Custom models use "CUSTOM" as their api name.
+    return providers[provider]["api_id"] if provider in providers else "CUSTOM"
+
+
+def _merge(
+    base: ModelCapabilities,
+    update: Mapping[str, Any],
+) -> ModelCapabilities:
+    known = {k: v for k, v in update.items() if v is not None}
+    unknown = set(known) - set(ModelCapabilities._fields)
+    if unknown:
+        raise ValueError(f"Unknown model capabilities: {sorted(unknown)}")  # noqa: EM102
+    return base._replace(**known)
+
+
+class _ProviderRules:
+    def __init__(self) -> None:
+        self.exact: Dict[str, Dict[str, Any]] = {}
+        # In the order they were added; later rules override earlier ones.
+        self.patterns: List[Tuple[Pattern[str], Dict[str, Any]]] = []
+        self.resolved: Dict[str, ModelCapabilities] = {}
+
+    def add(self, model: str, capabilities: Mapping[str, Any]) -> None:
+        _merge(_EMPTY, capabilities)
+        if _GLOB_CHARS.search(model):
+            pattern = re.compile(fnmatch.translate(model), re.IGNORECASE)
+            self.patterns.append((pattern, dict(capabilities)))
+        else:
+            self.exact.setdefault(model.lower(), {}).update(capabilities)
+        self.resolved.clear()
+
+    def has(self, model: str) -> bool:
+        return model.lower() in self.exact
+
+    def model_rules(self, model: str) -> ModelCapabilities:
+        """Like `lookup`, without the provider-wide `"*"` defaults."""
+        name = model.lower()
+        capabilities = _EMPTY
+        for pattern, update in self.patterns:
+            if pattern.pattern != _ANY and pattern.match(name):
+                capabilities = _merge(capabilities, update)
+        if name in self.exact:
+            capabilities = _merge(capabilities, self.exact[name])
+        return capabilities
+
+    def lookup(self, model: str) -> ModelCapabilities:
+        name = model.lower()
+        capabilities = self.resolved.get(name)
+        if capabilities is None:
+            capabilities = _EMPTY
+            for pattern, update in self.patterns:
+                if pattern.match(name):
+                    capabilities = _merge(capabilities, update)
+            if name in self.exact:
+                capabilities = _merge(capabilities, self.exact[name])
+            self.resolved[name] = capabilities
+        return capabilities
+
+
+class CapabilityRegistry:
+    """Capabilities of models per provider.
+
+    Rules are keyed by model name. Names containing `*`, `?` or `[` are glob
+    patterns such as `"qwq*"`; `"*"` sets defaults for the whole provider.
+    A model gets every matching pattern in the order they were added,
+    overridden by its exact entry. A model without an exact entry first gets
+    the model rules, but not the `"*"` defaults, of the provider its name
+    points to: `"qwen3-32b"` served by vLLM or a custom endpoint still
+    accepts `tool_choice`. Lookups are cached, so after the first one per
+    model they are a dict access.
+
+    Data files are JSON objects mapping provider names (as in
+    `get_openai_like_llm_instance`) to rules::
+
+        {"vllm": {"*": {"tool_choice": true}, "qwen3-8b": {"thinking": "default"}}}
+    """
+
+    def __init__(self) -> None:
+        self._providers: Dict[str, _ProviderRules] = {}
+        self._resolved: Dict[Tuple[str, str, str], ModelCapabilities] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        provider: str,
+        model: str,
+        **capabilities: Any,
+    ) -> None:
+        """Set capabilities for a model name or pattern of `provider`.
+
+        Args:
+            provider: Provider name, e.g. `"dashscope"`.
+            model: Model name, or a glob pattern.
+            **capabilities: Fields of `ModelCapabilities`.
+
+        """
+        with self._lock:
+            rules = self._providers.setdefault(_api_name(provider), _ProviderRules())
+            rules.add(model, capabilities)
+            self._resolved.clear()
+
+    def update(self, data: Mapping[str, Mapping[str, Mapping[str, Any]]]) -> None:
+        """Register every rule of a data file's contents."""
+        for provider, models in data.items():
+            for model, capabilities in models.items():
+                self.register(provider, model, **capabilities)
+
+    def load(self, path: Union[str, Path]) -> None:
+        """Register the rules of a JSON data file."""
+        self.update(json.loads(Path(path).expanduser().read_text(encoding="utf-8")))
+
+    def lookup(self, provider: str, model: str) -> ModelCapabilities:
+        """Return the capabilities of `model` served by `provider`."""
+        return self._lookup(_api_name(provider), model)
+
+    def _lookup(self, api_name: str, model: str) -> ModelCapabilities:
+        from .provider import _get_provider_with_model
+
+        # The provider the model name points to, as chosen when none is given.
+        named = _api_name(_get_provider_with_model(model))
+        key = (api_name, model, named)
+        capabilities = self._resolved.get(key)
+        if capabilities is None:
+            capabilities = self._resolve(api_name, model, named)
+            self._resolved[key] = capabilities
+        return capabilities
+
+    def _resolve(self, api_name: str, model: str, named: str) -> ModelCapabilities:
+        rules = self._providers.get(api_name)
+        if rules is not None and rules.has(model):
+            return rules.lookup(model)
+        named_rules = self._providers.get(named) if named != api_name else None
+        capabilities = named_rules.model_rules(model) if named_rules else _EMPTY
+        if rules is None:
+            return capabilities
+        return _merge(capabilities, rules.lookup(model)._asdict())
+
+    def load_models_endpoint(
+        self,
+        provider: str,
+        base_url: str,
+        *,
+        api_key: Optional[str] = None,
+        cache_path: Optional[Union[str, Path]] = None,
+        max_age: float = 86400.0,
+        timeout: float = 10.0,
+    ) -> int:
+        """Register what a provider's `/models` endpoint reports.
+
+        Context lengths are read from vLLM's `max_model_len` and from
+        `context_length`; OpenRouter style `supported_parameters` set the
+        tool and `json_schema` support. The response is cached in
+        `cache_path` and fetched again once it is older than `max_age`
+        seconds.
+
+        Args:
+            provider: Provider name the models are registered for.
+            base_url: Base URL of the API, e.g. `"http://localhost:8000/v1"`.
+            api_key: Bearer token, if the endpoint needs one.
+            cache_path: JSON file to keep the response in between runs.
+            max_age: Seconds a cached response is used for.
+            timeout: Request timeout in seconds.
+
+        Returns:
+            The number of models registered.
+
+        """
+        models = None
+        cache_file = Path(cache_path).expanduser() if cache_path is not None else None
+        if (
+            cache_file is not None
+            and cache_file.exists()
+            and time.time() - cache_file.stat().st_mtime < max_age
+        ):
+            models = json.loads(cache_file.read_text(encoding="utf-8"))
+        if models is None:
+            headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+            response = httpx.get(
+                base_url.rstrip("/") + "/models",
+                headers=headers,
+                timeout=timeout,
+            )
+            response.raise_for_status()
+            models = response.json().get("data", [])
+            if cache_file is not None:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                cache_file.write_text(json.dumps(models), encoding="utf-8")
+        count = 0
+        for entry in models:
+            if entry.get("id"):
+                self.register(provider, entry["id"], **_from_models_entry(entry))
+                count += 1
+        return count
+
+
+def _from_models_entry(entry: Mapping[str, Any]) -> Dict[str, Any]:
+    capabilities: Dict[str, Any] = {}
+    context_length = entry.get("max_model_len") or entry.get("context_length")
+    if isinstance(context_length, int):
+        capabilities["context_length"] = context_length
+    parameters = entry.get("supported_parameters")
+    if isinstance(parameters, list):
+        capabilities["tool_choice"] = "tool_choice" in parameters
+        capabilities["parallel_tool_calls"] = "parallel_tool_calls" in parameters
+        capabilities["json_schema"] = "structured_outputs" in parameters
+        if "reasoning" in parameters:
+            capabilities["thinking"] = "optional"
+    return capabilities
+
+
+def _bundled_registry() -> CapabilityRegistry:
+    registry = CapabilityRegistry()
+    data = resources.files(__package__).joinpath("capabilities.json")
+    registry.update(json.loads(data.read_text(encoding="utf-8")))
+    return registry
+
+
+capability_registry = _bundled_registry()
+"""Registry used by all models, filled from the bundled `capabilities.json`."""
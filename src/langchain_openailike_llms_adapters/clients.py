@@ -0,0 +1,383 @@
+"""Process-wide registry of shared OpenAI clients and their connection pools."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import httpx
+import openai
+
+from .balancer import AsyncBalancedTransport, BalancedTransport, LoadBalancer
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn client params into something hashable so they can be used as a key."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class _ClientEntry:
+    __slots__ = ("client", "http_client", "last_used", "loop", "refs")
+
+    def __init__(
+        self,
+        client: Any,
+        http_client: Any,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        self.client = client
+        self.http_client = http_client
+        self.refs = 0
+        self.last_used = time.monotonic()
+        self.loop = weakref.ref(loop) if loop is not None else None
+
+    def touch(self) -> None:
+        self.last_used = time.monotonic()
+
+    @property
+    def loop_closed(self) -> bool:
+        if self.loop is None:
+            return False
+        loop = self.loop()
+        return loop is None or loop.is_closed()
+
+
+class ClientRegistry:
+    """Share `openai.OpenAI`/`openai.AsyncOpenAI` clients across model instances.
+
+    Clients are keyed by `(provider, api_base, api_key, timeout, headers, ...)`,
+    so every instance talking to the same endpoint with the same credentials
+    reuses one httpx connection pool instead of paying a new TCP/TLS handshake.
+    Async clients are additionally keyed by the running event loop because
+    httpx connections can not be shared between loops.
+
+    Args:
+        max_connections: Maximum number of connections per pool.
+        max_keepalive_connections: Maximum number of idle keep-alive connections
+            per pool.
+        keepalive_expiry: Seconds an idle keep-alive connection is kept open.
+        idle_timeout: Seconds after the last request before a pool's idle
+            connections are closed and, if no instance uses it anymore, the
+            client is dropped from the registry.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0,
+        idle_timeout: float = 300.0,
+    ) -> None:
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.idle_timeout = idle_timeout
+        self._lock = threading.RLock()
+        self._sync: Dict[Tuple, _ClientEntry] = {}
+        self._async: Dict[Tuple, _ClientEntry] = {}
+        self._last_sweep = time.monotonic()
+
+    def configure(
+        self,
+        *,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+    ) -> None:
+        """Change the pool settings. Only clients created afterwards are affected."""
+        with self._lock:
+            if max_connections is not None:
+                self.max_connections = max_connections
+            if max_keepalive_connections is not None:
+                self.max_keepalive_connections = max_keepalive_connections
+            if keepalive_expiry is not None:
+                self.keepalive_expiry = keepalive_expiry
+            if idle_timeout is not None:
+                self.idle_timeout = idle_timeout
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @staticmethod
+    def make_key(provider: str, client_params: Dict[str, Any]) -> Tuple:
+        params = dict(client_params)
+        if api_key := params.get("api_key"):
+            # Keep raw secrets out of the registry keys.
+            params["api_key"] = hashlib.sha256(str(api_key).encode()).hexdigest()
+        return (provider, _freeze(params))
+
+    def get_sync_client(
+        self,
+        provider: str,
+        client_params: Dict[str, Any],
+        *,
+        owner: Any = None,
+        balancer: Optional[LoadBalancer] = None,
+    ) -> openai.OpenAI:
+        """Return the shared sync client for these params, creating it if needed.
+
+        With a `balancer`, requests are spread over its endpoints.
+        """
+        key = (*self.make_key(provider, client_params), balancer and balancer.key)
+        with self._lock:
+            self._maybe_sweep()
+            entry = self._sync.get(key)
+            if entry is None:
+                entry = self._new_sync_entry(client_params, balancer)
+                self._sync[key] = entry
+            self._acquire(self._sync, key, entry, owner)
+            return entry.client
+
+    def get_async_client(
+        self,
+        provider: str,
+        client_params: Dict[str, Any],
+        *,
+        owner: Any = None,
+        balancer: Optional[LoadBalancer] = None,
+    ) -> openai.AsyncOpenAI:
+        """Return the shared async client for these params and the running loop."""
+        loop = _running_loop()
+        key = (
+            *self.make_key(provider, client_params),
+            balancer and balancer.key,
+            id(loop) if loop else None,
+        )
+        with self._lock:
+            self._maybe_sweep()
+            entry = self._async.get(key)
+            if entry is None or entry.loop_closed:
+                entry = self._new_async_entry(client_params, loop, balancer)
+                self._async[key] = entry
+            self._acquire(self._async, key, entry, owner)
+            return entry.client
+
+    def _new_sync_entry(
+        self,
+        client_params: Dict[str, Any],
+        balancer: Optional[LoadBalancer] = None,
+    ) -> _ClientEntry:
+        entry = _ClientEntry(None, None)
+        http_client = openai.DefaultHttpxClient(
+            limits=self.limits,
+            transport=(
+                BalancedTransport(balancer, limits=self.limits) if balancer else None
+            ),
+            event_hooks={"request": [lambda _request: entry.touch()]},
+        )
+        entry.http_client = http_client
+        entry.client = openai.OpenAI(**client_params, http_client=http_client)
+        return entry
+
+    def _new_async_entry(
+        self,
+        client_params: Dict[str, Any],
+        loop: Optional[asyncio.AbstractEventLoop],
+        balancer: Optional[LoadBalancer] = None,
+    ) -> _ClientEntry:
+        entry = _ClientEntry(None, None, loop)
+
+        async def _touch(_request: httpx.Request) -> None:
+            entry.touch()
+
+        http_client = openai.DefaultAsyncHttpxClient(
+            limits=self.limits,
+            transport=(
+                AsyncBalancedTransport(balancer, limits=self.limits)
+                if balancer
+                else None
+            ),
+            event_hooks={"request": [_touch]},
+        )
+        entry.http_client = http_client
+        entry.client = openai.AsyncOpenAI(**client_params, http_client=http_client)
+        return entry
+
+    def _acquire(
+        self,
+        table: Dict[Tuple, _ClientEntry],
+        key: Tuple,
+        entry: _ClientEntry,
+        owner: Any,
+    ) -> None:
+        entry.touch()
+        if owner is None:
+            return
+        entry.refs += 1
+        weakref.finalize(owner, self._release, table, key, entry)
+
+    def _release(
+        self,
+        table: Dict[Tuple, _ClientEntry],
+        key: Tuple,
+        entry: _ClientEntry,
+    ) -> None:
+        with self._lock:
+            if table.get(key) is entry:
+                entry.refs = max(entry.refs - 1, 0)
+
+    def _maybe_sweep(self) -> None:
+        now = time.monotonic()
+        if now - self._last_sweep >= min(self.idle_timeout, 1.0):
+            self._last_sweep = now
+            self.evict_idle()
+
+    def evict_idle(self) -> int:
+        """Close idle connections and drop unused clients.
+
+        A client is idle when no request went through it for `idle_timeout`
+        seconds. Its pooled connections are closed (the client itself stays
+        usable and reconnects on demand). Idle clients no live instance refers
+        to, and async clients whose event loop is closed, are removed.
+
+        Returns:
+            The number of clients removed from the registry.
+
+        """
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            for key, entry in list(self._sync.items()):
+                if now - entry.last_used < self.idle_timeout:
+                    continue
+                if entry.refs == 0:
+                    del self._sync[key]
+                    entry.client.close()
+                    removed += 1
+                else:
+                    # Closing the transport only drops pooled sockets.
+                    entry.http_client._transport.close()  # noqa: SLF001
+                    entry.touch()
+            loop = _running_loop()
+            for key, entry in list(self._async.items()):
+                if entry.loop_closed:
+                    del self._async[key]
+                    removed += 1
+                    continue
+                if now - entry.last_used < self.idle_timeout:
+                    continue
+                owner_loop = entry.loop() if entry.loop else None
+                if entry.refs == 0:
+                    del self._async[key]
+                    removed += 1
+                    self._schedule(owner_loop, loop, entry.client.close())
+                else:
+                    self._schedule(
+                        owner_loop,
+                        loop,
+                        entry.http_client._transport.aclose(),  # noqa: SLF001
+                    )
+                    entry.touch()
+        return removed
+
+    @staticmethod
+    def _schedule(
+        owner_loop: Optional[asyncio.AbstractEventLoop],
+        current_loop: Optional[asyncio.AbstractEventLoop],
+        coro: Any,
+    ) -> None:
+        if owner_loop is None or owner_loop.is_closed():
+            coro.close()
+        elif owner_loop is current_loop:
+            owner_loop.create_task(coro)
+        elif owner_loop.is_running():
+            asyncio.run_coroutine_threadsafe(coro, owner_loop)
+        elif current_loop is None:
+            owner_loop.run_until_complete(coro)
+        else:
+            coro.close()
+
+    def close_all(self) -> None:
+        """Close every shared client.
+
+        Instances that were created before this call keep a reference to a
+        closed client, so only call this on shutdown (or in tests).
+        """
+        loop = _running_loop()
+        with self._lock:
+            sync_entries = list(self._sync.values())
+            async_entries = list(self._async.values())
+            self._sync.clear()
+            self._async.clear()
+        for entry in sync_entries:
+            entry.client.close()
+        for entry in async_entries:
+            owner_loop = entry.loop() if entry.loop else None
+            self._schedule(owner_loop, loop, entry.client.close())
+
+    async def aclose_all(self) -> None:
+        """Close every shared client, awaiting async clients of the running loop."""
+        loop = _running_loop()
+        with self._lock:
+            sync_entries = list(self._sync.values())
+            async_entries = list(self._async.values())
+            self._sync.clear()
+            self._async.clear()
+        for entry in sync_entries:
+            entry.client.close()
+        for entry in async_entries:
+            owner_loop = entry.loop() if entry.loop else None
+            if owner_loop is None or owner_loop is loop:
+                await entry.client.close()
+            else:
+                self._schedule(owner_loop, loop, entry.client.close())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sync_clients": len(self._sync),
+                "async_clients": len(self._async),
+                "references": sum(e.refs for e in self._sync.values())
+                + sum(e.refs for e in self._async.values()),
+            }
+
+
+client_registry = ClientRegistry()
+
+
+def configure_client_pool(
+    *,
+    max_connections: Optional[int] = None,
+    max_keepalive_connections: Optional[int] = None,
+    keepalive_expiry: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+) -> None:
+    """Configure the process-wide client pool used by all model instances."""
+    client_registry.configure(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+        idle_timeout=idle_timeout,
+    )
+
+
+def close_all() -> None:
+    """Close every shared client in the process-wide pool."""
+    client_registry.close_all()
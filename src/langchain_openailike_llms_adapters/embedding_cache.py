@@ -0,0 +1,191 @@
+"""Content-addressed embedding cache backed by a memory-mapped float32 file."""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+# SQLite limits the number of bound parameters per statement.
+_MAX_SQL_PARAMS = 500
+
+
+class MmapEmbeddingCache:
+    """Cache embedding vectors on disk, keyed by the content they were made from.
+
+    Vectors are appended as raw float32 to `vectors.f32` and located through a
+    small SQLite index (`index.db`) mapping the 32 byte key to an offset. Reads
+    go through a shared memory map, so looking up a vector does not copy it
+    and the cache does not have to fit on the Python heap. Several processes
+    can share one directory: appends happen inside a SQLite write transaction,
+    which serialises writers.
+
+    Args:
+        directory: Directory holding `vectors.f32` and `index.db`.
+
+    """
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.directory / "vectors.f32"
+        self.vectors_path.touch(exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        self._mapped_inode = 0
+        self._conn = sqlite3.connect(
+            self.directory / "index.db",
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors "
+            "(key BLOB PRIMARY KEY, offset INTEGER NOT NULL, dim INTEGER NOT NULL)",
+        )
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        dimensions: Optional[int],
+        text: str,
+    ) -> bytes:
+        text_hash = hashlib.sha256(text.encode()).hexdigest()
+        raw = f"{provider}\0{model}\0{dimensions}\0{text_hash}"
+        return hashlib.sha256(raw.encode()).digest()
+
+    def _view(self, end: int) -> memoryview:
+        """Return a view of the vector file that covers at least `end` bytes."""
+        if (
+            self._mmap is None
+            or end > self._mapped_size
+            or os.stat(self.vectors_path).st_ino != self._mapped_inode
+        ):
+            # Another writer (or we) appended since the file was mapped, or
+            # the cache was cleared. Old maps stay alive as long as views
+            # handed out earlier use them.
+            with open(self.vectors_path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mapped_inode = os.fstat(f.fileno()).st_ino
+            self._mapped_size = len(self._mmap)
+        return memoryview(self._mmap)
+
+    def _locate(self, keys: Sequence[bytes]) -> Dict[bytes, Tuple[int, int]]:
+        locations: Dict[bytes, Tuple[int, int]] = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), _MAX_SQL_PARAMS):
+            batch = unique[start : start + _MAX_SQL_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            for key, offset, dim in self._conn.execute(
+                f"SELECT key, offset, dim FROM vectors WHERE key IN ({placeholders})",  # noqa: S608
+                batch,
+            ):
+                locations[key] = (offset, dim)
+        return locations
+
+    def _existing(self, keys: Sequence[bytes]) -> Set[bytes]:
+        return set(self._locate(keys))
+
+    def get_many(
+        self,
+        keys: Sequence[bytes],
+    ) -> List[Optional[memoryview[float]]]:
+        """Look up vectors for `keys`.
+
+        Returns:
+            For every key a zero-copy float32 `memoryview`, or None on a miss.
+
+        """
+        with self._lock:
+            locations = self._locate(keys)
+            end = max((o + d * 4 for o, d in locations.values()), default=0)
+            view = self._view(end) if locations else None
+            results: List[Optional[memoryview[float]]] = []
+            for key in keys:
+                location = locations.get(key)
+                if location is None or view is None:
+                    results.append(None)
+                    self.misses += 1
+                    continue
+                offset, dim = location
+                results.append(view[offset : offset + dim * 4].cast("f"))
+                self.hits += 1
+        return results
+
+    def put_many(
+        self,
+        keys: Sequence[bytes],
+        vectors: Sequence[Any],
+    ) -> None:
+        """Store `vectors` under `keys`. Keys that are already cached are skipped."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Skip keys another process stored meanwhile, so the vector
+                # file never holds unreferenced bytes.
+                seen = self._existing(keys)
+                with open(self.vectors_path, "ab") as f:
+                    offset = f.seek(0, os.SEEK_END)
+                    rows = []
+                    for key, vector in zip(keys, vectors):
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        if hasattr(vector, "dtype"):
+                            # numpy rows are copied as raw float32 bytes.
+                            data = vector.astype("float32").tobytes()
+                        else:
+                            data = array("f", vector).tobytes()
+                        rows.append((key, offset, len(vector)))
+                        f.write(data)
+                        offset += len(data)
+                    f.flush()
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO vectors (key, offset, dim) VALUES (?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def clear(self) -> None:
+        """Remove every cached vector."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM vectors")
+            # Swap in a new file instead of truncating: truncating a file that
+            # is still mapped makes reads through old views crash.
+            empty = self.vectors_path.with_suffix(".tmp")
+            empty.write_bytes(b"")
+            os.replace(empty, self.vectors_path)
+            self._conn.execute("COMMIT")
+            self._mmap = None
+            self._mapped_size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+            self._mmap = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,377 @@
+"""Fail over between providers, skipping the ones whose circuit is open."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from json import JSONDecodeError
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+import openai
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict
+
+# Errors that say the provider is down or overloaded. Anything else (a bad
+# request, a parsing error in user code) is raised without failing over.
+FAILOVER_ERRORS: Tuple[Type[Exception], ...] = (
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    openai.RateLimitError,
+    JSONDecodeError,
+)
+
+
+class NoAvailableProviderError(RuntimeError):
+    """Raised when every provider's circuit is open."""
+
+
+class CircuitBreaker:
+    """Track the error rate of one provider and stop calling it while it is down.
+
+    The breaker is *closed* while the error rate over the last `window` calls
+    stays below `failure_threshold`. Once it is exceeded (and at least
+    `min_calls` were made) it *opens* and rejects calls for `recovery_timeout`
+    seconds. It then turns *half-open* and lets `half_open_max_calls` probe
+    calls through: a success closes it again, a failure opens it again.
+
+    Args:
+        failure_threshold: Error rate (0-1) that opens the circuit.
+        window: Number of recent calls the error rate is computed over.
+        min_calls: Calls needed in the window before the circuit can open.
+        recovery_timeout: Seconds the circuit stays open before probing.
+        half_open_max_calls: Concurrent probe calls allowed while half-open.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: float = 0.5,
+        window: int = 20,
+        min_calls: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at: Optional[float] = None
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> Literal["closed", "open", "half_open"]:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> Literal["closed", "open", "half_open"]:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at < self.recovery_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """Return whether a call may go through, reserving a probe if half-open."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "open" or self._probes >= self.half_open_max_calls:
+                return False
+            self._probes += 1
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                # A successful probe closes the circuit with a clean window.
+                self._opened_at = None
+                self._probes = 0
+                self._outcomes.clear()
+            self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self._opened_at is not None:
+                if self._state(now) == "half_open":
+                    self._opened_at = now
+                    self._probes = 0
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if (
+                len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_threshold
+            ):
+                self._opened_at = now
+
+    def cancel(self) -> None:
+        """Give back a probe reserved by `allow` for a call that was cancelled."""
+        with self._lock:
+            self._probes = max(self._probes - 1, 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._opened_at = None
+            self._probes = 0
+            self._outcomes.clear()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str, **settings: Any) -> CircuitBreaker:
+    """Return the process-wide circuit breaker of `provider`.
+
+    `settings` are passed to `CircuitBreaker` when it is first created.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = _breakers[provider] = CircuitBreaker(**settings)
+        return breaker
+
+
+class ChatFailoverModel(BaseChatModel):
+    """Call an ordered list of chat models, moving on when a provider fails.
+
+    Each model has a circuit breaker. Providers whose circuit is open are
+    skipped without sending a request, so an outage costs one timeout per
+    breaker window instead of one per call. Streaming calls fail over as long
+    as no chunk was produced yet.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    models: List[BaseChatModel]
+    """Models in order of preference."""
+    breakers: List[CircuitBreaker]
+    """Circuit breaker for each model, usually shared per provider."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "chat-failover-model"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"models": [m._identifying_params for m in self.models]}  # noqa: SLF001
+
+    def _candidates(self) -> Iterator[Tuple[BaseChatModel, CircuitBreaker]]:
+        for model, breaker in zip(self.models, self.breakers):
+            if breaker.allow():
+                yield model, breaker
+
+    @staticmethod
+    def _unavailable(last_error: Optional[BaseException]) -> BaseException:
+        if last_error is not None:
+            return last_error
+        return NoAvailableProviderError(
+            "The circuit of every provider is open, no request was sent",
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        last_error: Optional[BaseException] = None
+        for model, breaker in self._candidates():
+            try:
+                result = model._generate(  # noqa: SLF001
+                    messages,
+                    stop=stop,
+                    run_manager=run_manager,
+                    **kwargs,
+                )
+            except FAILOVER_ERRORS as e:
+                breaker.record_failure()
+                last_error = e
+                continue
+            except Exception:
+                # The provider answered, the request itself was bad.
+                breaker.record_success()
+                raise
+            except BaseException:
+                breaker.cancel()
+                raise
+            breaker.record_success()
+            return result
+        raise self._unavailable(last_error)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        last_error: Optional[BaseException] = None
+        for model, breaker in self._candidates():
+            try:
+                result = await model._agenerate(  # noqa: SLF001
+                    messages,
+                    stop=stop,
+                    run_manager=run_manager,
+                    **kwargs,
+                )
+            except FAILOVER_ERRORS as e:
+                breaker.record_failure()
+                last_error = e
+                continue
+            except Exception:
+                # The provider answered, the request itself was bad.
+                breaker.record_success()
+                raise
+            except BaseException:
+                breaker.cancel()
+                raise
+            breaker.record_success()
+            return result
+        raise self._unavailable(last_error)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        last_error: Optional[BaseException] = None
+        for model, breaker in self._candidates():
+            stream = model._stream(  # noqa: SLF001
+                messages,
+                stop=stop,
+                run_manager=run_manager,
+                **kwargs,
+            )
+            try:
+                first = next(stream, None)
+            except FAILOVER_ERRORS as e:
+                breaker.record_failure()
+                last_error = e
+                continue
+            except Exception:
+                # The provider answered, the request itself was bad.
+                breaker.record_success()
+                raise
+            except BaseException:
+                breaker.cancel()
+                raise
+            # Once output was produced we can not switch providers anymore.
+            try:
+                if first is not None:
+                    yield first
+                yield from stream
+            except FAILOVER_ERRORS:
+                breaker.record_failure()
+                raise
+            except Exception:
+                breaker.record_success()
+                raise
+            except BaseException:
+                breaker.cancel()
+                raise
+            breaker.record_success()
+            return
+        raise self._unavailable(last_error)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        last_error: Optional[BaseException] = None
+        for model, breaker in self._candidates():
+            stream = model._astream(  # noqa: SLF001
+                messages,
+                stop=stop,
+                run_manager=run_manager,
+                **kwargs,
+            )
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                first = None
+            except FAILOVER_ERRORS as e:
+                breaker.record_failure()
+                last_error = e
+                continue
+            except Exception:
+                # The provider answered, the request itself was bad.
+                breaker.record_success()
+                raise
+            except BaseException:
+                breaker.cancel()
+                raise
+            try:
+                if first is not None:
+                    yield first
+                async for chunk in stream:
+                    yield chunk
+            except FAILOVER_ERRORS:
+                breaker.record_failure()
+                raise
+            except Exception:
+                breaker.record_success()
+                raise
+            except BaseException:
+                breaker.cancel()
+                raise
+            breaker.record_success()
+            return
+        raise self._unavailable(last_error)
+
+    def bind_tools(
+        self,
+        tools: Sequence[Union[Dict[str, Any], type, Callable, BaseTool]],
+        *,
+        tool_choice: Optional[Union[dict, str, bool]] = None,
+        **kwargs: Any,
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        """Bind tools in the OpenAI format every provider in the list accepts."""
+        formatted_tools = [convert_to_openai_tool(tool) for tool in tools]
+        if tool_choice:
+            if isinstance(tool_choice, str) and tool_choice not in (
+                "auto",
+                "none",
+                "any",
+                "required",
+            ):
+                tool_choice = {"type": "function", "function": {"name": tool_choice}}
+            elif tool_choice == "any" or tool_choice is True:
+                tool_choice = "required"
+            kwargs["tool_choice"] = tool_choice
+        return super().bind(tools=formatted_tools, **kwargs)
@@ -0,0 +1,187 @@
+"""Hedged requests: race a duplicate against requests that are slower than usual."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import threading
+import time
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+class HedgePolicy:
+    """Decide when to send a duplicate request and cap how many are sent.
+
+    Latencies are tracked per key (model and call type). A request that has
+    not finished after the `percentile` latency of its key gets one duplicate,
+    which goes through the same client, so with several endpoints the load
+    balancer usually sends it to another one. The first to finish wins and
+    the other is cancelled. At most `budget` of all requests are duplicated.
+
+    Args:
+        percentile: Latency percentile (0-1) after which a duplicate is sent.
+        budget: Maximum fraction of requests that may be duplicated.
+        min_samples: Latencies needed for a key before hedging starts.
+        window: Number of recent latencies kept per key.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float = 0.95,
+        budget: float = 0.05,
+        min_samples: int = 20,
+        window: int = 1000,
+    ) -> None:
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.window = window
+        self.requests = 0
+        self.hedges = 0
+        self._latencies: Dict[Hashable, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Hashable, latency: float) -> None:
+        with self._lock:
+            samples = self._latencies.get(key)
+            if samples is None:
+                samples = self._latencies[key] = deque(maxlen=self.window)
+            samples.append(latency)
+
+    def delay(self, key: Hashable) -> Optional[float]:
+        """Seconds to wait before hedging a request for `key`, or None."""
+        with self._lock:
+            samples = self._latencies.get(key)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(int(len(ordered) * self.percentile), len(ordered) - 1)]
+
+    def _start_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await `fn()`, racing a second `fn()` against it if it is slow."""
+        self._start_request()
+        started: Dict[asyncio.Future, float] = {}
+
+        def start() -> None:
+            started[asyncio.ensure_future(fn())] = time.monotonic()
+
+        start()
+        pending: Set[asyncio.Future] = set(started)
+        try:
+            delay = self.delay(key)
+            if delay is not None:
+                done, pending = await asyncio.wait(pending, timeout=delay)
+                if not done and self._take_budget():
+                    start()
+                    pending = {f for f in started if not f.done()}
+                pending |= done
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for future in done:
+                    if future.exception() is None:
+                        self.record(key, time.monotonic() - started[future])
+                        return future.result()
+                    error = future.exception()
+            assert error is not None  # noqa: S101
+            raise error
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def race_stream(
+        self,
+        key: Hashable,
+        open_stream: Callable[[], AsyncIterator[T]],
+    ) -> AsyncIterator[T]:
+        """Iterate `open_stream()`, hedging a slow first item.
+
+        A second stream races the first one for the first item if it is slow
+        to arrive.
+        """
+        self._start_request()
+        streams: Dict[asyncio.Future, Any] = {}
+        started: Dict[asyncio.Future, float] = {}
+
+        def start() -> None:
+            stream = open_stream()
+            future = asyncio.ensure_future(stream.__anext__())
+            streams[future] = stream
+            started[future] = time.monotonic()
+
+        start()
+        winner: Any = None
+        first: Any = None
+        empty = False
+        losers: List[asyncio.Future] = []
+        try:
+            pending: Set[asyncio.Future] = set(streams)
+            delay = self.delay(key)
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done and self._take_budget():
+                    start()
+                    pending = set(streams)
+            error: Optional[BaseException] = None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for future in done:
+                    exception = future.exception()
+                    if exception is None or isinstance(exception, StopAsyncIteration):
+                        self.record(key, time.monotonic() - started[future])
+                        winner = streams[future]
+                        empty = exception is not None
+                        first = None if empty else future.result()
+                        break
+                    error = exception
+            losers = [f for f in streams if streams[f] is not winner]
+            if winner is None:
+                assert error is not None  # noqa: S101
+                raise error
+        finally:
+            for future in losers or streams:
+                if streams[future] is winner:
+                    continue
+                future.cancel()
+                with contextlib.suppress(BaseException):
+                    await future
+                await streams[future].aclose()
+        if empty:
+            return
+        yield first
+        async for item in winner:
+            yield item
@@ -0,0 +1,265 @@
+"""In-process latency histograms for chat and embedding requests."""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+# Seconds, from a fast first token up to a long reasoning run.
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)  # fmt: skip
+THROUGHPUT_BUCKETS: Tuple[float, ...] = (
+    1, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500, 1000,
+)  # fmt: skip
+BATCH_SIZE_BUCKETS: Tuple[float, ...] = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+Labels = Tuple[Tuple[str, str], ...]
+Listener = Callable[[str, float, Dict[str, str]], None]
+
+_DESCRIPTIONS = {
+    "llm_time_to_first_token_seconds": (
+        "Time from sending a request to its first chunk."
+    ),
+    "llm_time_to_first_reasoning_token_seconds": (
+        "Time from sending a request to its first reasoning chunk."
+    ),
+    "llm_time_to_first_content_token_seconds": (
+        "Time from sending a request to its first content chunk."
+    ),
+    "llm_inter_chunk_seconds": "Time between consecutive chunks of a stream.",
+    "llm_request_duration_seconds": "Total duration of a chat request.",
+    "llm_output_tokens_per_second": "Output tokens per second of generation.",
+    "embedding_request_duration_seconds": "Duration of one embedding request.",
+    "embedding_batch_size": "Number of texts per embedding request.",
+}
+_BUCKETS = {
+    "llm_output_tokens_per_second": THROUGHPUT_BUCKETS,
+    "embedding_batch_size": BATCH_SIZE_BUCKETS,
+}
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds, like Prometheus'."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def observe_many(self, values: Iterable[float]) -> None:
+        with self._lock:
+            for value in values:
+                self.counts[bisect_left(self.buckets, value)] += 1
+                self.sum += value
+                self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Return the bucket counts, sum and count, read consistently."""
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the `q` quantile (0-1) by interpolating within its bucket."""
+        counts, _, total = self.snapshot()
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """Histograms keyed by metric name and labels, plus export hooks.
+
+    Observations go into the in-process histograms, rendered by
+    `to_prometheus`, and are also passed to every listener added with
+    `add_listener` as `(name, value, labels)`. That signature maps directly
+    onto an OpenTelemetry histogram's `record(value, attributes)`.
+    """
+
+    def __init__(self) -> None:
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = Histogram(_BUCKETS.get(name, LATENCY_BUCKETS))
+                    self._histograms[key] = histogram
+        return histogram
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        self.histogram(name, **labels).observe(value)
+        for listener in self._listeners:
+            listener(name, value, labels)
+
+    def observe_many(self, name: str, values: Sequence[float], **labels: str) -> None:
+        if not values:
+            return
+        self.histogram(name, **labels).observe_many(values)
+        for listener in self._listeners:
+            for value in values:
+                listener(name, value, labels)
+
+    def add_listener(self, listener: Listener) -> None:
+        """Call `listener(name, value, labels)` for every observation."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Listener) -> None:
+        self._listeners.remove(listener)
+
+    def collect(self) -> List[Tuple[str, Dict[str, str], Histogram]]:
+        with self._lock:
+            items = list(self._histograms.items())
+        return [(name, dict(labels), histogram) for (name, labels), histogram in items]
+
+    def get(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self._histograms.get((name, tuple(sorted(labels.items()))))
+
+    def to_prometheus(self) -> str:
+        """Render every histogram in the Prometheus text exposition format."""
+        lines: List[str] = []
+        described = set()
+        for name, labels, histogram in sorted(self.collect(), key=lambda m: m[0]):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {_DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            counts, total, count = histogram.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip((*histogram.buckets, None), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound is None else repr(float(bound))
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels, le=le)} {cumulative}",
+                )
+            lines.append(f"{name}_sum{_format_labels(labels)} {total!r}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+def _format_labels(labels: Dict[str, str], **extra: str) -> str:
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in items.items()
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+metrics_registry = MetricsRegistry()
+
+
+class StreamTimer:
+    """Time one chat request.
+
+    `on_chunk` only stores timestamps; histograms are updated once in
+    `finish`, so the per-chunk cost stays small.
+    """
+
+    __slots__ = (
+        "first",
+        "first_content",
+        "first_reasoning",
+        "gaps",
+        "labels",
+        "last",
+        "registry",
+        "start",
+    )
+
+    def __init__(self, registry: MetricsRegistry, provider: str, model: str) -> None:
+        self.registry = registry
+        self.labels = {"provider": provider, "model": model}
+        self.start = time.perf_counter()
+        self.first: Optional[float] = None
+        self.first_reasoning: Optional[float] = None
+        self.first_content: Optional[float] = None
+        self.last = 0.0
+        self.gaps: List[float] = []
+
+    def on_chunk(self, message: Any) -> None:
+        now = time.perf_counter()
+        if self.first_content is None:
+            if message.content or getattr(message, "tool_call_chunks", None):
+                self.first_content = now
+            elif self.first_reasoning is None and message.additional_kwargs.get(
+                "reasoning_content",
+            ):
+                self.first_reasoning = now
+            if self.first is None:
+                # Role-only chunks before the first token do not count.
+                if self.first_content is None and self.first_reasoning is None:
+                    return
+                self.first = self.last = now
+                return
+        self.gaps.append(now - self.last)
+        self.last = now
+
+    def finish(self, output_tokens: Optional[int]) -> None:
+        end = time.perf_counter()
+        labels = self.labels
+        observe = self.registry.observe
+        observe("llm_request_duration_seconds", end - self.start, **labels)
+        if self.first is not None:
+            observe(
+                "llm_time_to_first_token_seconds",
+                self.first - self.start,
+                **labels,
+            )
+        if self.first_reasoning is not None:
+            observe(
+                "llm_time_to_first_reasoning_token_seconds",
+                self.first_reasoning - self.start,
+                **labels,
+            )
+        if self.first_content is not None:
+            observe(
+                "llm_time_to_first_content_token_seconds",
+                self.first_content - self.start,
+                **labels,
+            )
+        self.registry.observe_many("llm_inter_chunk_seconds", self.gaps, **labels)
+        # Generation speed: from the first token on when streaming.
+        elapsed = end - (self.first if self.first is not None else self.start)
+        if output_tokens and elapsed > 0:
+            observe("llm_output_tokens_per_second", output_tokens / elapsed, **labels)
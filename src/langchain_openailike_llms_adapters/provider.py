@@ -1,35 +1,51 @@
-from typing import Literal
+from __future__ import annotations
 
+import re
+import sys
+from functools import lru_cache
+from typing import Any, Dict, Literal, Mapping, Optional, Pattern, Sequence
 
-providers = {
+providers: Dict[str, Dict[str, Any]] = {
     "dashscope": {
         "api_id": "dashscope",
         "default_url": "https://dashscope.aliyuncs.com/compatible-mode/v1",
+        "model_patterns": ["qwen"],
+    },
+    "deepseek-ai": {
+        "api_id": "deepseek",
+        "default_url": "https://api.deepseek.com/v1",
+        "model_patterns": ["deepseek"],
     },
-    "deepseek-ai": {"api_id": "deepseek", "default_url": "https://api.deepseek.com/v1"},
     "tencent-cloud": {
         "api_id": "tencent",
         "default_url": "https://api.hunyuan.cloud.tencent.com/v1",
+        "model_patterns": ["hunyuan"],
     },
     "moonshot-ai": {
         "api_id": "moonshot",
         "default_url": "https://api.moonshot.cn/v1",
+        "model_patterns": ["kimi"],
     },
     "zhipu-ai": {
         "api_id": "zhipu",
         "default_url": "https://open.bigmodel.cn/api/paas/v4/",
+        "embedding_base64": False,
+        "model_patterns": ["glm"],
     },
     "minimax": {
         "api_id": "minimax",
         "default_url": "https://api.minimaxi.com/v1",
+        "model_patterns": ["minimax"],
     },
     "vllm": {
         "api_id": "vllm",
         "default_url": "http://localhost:8080/v1",
+        "embedding_max_batch_tokens": 65536,
     },
     "ollama": {
         "api_id": "ollama",
         "default_url": "http://localhost:11434/v1",
+        "embedding_max_batch_tokens": 32768,
     },
 }
 
@@ -47,28 +63,140 @@ provider_list = Literal[
 ]
 
 
+# Provider names whose model patterns are tried first, most recently
+# registered first, then the built-in ones in the order above.
+_match_order = [
+    "deepseek-ai",
+    "dashscope",
+    "tencent-cloud",
+    "moonshot-ai",
+    "zhipu-ai",
+    "minimax",
+]
+_matcher: Optional[Pattern[str]] = None
+_group_providers: Dict[str, str] = {}
+
+
+def _compile_matcher() -> Pattern[str]:
+    """Build one regex trying every provider's patterns in priority order.
+
+    Each alternative may start anywhere in the name, and alternatives are
+    tried in order at the start, so the first provider with a matching
+    pattern wins regardless of where in the name it matches.
+    """
+    alternatives = []
+    _group_providers.clear()
+    for provider in _match_order:
+        for pattern in providers[provider].get("model_patterns", ()):
+            group = f"p{len(_group_providers)}"
+            _group_providers[group] = provider
+            alternatives.append(f".*?(?P<{group}>{pattern})")
+    return re.compile("|".join(alternatives) or "(?!)", re.IGNORECASE | re.DOTALL)
+
+
+@lru_cache(maxsize=4096)
 def _get_provider_with_model(model: str) -> provider_list:
-    if "deepseek" in model.lower():
-        return "deepseek-ai"
-    elif "qwen" in model.lower():
-        return "dashscope"
-    elif "hunyuan" in model.lower():
-        return "tencent-cloud"
-    elif "kimi" in model.lower():
-        return "moonshot-ai"
-    elif "glm" in model.lower():
-        return "zhipu-ai"
-    elif "minimax" in model.lower():
-        return "minimax"
-    else:
+    global _matcher
+    if _matcher is None:
+        _matcher = _compile_matcher()
+    match = _matcher.match(model)
+    if match is None or match.lastgroup is None:
         return "custom"
+    return _group_providers[match.lastgroup]  # type: ignore[return-value]
+
+
+def register_provider(
+    name: str,
+    *,
+    default_url: str,
+    api_id: Optional[str] = None,
+    api_key_env: Optional[str] = None,
+    api_base_env: Optional[str] = None,
+    model_patterns: Sequence[str] = (),
+    capabilities: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    embedding_max_batch_size: Optional[int] = None,
+    embedding_max_batch_tokens: Optional[int] = None,
+    embedding_base64: bool = True,
+) -> None:
+    """Add a provider, or replace one, at runtime.
+
+    Afterwards `get_openai_like_llm_instance` and `get_openai_like_embedding`
+    accept `name` as provider, and model names matching `model_patterns`
+    resolve to it before any previously registered provider.
+
+    Args:
+        name: Provider name passed as `provider`, e.g. `"openrouter"`.
+        default_url: Base URL used when no api_base is given.
+        api_id: Short name used for the environment variables, the model
+            classes and the rate limiters. Defaults to `name`.
+        api_key_env: Environment variable holding the API key. Defaults to
+            `<API_ID>_API_KEY`.
+        api_base_env: Environment variable overriding the base URL. Defaults
+            to `<API_ID>_API_BASE`.
+        model_patterns: Regular expressions searched in model names
+            (ignoring case) to pick this provider when none is given.
+        capabilities: Model names or glob patterns mapped to
+            `ModelCapabilities` fields, added to `capability_registry`.
+        embedding_max_batch_size: Maximum number of texts per embedding
+            request, registered as the provider's default `max_batch_size`.
+        embedding_max_batch_tokens: Estimated token budget per embedding request.
+        embedding_base64: Whether the embeddings endpoint supports
+            `encoding_format="base64"`.
+
+    """
+    global _matcher
+    if name == "custom":
+        raise ValueError('"custom" is reserved for models without a provider')
+    for pattern in model_patterns:
+        re.compile(pattern)
+    entry: Dict[str, Any] = {
+        "api_id": api_id or name,
+        "default_url": default_url,
+        "model_patterns": list(model_patterns),
+        "embedding_base64": embedding_base64,
+    }
+    if api_key_env:
+        entry["api_key_env"] = api_key_env
+    if api_base_env:
+        entry["api_base_env"] = api_base_env
+    if embedding_max_batch_tokens:
+        entry["embedding_max_batch_tokens"] = embedding_max_batch_tokens
 
+    replaced = name in providers
+    providers[name] = entry
+    if name in _match_order:
+        _match_order.remove(name)
+    _match_order.insert(0, name)
+    _matcher = None
+    _get_provider_with_model.cache_clear()
 
+    if replaced:
+        # Model classes built for the old registration are stale.
+        utils = sys.modules.get(f"{__package__}.utils")
+        if utils is not None:
+            utils._create_openai_like_chat_model.cache_clear()  # noqa: SLF001
+            utils._create_openai_like_embbeding.cache_clear()  # noqa: SLF001
+        adapters = sys.modules.get(f"{__package__}.adapters")
+        if adapters is not None:
+            adapters.create_openai_like_chat_model.cache_clear()
 
-provider_emb_list=Literal[
+    if embedding_max_batch_size or capabilities:
+        from .capabilities import capability_registry
+
+        if embedding_max_batch_size:
+            capability_registry.register(
+                name,
+                "*",
+                max_batch_size=embedding_max_batch_size,
+            )
+        if capabilities:
+            capability_registry.update({name: capabilities})
+
+
+provider_emb_list = Literal[
     "dashscope",
     "zhipu-ai",
     "ollama",
     "vllm",
-    "custom"
-]
\ No newline at end of file
+    "custom",
+]
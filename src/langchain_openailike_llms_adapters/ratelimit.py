@@ -0,0 +1,200 @@
+"""Client-side requests-per-minute and tokens-per-minute limits."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+
+class QuotaLimiter:
+    """Keep a provider's traffic under its RPM/TPM quota with token buckets.
+
+    Each request reserves one request and its estimated tokens before it is
+    sent, waiting if a bucket would be overdrawn. Reservations are taken in
+    order, so concurrent callers queue up instead of all retrying at once.
+    After the response arrives `reconcile` swaps the estimate for the real
+    `usage`.
+
+    Without `database_path` the buckets live in this process. With it they
+    are stored in a SQLite file, updated inside a write transaction, so every
+    worker process on the host draws from the same quota.
+
+    Args:
+        requests_per_minute: Request quota, None for no limit.
+        tokens_per_minute: Token quota, None for no limit.
+        database_path: SQLite file to share the buckets across processes.
+        name: Name of the buckets in the store, usually the provider.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        database_path: Optional[Union[str, Path]] = None,
+        name: str = "default",
+    ) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.name = name
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        if database_path is not None:
+            self._conn = sqlite3.connect(
+                str(database_path),
+                timeout=30,
+                check_same_thread=False,
+                isolation_level=None,
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets "
+                "(name TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)",
+            )
+
+    def _limits(self) -> Dict[str, float]:
+        limits = {}
+        if self.requests_per_minute:
+            limits["requests"] = float(self.requests_per_minute)
+        if self.tokens_per_minute:
+            limits["tokens"] = float(self.tokens_per_minute)
+        return limits
+
+    def _draw(self, costs: Dict[str, float]) -> float:
+        """Take `costs` from the buckets and return how long to wait for them.
+
+        Buckets may go negative: the debt is what later callers wait for.
+        Negative costs give tokens back.
+        """
+        limits = self._limits()
+        costs = {kind: cost for kind, cost in costs.items() if kind in limits}
+        if not costs:
+            return 0.0
+        with self._lock:
+            if self._conn is None:
+                return self._apply(costs, limits, self._buckets, time.monotonic())
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                names = [f"{self.name}:{kind}" for kind in costs]
+                rows = self._conn.execute(
+                    "SELECT name, level, updated FROM rate_buckets WHERE name IN "  # noqa: S608
+                    f"({','.join('?' * len(names))})",
+                    names,
+                ).fetchall()
+                buckets = {name: (level, updated) for name, level, updated in rows}
+                wait = self._apply(costs, limits, buckets, time.time())
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO rate_buckets (name, level, updated) "
+                    "VALUES (?, ?, ?)",
+                    [(name, *buckets[name]) for name in names],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return wait
+
+    def _apply(
+        self,
+        costs: Dict[str, float],
+        limits: Dict[str, float],
+        buckets: Dict[str, Tuple[float, float]],
+        now: float,
+    ) -> float:
+        wait = 0.0
+        for kind, cost in costs.items():
+            name = f"{self.name}:{kind}"
+            capacity = limits[kind]
+            rate = capacity / 60.0
+            level, updated = buckets.get(name, (capacity, now))
+            level = min(capacity, level + max(now - updated, 0.0) * rate) - cost
+            buckets[name] = (min(level, capacity), now)
+            if level < 0:
+                wait = max(wait, -level / rate)
+        return wait
+
+    def acquire(self, tokens: float = 0) -> float:
+        """Reserve one request and `tokens`, blocking until they are available.
+
+        Returns:
+            The number of seconds waited.
+
+        """
+        wait = self._draw({"requests": 1, "tokens": tokens})
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, tokens: float = 0) -> float:
+        wait = await asyncio.get_running_loop().run_in_executor(
+            None,
+            self._draw,
+            {"requests": 1, "tokens": tokens},
+        )
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def reconcile(self, estimated: float, actual: Optional[float]) -> None:
+        """Correct a reservation of `estimated` tokens once `actual` is known."""
+        if actual is not None and actual != estimated:
+            self._draw({"tokens": actual - estimated})
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+
+
+_limiters: Dict[str, QuotaLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def configure_rate_limit(
+    provider: str,
+    *,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    database_path: Optional[Union[str, Path]] = None,
+) -> QuotaLimiter:
+    """Limit every chat and embedding model of `provider` in this process.
+
+    Pass the same `database_path` in every worker to share the quota across
+    processes. Model instances created afterwards pick the limiter up; a
+    single instance can also be given its own `quota_limiter`.
+
+    Args:
+        provider: Provider name, e.g. `"moonshot-ai"`.
+        requests_per_minute: Request quota, None for no limit.
+        tokens_per_minute: Token quota, None for no limit.
+        database_path: SQLite file shared by the worker processes.
+
+    Returns:
+        The limiter now used for the provider.
+
+    """
+    from .provider import providers
+
+    # Custom models use "CUSTOM" as their api name.
+    api_name = providers[provider]["api_id"] if provider in providers else "CUSTOM"
+    limiter = QuotaLimiter(
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        database_path=database_path,
+        name=api_name,
+    )
+    with _limiters_lock:
+        _limiters[api_name] = limiter
+    return limiter
+
+
+def get_quota_limiter(api_name: str) -> Optional[QuotaLimiter]:
+    """Return the limiter configured for a provider's `api_id`, if any."""
+    with _limiters_lock:
+        return _limiters.get(api_name)
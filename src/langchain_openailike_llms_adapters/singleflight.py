@@ -0,0 +1,102 @@
+"""Coalesce identical in-flight requests into one upstream call."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("error", "event", "result", "task", "waiters")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.task: Optional[asyncio.Future] = None
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Share one execution between concurrent callers that use the same key.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for it and receive the same result (or exception).
+    Nothing is kept once the call finished, so this is not a cache.
+
+    Both `do` and `ado` return `(result, shared)`. `shared` is True when more
+    than one caller received the result, in which case callers that mutate
+    the result should copy it first.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> Tuple[T, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, call.waiters > 0
+
+    async def ado(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+    ) -> Tuple[T, bool]:
+        loop = asyncio.get_running_loop()
+        # Futures belong to one event loop.
+        flight_key = ("async", id(loop), key)
+        with self._lock:
+            call = self._calls.get(flight_key)
+            if call is None:
+                call = self._calls[flight_key] = _Call()
+                call.task = loop.create_task(_run(fn))
+                call.task.add_done_callback(
+                    lambda _: self._forget(flight_key, call),
+                )
+                leader = True
+            else:
+                call.waiters += 1
+                leader = False
+        assert call.task is not None  # noqa: S101
+        # Shield the shared task, so one caller being cancelled does not
+        # cancel the request for everybody else.
+        result = await asyncio.shield(call.task)
+        return result, not leader or call.waiters > 0
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+async def _run(fn: Callable[[], Awaitable[T]]) -> T:
+    return await fn()
+
+
+default_group = SingleFlight()
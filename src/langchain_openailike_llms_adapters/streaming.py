@@ -0,0 +1,272 @@
+"""Helpers for building and merging stream chunks cheaply."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import AsyncIterator, Iterable, List, Literal, Optional, Set
+
+from langchain_core.messages import AIMessageChunk, message_chunk_to_message
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_EMPTY_AI_CHUNK = AIMessageChunk(content="")
+_EMPTY_GENERATION_CHUNK = ChatGenerationChunk(message=_EMPTY_AI_CHUNK)
+
+TextKind = Literal["content", "reasoning"]
+
+
+def text_chunk(
+    content: str,
+    reasoning: Optional[str] = None,
+    id: Optional[str] = None,  # noqa: A002
+) -> ChatGenerationChunk:
+    """Build a chunk carrying only content and reasoning text.
+
+    Validated templates are copied to skip pydantic validation. Every
+    mutable field gets a fresh value, so chunks never share state.
+    """
+    message = _EMPTY_AI_CHUNK.model_copy(
+        update={
+            "content": content,
+            "additional_kwargs": {"reasoning_content": reasoning} if reasoning else {},
+            "response_metadata": {},
+            "id": id,
+            "tool_calls": [],
+            "invalid_tool_calls": [],
+            "tool_call_chunks": [],
+        },
+    )
+    return _EMPTY_GENERATION_CHUNK.model_copy(
+        update={"message": message, "text": content},
+    )
+
+
+def _text_kind(chunk: ChatGenerationChunk) -> Optional[TextKind]:
+    """Return which text a chunk carries, or None if it carries anything else."""
+    message = chunk.message
+    if (
+        chunk.generation_info
+        or not isinstance(message, AIMessageChunk)
+        or message.tool_call_chunks
+        or message.usage_metadata
+        or message.response_metadata
+        or not isinstance(message.content, str)
+    ):
+        return None
+    extra = message.additional_kwargs
+    if not extra:
+        return "content"
+    if message.content or len(extra) != 1 or "reasoning_content" not in extra:
+        return None
+    return "reasoning"
+
+
+class ChunkCoalescer:
+    """Merge consecutive deltas into fewer chunks.
+
+    Content deltas and reasoning deltas are merged separately.
+
+    Text is held back until `interval` seconds passed since the first held
+    delta or `max_chars` characters were collected. The first delta of each
+    kind is let through at once, so the time to first token is unchanged.
+    Any other chunk (tool calls, finish reason, usage) first flushes the held
+    text and is then passed on unchanged.
+
+    Args:
+        interval: Seconds text may be held back, None for no time limit.
+        max_chars: Characters collected before they are passed on, None for
+            no size limit.
+
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        max_chars: Optional[int] = None,
+    ) -> None:
+        self.interval = interval
+        self.max_chars = max_chars
+        self._kind: Optional[TextKind] = None
+        self._parts: List[str] = []
+        self._size = 0
+        self._id: Optional[str] = None
+        self._started = 0.0
+        self._seen: Set[TextKind] = set()
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """`time.monotonic()` by which the held text must be passed on."""
+        if not self._parts or self.interval is None:
+            return None
+        return self._started + self.interval
+
+    def push(self, chunk: ChatGenerationChunk) -> List[ChatGenerationChunk]:
+        """Take the next chunk and return the chunks ready to be yielded."""
+        kind = _text_kind(chunk)
+        if kind is None:
+            return [*self.flush(), chunk]
+        message = chunk.message
+        text = (
+            message.content
+            if kind == "content"
+            else message.additional_kwargs["reasoning_content"]
+        )
+        if not text:
+            # Nothing to merge, e.g. the role-only first chunk.
+            return [] if self._parts else [chunk]
+        ready = self.flush() if kind != self._kind else []
+        if kind not in self._seen:
+            self._seen.add(kind)
+            ready.append(chunk)
+            return ready
+        if not self._parts:
+            self._kind = kind
+            self._id = message.id
+            self._started = time.monotonic()
+        self._parts.append(text)  # type: ignore[arg-type]
+        self._size += len(text)  # type: ignore[arg-type]
+        if (self.max_chars is not None and self._size >= self.max_chars) or (
+            self.interval is not None
+            and time.monotonic() - self._started >= self.interval
+        ):
+            ready.extend(self.flush())
+        return ready
+
+    def flush(self) -> List[ChatGenerationChunk]:
+        """Return the held text as one chunk, if there is any."""
+        if not self._parts:
+            return []
+        text = "".join(self._parts)
+        if self._kind == "content":
+            chunk = text_chunk(text, id=self._id)
+        else:
+            chunk = text_chunk("", reasoning=text, id=self._id)
+        self._parts = []
+        self._size = 0
+        self._kind = None
+        return [chunk]
+
+
+async def aiter_until_deadline(
+    stream: AsyncIterator[ChatGenerationChunk],
+    coalescer: ChunkCoalescer,
+) -> AsyncIterator[Optional[ChatGenerationChunk]]:
+    """Iterate `stream`, yielding None whenever the coalescer's deadline passes.
+
+    The deadline can pass before the next chunk arrives, and held text is not
+    delayed by a stalled stream.
+    """
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            deadline = coalescer.deadline
+            if pending is None:
+                if deadline is None:
+                    try:
+                        chunk = await stream.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    yield chunk
+                    continue
+                pending = asyncio.ensure_future(stream.__anext__())
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield None
+                continue
+            future, pending = pending, None
+            try:
+                chunk = future.result()
+            except StopAsyncIteration:
+                return
+            yield chunk
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+class StreamAccumulator:
+    """Merge stream chunks into one message in linear time.
+
+    Adding chunks with `+` copies the content and `reasoning_content`
+    accumulated so far on every step, which is quadratic in the length of
+    the answer. Here text goes into lists that are joined once; only the
+    few other chunks (role, tool calls, finish reason, usage) are merged
+    with `+`, after their text was taken out.
+    """
+
+    def __init__(self) -> None:
+        self._content: List[str] = []
+        self._reasoning: List[str] = []
+        self._rest: List[ChatGenerationChunk] = []
+        self._id: Optional[str] = None
+        self._empty = True
+        # Set once content that is not a string (content blocks) shows up.
+        # From then on chunks are merged as they are, to keep their order.
+        self._verbatim = False
+
+    def add(self, chunk: ChatGenerationChunk) -> None:
+        self._empty = False
+        message = chunk.message
+        # Like `+`, prefer the provider's id over a generated `run-` one.
+        if message.id and (
+            self._id is None
+            or (self._id.startswith("run-") and not message.id.startswith("run-"))
+        ):
+            self._id = message.id
+        if self._verbatim or not isinstance(message.content, str):
+            self._verbatim = True
+            self._rest.append(chunk)
+            return
+        if message.content:
+            self._content.append(message.content)
+        extra = message.additional_kwargs
+        reasoning = extra.get("reasoning_content")
+        if isinstance(reasoning, str):
+            self._reasoning.append(reasoning)
+        if _text_kind(chunk) is not None:
+            return
+        if message.content or reasoning is not None:
+            update = {"content": "", "id": None}
+            if reasoning is not None:
+                extra = {k: v for k, v in extra.items() if k != "reasoning_content"}
+                update["additional_kwargs"] = extra  # type: ignore[assignment]
+            message = message.model_copy(update=update)
+            chunk = chunk.model_copy(update={"message": message, "text": ""})
+        self._rest.append(chunk)
+
+    def extend(self, chunks: Iterable[ChatGenerationChunk]) -> None:
+        for chunk in chunks:
+            self.add(chunk)
+
+    def chunk(self) -> ChatGenerationChunk:
+        """Return all chunks added so far merged into one."""
+        if self._empty:
+            raise ValueError("No generations found in stream.")
+        merged = text_chunk(
+            "".join(self._content),
+            "".join(self._reasoning) or None,
+            self._id,
+        )
+        if self._rest:
+            merged = merged + self._rest
+        return merged
+
+    def result(self) -> ChatResult:
+        """Return the merged chunks as a `ChatResult`, like `generate_from_stream`."""
+        merged = self.chunk()
+        return ChatResult(
+            generations=[
+                ChatGeneration(
+                    message=message_chunk_to_message(merged.message),
+                    generation_info=merged.generation_info,
+                ),
+            ],
+        )
+
+
+def generate_from_chunks(chunks: Iterable[ChatGenerationChunk]) -> ChatResult:
+    """Linear-time `generate_from_stream`."""
+    accumulator = StreamAccumulator()
+    accumulator.extend(chunks)
+    return accumulator.result()
@@ -0,0 +1,497 @@
+"""Incremental parsing of streamed structured output."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import re
+from typing import Annotated, Any, AsyncIterator, Iterator, List, Optional, Union
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.output_parsers.transform import BaseTransformOutputParser
+from langchain_core.outputs import Generation
+from pydantic import SkipValidation
+
+from .tools import tools_parser
+
+_WHITESPACE = " \t\n\r"
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+_LITERALS = {"true": True, "false": False, "null": None}
+_STRING_SPECIAL = re.compile(r'["\\]')
+_MISSING = object()
+
+
+def _unexpected(c: str, expected: str) -> ValueError:
+    return ValueError(f"Unexpected {c!r}, expected {expected}")
+
+
+class PartialJsonParser:
+    """Parse a JSON document fed in pieces, looking at every character once.
+
+    Parsing the growing prefix again after every delta, as
+    `parse_partial_json` is used for, is quadratic in the length of the
+    document. Here the parser keeps its position and the containers built
+    so far, so feeding a whole document costs the same in any number of
+    pieces.
+
+    `value()` returns a snapshot of what was parsed so far: open objects
+    and arrays, and strings that are still being received. Numbers and literals
+    only show up once they are complete, and so do object keys.
+    Invalid JSON raises `ValueError` from `feed`.
+    """
+
+    def __init__(self) -> None:
+        self._root: Any = _MISSING
+        self._stack: List[Union[dict, list]] = []
+        self._keys: List[Optional[str]] = []
+        # value, value_or_end, key, key_or_end, colon, after_value, string,
+        # scalar or done.
+        self._mode = "value"
+        self._parts: List[str] = []
+        self._in_key = False
+        self._escape: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+        self._scalar: List[str] = []
+        self._dirty = False
+
+    @property
+    def complete(self) -> bool:
+        """Whether a whole JSON document was parsed."""
+        return self._mode == "done"
+
+    def feed(self, text: str) -> bool:
+        """Parse the next piece of the document.
+
+        Returns:
+            Whether the parsed value changed.
+
+        """
+        i, n = 0, len(text)
+        while i < n:
+            mode = self._mode
+            if mode == "string":
+                i = self._feed_string(text, i)
+                continue
+            c = text[i]
+            if mode == "scalar":
+                if c in ",]}" or c in _WHITESPACE:
+                    self._end_scalar()
+                    continue
+                self._scalar.append(c)
+            elif c in _WHITESPACE:
+                pass
+            elif mode in ("value", "value_or_end"):
+                if c == "]" and mode == "value_or_end":
+                    self._close(list)
+                elif c == "{":
+                    self._open({})
+                    self._mode = "key_or_end"
+                elif c == "[":
+                    self._open([])
+                    self._mode = "value_or_end"
+                elif c == '"':
+                    self._in_key = False
+                    self._mode = "string"
+                    self._dirty = True
+                elif c in "-0123456789tfn":
+                    self._scalar = [c]
+                    self._mode = "scalar"
+                else:
+                    raise _unexpected(c, "a value")
+            elif mode in ("key", "key_or_end"):
+                if c == '"':
+                    self._in_key = True
+                    self._mode = "string"
+                elif c == "}" and mode == "key_or_end":
+                    self._close(dict)
+                else:
+                    raise _unexpected(c, "a key")
+            elif mode == "colon":
+                if c != ":":
+                    raise _unexpected(c, "':'")
+                self._mode = "value"
+            elif mode == "after_value":
+                top = self._stack[-1]
+                if c == ",":
+                    self._mode = "key" if isinstance(top, dict) else "value"
+                elif c == "}" and isinstance(top, dict):
+                    self._close(dict)
+                elif c == "]" and isinstance(top, list):
+                    self._close(list)
+                else:
+                    raise _unexpected(c, "',' or a closing bracket")
+            else:
+                raise _unexpected(c, "the end of the document")
+            i += 1
+        dirty, self._dirty = self._dirty, False
+        return dirty
+
+    def finish(self) -> Any:
+        """Return the parsed document once all of it was fed."""
+        if self._mode == "scalar" and not self._stack:
+            self._end_scalar()
+        if self._mode != "done":
+            raise ValueError("Incomplete JSON document")
+        return self._root
+
+    def value(self) -> Any:
+        """Return a snapshot of the value parsed so far, None before any.
+
+        Only the objects and arrays that are still open are copied, which
+        keeps snapshots cheap. Completed ones are shared between snapshots
+        and must not be modified.
+        """
+        receiving = self._mode == "string" and not self._in_key
+        if not self._stack:
+            if receiving:
+                return self._string()
+            return None if self._root is _MISSING else self._root
+        child = self._string() if receiving else _MISSING
+        for depth in range(len(self._stack) - 1, -1, -1):
+            container = self._stack[depth]
+            if isinstance(container, dict):
+                object_copy = dict(container)
+                if child is not _MISSING:
+                    object_copy[self._keys[depth]] = child
+                child = object_copy
+                continue
+            array_copy = list(container)
+            if child is _MISSING:
+                pass
+            elif depth == len(self._stack) - 1 and receiving:
+                array_copy.append(child)
+            else:
+                # The open child is the last item.
+                array_copy[-1] = child
+            child = array_copy
+        return child
+
+    def _feed_string(self, text: str, i: int) -> int:
+        n = len(text)
+        while i < n:
+            if self._escape is not None:
+                self._escape += text[i]
+                i += 1
+                escape = self._escape
+                if escape[0] == "u":
+                    if len(escape) < 5:
+                        continue
+                    self._append_code_point(int(escape[1:], 16))
+                elif escape in _ESCAPES:
+                    self._append(_ESCAPES[escape])
+                else:
+                    raise ValueError(f"Invalid escape \\{escape}")  # noqa: EM102
+                self._escape = None
+                continue
+            match = _STRING_SPECIAL.search(text, i)
+            end = match.start() if match else n
+            if end > i:
+                self._append(text[i:end])
+            if match is None:
+                return n
+            if text[end] == "\\":
+                self._escape = ""
+                i = end + 1
+                continue
+            self._end_string()
+            return end + 1
+        return i
+
+    def _append(self, text: str) -> None:
+        if self._high_surrogate is not None:
+            self._parts.append(chr(self._high_surrogate))
+            self._high_surrogate = None
+        self._parts.append(text)
+        if not self._in_key:
+            self._dirty = True
+
+    def _append_code_point(self, code: int) -> None:
+        high = self._high_surrogate
+        if high is not None and 0xDC00 <= code <= 0xDFFF:
+            self._high_surrogate = None
+            self._append(chr(0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00)))
+        elif 0xD800 <= code <= 0xDBFF:
+            self._append("")
+            self._high_surrogate = code
+        else:
+            self._append(chr(code))
+
+    def _string(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def _end_string(self) -> None:
+        if self._high_surrogate is not None:
+            self._append("")
+        text = self._string()
+        self._parts = []
+        if self._in_key:
+            self._keys[-1] = text
+            self._mode = "colon"
+        else:
+            # Already shown while it was received.
+            self._set(text, changed=False)
+
+    def _end_scalar(self) -> None:
+        token = "".join(self._scalar)
+        self._scalar = []
+        value: Any = _MISSING
+        if token in _LITERALS:
+            value = _LITERALS[token]
+        else:
+            with contextlib.suppress(json.JSONDecodeError):
+                value = json.loads(token)
+        if value is not None and not isinstance(value, (bool, int, float)):
+            raise ValueError(f"Invalid JSON value {token!r}")  # noqa: EM102
+        self._set(value)
+
+    def _attach(self, value: Any) -> None:
+        if not self._stack:
+            self._root = value
+            return
+        top = self._stack[-1]
+        if isinstance(top, dict):
+            top[self._keys[-1]] = value
+        else:
+            top.append(value)
+
+    def _set(self, value: Any, *, changed: bool = True) -> None:
+        self._attach(value)
+        self._dirty = self._dirty or changed
+        self._mode = "after_value" if self._stack else "done"
+
+    def _open(self, container: Union[dict, list]) -> None:
+        self._attach(container)
+        self._dirty = True
+        self._stack.append(container)
+        self._keys.append(None)
+
+    def _close(self, kind: type) -> None:
+        if not isinstance(self._stack[-1], kind):
+            raise ValueError("Mismatched closing bracket")
+        self._stack.pop()
+        self._keys.pop()
+        self._mode = "after_value" if self._stack else "done"
+
+
+class PartialToolsParser(BaseTransformOutputParser[Any]):
+    """Parse the structured output tool call, streaming partial values.
+
+    While streaming, the argument deltas of the first call of the tool are
+    fed to a `PartialJsonParser` as they arrive, and a dict with the fields
+    received so far is yielded whenever it changed. The last item is the
+    complete value, validated against the Pydantic schema once. `invoke`
+    only returns the complete value.
+    """
+
+    tool_schema: Annotated[Any, SkipValidation()]
+    """Schema of the tool, a Pydantic class when `pydantic` is set."""
+    key_name: str
+    """Name of the tool."""
+    pydantic: bool = False
+    """Whether to validate the value with `tool_schema`."""
+
+    def parse_result(self, result: List[Generation], *, partial: bool = False) -> Any:
+        parser: Any = tools_parser(
+            self.tool_schema,
+            self.key_name,
+            pydantic=self.pydantic,
+        )
+        return parser.parse_result(result, partial=partial)
+
+    def parse(self, text: str) -> Any:
+        """Parse `text` as the arguments of the tool call."""
+        try:
+            value = json.loads(text) if text.strip() else {}
+        except json.JSONDecodeError as e:
+            msg = f"Function {self.key_name} arguments are not valid JSON: {e}"
+            raise OutputParserException(msg, llm_output=text) from e
+        if not self.pydantic:
+            return value
+        return _validate(self.tool_schema, value, text)
+
+    def _transform(
+        self,
+        input: Iterator[Union[str, BaseMessage]],  # noqa: A002
+    ) -> Iterator[Any]:
+        call = _StreamedToolCall(self)
+        for chunk in input:
+            if call.add(chunk):
+                yield call.partial()
+        if call.found:
+            yield call.result()
+
+    async def _atransform(
+        self,
+        input: AsyncIterator[Union[str, BaseMessage]],  # noqa: A002
+    ) -> AsyncIterator[Any]:
+        call = _StreamedToolCall(self)
+        async for chunk in input:
+            if call.add(chunk):
+                yield call.partial()
+        if call.found:
+            yield call.result()
+
+    @property
+    def _type(self) -> str:
+        return "partial_tools_parser"
+
+
+class _StreamedToolCall:
+    def __init__(self, owner: PartialToolsParser) -> None:
+        self.owner = owner
+        self.found = False
+        self.index: Optional[int] = None
+        self.id: Optional[str] = None
+        self.args: List[str] = []
+        self.parser: Optional[PartialJsonParser] = PartialJsonParser()
+        self.done = False
+
+    def add(self, chunk: Union[str, BaseMessage]) -> bool:
+        """Take the next message chunk and return whether the value changed."""
+        if self.done or not isinstance(chunk, AIMessageChunk):
+            return False
+        changed = False
+        for tool_chunk in chunk.tool_call_chunks:
+            index, id_ = tool_chunk.get("index"), tool_chunk.get("id")
+            if not self.found:
+                if tool_chunk.get("name") != self.owner.key_name:
+                    continue
+                self.found = True
+                self.index, self.id = index, id_
+            elif index != self.index or (id_ and self.id and id_ != self.id):
+                # Only the first call is parsed.
+                self.done = True
+                break
+            args = tool_chunk.get("args")
+            if args:
+                self.args.append(args)
+                if self.parser is not None:
+                    try:
+                        changed = self.parser.feed(args) or changed
+                    except ValueError:
+                        # Not JSON after all; the end result will tell.
+                        self.parser = None
+        return changed
+
+    def partial(self) -> Any:
+        return self.parser.value() if self.parser is not None else None
+
+    def result(self) -> Any:
+        return self.owner.parse("".join(self.args))
+
+
+def _validate(schema: Any, value: Any, text: str) -> Any:
+    try:
+        if hasattr(schema, "model_validate"):
+            return schema.model_validate(value)
+        return schema.parse_obj(value)
+    except ValueError as e:
+        raise OutputParserException(str(e), llm_output=text) from e
+
+
+def _content(chunk: Union[str, BaseMessage]) -> str:
+    if isinstance(chunk, str):
+        return chunk
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in content
+        if isinstance(part, str) or part.get("type") == "text"
+    )
+
+
+class PartialJsonOutputParser(BaseTransformOutputParser[Any]):
+    """Parse structured output given as the message content.
+
+    Used with guided decoding, where the answer itself is the JSON document.
+    With `stream_partial`, content deltas are fed to a `PartialJsonParser`
+    and the fields received so far are yielded whenever they changed;
+    otherwise only the complete value is yielded. It is validated against
+    the Pydantic schema once, at the end.
+    """
+
+    tool_schema: Annotated[Any, SkipValidation()]
+    """Schema of the output, a Pydantic class when `pydantic` is set."""
+    pydantic: bool = False
+    """Whether to validate the value with `tool_schema`."""
+    stream_partial: bool = False
+    """Whether to yield partial values while streaming."""
+
+    def parse_result(self, result: List[Generation], *, partial: bool = False) -> Any:
+        return self.parse(result[0].text)
+
+    def parse(self, text: str) -> Any:
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError as e:
+            msg = f"Structured output is not valid JSON: {e}"
+            raise OutputParserException(msg, llm_output=text) from e
+        if not self.pydantic:
+            return value
+        return _validate(self.tool_schema, value, text)
+
+    def _transform(
+        self,
+        input: Iterator[Union[str, BaseMessage]],  # noqa: A002
+    ) -> Iterator[Any]:
+        content = _StreamedContent(self)
+        for chunk in input:
+            if content.add(chunk):
+                yield content.partial()
+        if content.parts:
+            yield self.parse("".join(content.parts))
+
+    async def _atransform(
+        self,
+        input: AsyncIterator[Union[str, BaseMessage]],  # noqa: A002
+    ) -> AsyncIterator[Any]:
+        content = _StreamedContent(self)
+        async for chunk in input:
+            if content.add(chunk):
+                yield content.partial()
+        if content.parts:
+            yield self.parse("".join(content.parts))
+
+    @property
+    def _type(self) -> str:
+        return "partial_json_output_parser"
+
+
+class _StreamedContent:
+    def __init__(self, owner: PartialJsonOutputParser) -> None:
+        self.parts: List[str] = []
+        self.parser: Optional[PartialJsonParser] = (
+            PartialJsonParser() if owner.stream_partial else None
+        )
+
+    def add(self, chunk: Union[str, BaseMessage]) -> bool:
+        """Take the next chunk and return whether the partial value changed."""
+        text = _content(chunk)
+        if not text:
+            return False
+        self.parts.append(text)
+        if self.parser is None:
+            return False
+        try:
+            return self.parser.feed(text)
+        except ValueError:
+            # Not JSON after all; the end result will tell.
+            self.parser = None
+            return False
+
+    def partial(self) -> Any:
+        return self.parser.value() if self.parser is not None else None
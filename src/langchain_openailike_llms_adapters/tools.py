@@ -0,0 +1,55 @@
+"""Cached conversion of tool schemas.
+
+Generating the JSON schema of a Pydantic model takes milliseconds for
+nested models, and `with_structured_output` used to do it several times
+per call: for the tool name, in `bind_tools` and, on every request, for
+the tracing metadata. Schemas given as classes or functions are converted
+once and kept as JSON, so every caller gets its own dict to modify.
+"""
+
+from __future__ import annotations
+
+import inspect
+import json
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from langchain_core.output_parsers import JsonOutputKeyToolsParser, PydanticToolsParser
+from langchain_core.runnables import Runnable
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+def _cacheable(tool: Any) -> bool:
+    # Dicts are cheap to convert and unhashable; tool instances may change.
+    return isinstance(tool, type) or inspect.isfunction(tool)
+
+
+@lru_cache(maxsize=512)
+def _cached_openai_tool(tool: Any, *, strict: Optional[bool]) -> str:
+    # Decoding is several times faster than a deepcopy of the dict.
+    return json.dumps(convert_to_openai_tool(tool, strict=strict))
+
+
+def convert_tool(tool: Any, *, strict: Optional[bool] = None) -> Dict[str, Any]:
+    """`convert_to_openai_tool`, cached for classes and functions."""
+    if _cacheable(tool):
+        return json.loads(_cached_openai_tool(tool, strict=strict))
+    return convert_to_openai_tool(tool, strict=strict)
+
+
+@lru_cache(maxsize=512)
+def _cached_parser(schema: Any, key_name: str, *, pydantic: bool) -> Runnable:
+    if pydantic:
+        return PydanticToolsParser(tools=[schema], first_tool_only=True)
+    return JsonOutputKeyToolsParser(key_name=key_name, first_tool_only=True)
+
+
+def tools_parser(schema: Any, key_name: str, *, pydantic: bool) -> Runnable:
+    """Parser for the first call of the structured output tool.
+
+    Parsers keep no state between calls, so one instance per schema is
+    shared.
+    """
+    if _cacheable(schema):
+        return _cached_parser(schema, key_name, pydantic=pydantic)
+    return _cached_parser.__wrapped__(schema, key_name, pydantic=pydantic)
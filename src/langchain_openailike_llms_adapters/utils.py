@@ -1,15 +1,29 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import cache
 from json import JSONDecodeError
 from operator import itemgetter
+from pathlib import Path
 from typing import (
+    IO,
+    TYPE_CHECKING,
     Any,
     AsyncIterator,
+    Callable,
     Dict,
+    Iterable,
     Iterator,
     List,
     Literal,
     Optional,
     Self,
+    Sequence,
+    Tuple,
     Type,
     TypedDict,
     TypeVar,
@@ -23,11 +37,15 @@ from langchain_core.callbacks import (
 )
 from langchain_core.language_models import LanguageModelInput
 from langchain_core.messages import AIMessageChunk, BaseMessage
-from langchain_core.output_parsers import JsonOutputKeyToolsParser, PydanticToolsParser
 from langchain_core.outputs import ChatGenerationChunk, ChatResult
-from langchain_core.runnables import Runnable, RunnableMap, RunnablePassthrough
+from langchain_core.runnables import (
+    Runnable,
+    RunnableConfig,
+    RunnableMap,
+    RunnablePassthrough,
+)
 from langchain_core.utils import from_env, secret_from_env
-from langchain_core.utils.function_calling import convert_to_openai_tool
+from langchain_openai import OpenAIEmbeddings
 from langchain_openai.chat_models.base import BaseChatOpenAI, _is_pydantic_class
 from pydantic import (
     BaseModel,
@@ -40,62 +58,82 @@ from pydantic import (
 )
 
 from langchain_openailike_llms_adapters.provider import providers
-from langchain_openai import OpenAIEmbeddings
-from .provider import _get_provider_with_model
+
+from .adaptive import AIMDController, arun_adaptive, run_adaptive
+from .balancer import (
+    AsyncBalancedTransport,
+    BalancedTransport,
+    BalancingStrategy,
+    LoadBalancer,
+    get_load_balancer,
+    split_endpoints,
+)
+from .batch import BatchJob
+from .batching import estimate_tokens, is_batch_too_large, pack_batches
+from .cache import BaseResponseCache, response_cache_key, result_to_chunks
+from .capabilities import ModelCapabilities, capability_registry
+from .clients import _running_loop, client_registry
+from .embedding_cache import MmapEmbeddingCache
+from .hedging import HedgePolicy
+from .metrics import MetricsRegistry, StreamTimer, metrics_registry
+from .ratelimit import QuotaLimiter, get_quota_limiter
+from .singleflight import default_group
+from .streaming import (
+    ChunkCoalescer,
+    StreamAccumulator,
+    aiter_until_deadline,
+    generate_from_chunks,
+    text_chunk,
+)
+from .structured import PartialJsonOutputParser, PartialToolsParser
+from .tools import _cacheable, convert_tool, tools_parser
+
+if TYPE_CHECKING:
+    import numpy as np
 
 _BM = TypeVar("_BM", bound=BaseModel)
 _DictOrPydanticClass = Union[dict[str, Any], type[_BM], type]
 _DictOrPydantic = Union[dict, _BM]
 
 
-enable_streaming_model = [
-    "qwen3-235b-a22b",
-    "qwen3-32b",
-    "qwen3-30b-a3b",
-    "qwen3-14b",
-    "qwen3-8b",
-    "qwen3-4b",
-    "qwen3-1.7b",
-    "qwen3-0.6b",
-]
-
-
-support_tool_choice_models = [
-    "qwen3-235b-a22b-instruct-2507",
-    "qwen3-30b-a3b-instruct-2507",
-    "qwen3-coder-480b-a35b-instruct",
-    "qwen3-coder-plus",
-    "qwen3-coder-30b-a3b-instruct",
-    "qwen-max",
-    "qwen-max-latest",
-    "qwen-plus",
-    "qwen-plus-latest",
-    "qwen-turbo",
-    "qwen-turbo-latest",
-    "qwen3-235b-a22b",
-    "qwen3-32b",
-    "qwen3-30b-a3b",
-    "qwen3-14b",
-    "qwen3-8b",
-    "qwen3-4b",
-    "qwen3-1.7b",
-    "qwen3-0.6b",
-    "qwen2.5-14b-instruct-1m",
-    "qwen2.5-7b-instruct-1m",
-    "qwen2.5-72b-instruct",
-    "qwen2.5-32b-instruct",
-    "qwen2.5-14b-instruct",
-    "qwen2.5-7b-instruct",
-    "qwen2.5-3b-instruct",
-    "qwen2.5-1.5b-instruct",
-    "qwen2.5-0.5b-instruct",
-]
-
-
-def _check_support_tool_choice(model: str) -> bool:
-    if model in support_tool_choice_models:
-        return True
-    return False
+def _parse_text_delta(
+    chunk: dict,
+    default_chunk_class: Type,
+    base_generation_info: Optional[Dict],
+) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+    """Return `(content, reasoning, id)` of a chunk that only carries text.
+
+    Nearly every chunk of a stream is one of those. They are built without
+    pydantic validation (see `text_chunk`), which costs more than the rest
+    of the conversion put together.
+    Returns None for any other chunk, which then takes the full path.
+    """
+    if (
+        base_generation_info
+        or default_chunk_class is not AIMessageChunk
+        or chunk.get("usage")
+    ):
+        return None
+    choices = chunk.get("choices")
+    if not choices:
+        return None
+    choice = choices[0]
+    delta = choice.get("delta")
+    if (
+        not delta
+        or choice.get("finish_reason")
+        or choice.get("logprobs")
+        or delta.get("tool_calls")
+        or delta.get("function_call")
+        or delta.get("role") not in (None, "assistant")
+    ):
+        return None
+    content = delta.get("content") or ""
+    if not isinstance(content, str):
+        return None
+    # OpenRouter sends `reasoning` instead of `reasoning_content`.
+    reasoning = delta.get("reasoning_content") or delta.get("reasoning")
+    return content, reasoning, delta.get("id")
 
 
 class ChatCustomOpenAILikeModel(BaseChatOpenAI):
@@ -104,15 +142,53 @@ class ChatCustomOpenAILikeModel(BaseChatOpenAI):
     api_key: Optional[SecretStr] = Field(
         default_factory=secret_from_env("CUSTOM_API_KEY", default=None),
     )
-    api_base: str = Field(
+    api_base: Union[str, List[str]] = Field(
         default_factory=from_env("CUSTOM_API_BASE", default=""),
     )
+    """Base URL of the API. A list (or comma separated string) of several
+    endpoints spreads requests over them, see `load_balancing`."""
 
     model_config = ConfigDict(populate_by_name=True)
     enable_thinking: Optional[bool] = None
     thinking_budget: Optional[int] = None
+    share_client: bool = True
+    """Reuse the process-wide client pool for this provider, endpoint and key."""
+    response_cache: Optional[BaseResponseCache] = Field(default=None, exclude=True)
+    """Cache for responses to identical requests, e.g. `InMemoryResponseCache`."""
+    single_flight: bool = False
+    """Let concurrent identical requests share one upstream call."""
+    load_balancing: BalancingStrategy = "least_outstanding"
+    """How requests are spread when `api_base` lists several endpoints."""
+    quota_limiter: Optional[QuotaLimiter] = Field(default=None, exclude=True)
+    """RPM/TPM limiter. Defaults to the one set with `configure_rate_limit`
+    for this provider. Unlike langchain's `rate_limiter` it also counts tokens."""
+    hedging: Optional[HedgePolicy] = Field(default=None, exclude=True)
+    """Send a duplicate of async requests that are slower than usual, see
+    `HedgePolicy`. Streams race for the first chunk."""
+    metrics: Optional[MetricsRegistry] = Field(
+        default_factory=lambda: metrics_registry,
+        exclude=True,
+    )
+    """Registry latency histograms are recorded in, None to record nothing."""
+    coalesce_interval_ms: Optional[float] = None
+    """Merge consecutive content deltas, and reasoning deltas separately, of a
+    stream and yield them at most every this many milliseconds. Tool call
+    chunks and usage are passed on as they are, see `ChunkCoalescer`."""
+    coalesce_max_chars: Optional[int] = None
+    """Yield merged deltas as soon as they reach this many characters."""
+    reasoning_mode: Literal["keep", "drop", "sink"] = "keep"
+    """What to do with the reasoning text of thinking models. `keep` puts it in
+    `additional_kwargs["reasoning_content"]`, `drop` discards it and `sink`
+    passes it to `reasoning_sink` instead of attaching it to messages. Unless
+    it is kept, streams skip reasoning-only chunks, so first-token metrics
+    measure the first content."""
+    reasoning_sink: Any = Field(default=None, exclude=True)
+    """Callable or writable text stream that receives reasoning text (each
+    delta when streaming) with `reasoning_mode="sink"`."""
 
     _api_name: str = PrivateAttr(default="CUSTOM")
+    _client_params: dict = PrivateAttr(default_factory=dict)
+    _balancer: Optional[LoadBalancer] = PrivateAttr(default=None)
 
     @property
     def _llm_type(self) -> str:
@@ -128,44 +204,61 @@ class ChatCustomOpenAILikeModel(BaseChatOpenAI):
     @classmethod
     def validate_temperature(cls, values: dict[str, Any]) -> Any:
         model = values.get("model_name") or values.get("model") or ""
-        provider = _get_provider_with_model(model)
-
-        if provider == "dashscope" and (
-            (
-                model in enable_streaming_model
-                and values.get("enable_thinking") is not False
-            )
-            or model.startswith("qwq")
-            or model.startswith("qvq")
-            or values.get("enable_thinking")
+        api_name = cls.__private_attributes__["_api_name"].get_default()
+        capabilities = capability_registry._lookup(api_name, model)  # noqa: SLF001
+        if capabilities.streaming_required(
+            enable_thinking=values.get("enable_thinking"),
         ):
             values["streaming"] = True
 
         return values
 
+    @property
+    def model_capabilities(self) -> ModelCapabilities:
+        """What this model supports, from `capability_registry`."""
+        return capability_registry._lookup(  # noqa: SLF001
+            self._api_name,
+            self.model_name,
+        )
+
     @model_validator(mode="after")
     def validate_environment(self) -> Self:
         """Validate environment variables."""
-        if not self.api_base:
+        endpoints = split_endpoints(self.api_base)
+        if not endpoints:
             raise ValueError(
-                """Custom models must set api_base or set the CUSTOM_API_BASE environment variable""",
+                "Custom models must set api_base or set the CUSTOM_API_BASE "
+                "environment variable",
             )
+        self._balancer = _make_balancer(
+            endpoints,
+            self.load_balancing,
+            self.http_client or self.http_async_client,
+        )
 
         key_name = f"{self._api_name.upper()}_API_KEY"
 
+        if self.reasoning_mode == "sink" and self.reasoning_sink is None:
+            raise ValueError('reasoning_mode="sink" requires a reasoning_sink')
+
+        if self.quota_limiter is None:
+            self.quota_limiter = get_quota_limiter(self._api_name)
+
         if not (self.api_key and self.api_key.get_secret_value()):
             if self._api_name == "vllm" or self._api_name == "ollama":
                 self.api_key = SecretStr("sk-" + self._api_name)
             else:
-                raise ValueError(
-                    f"If you api_key is not set,  {key_name} environment variable is required",  # noqa: E501
+                msg = (
+                    f"If you api_key is not set,  {key_name} environment "
+                    "variable is required"
                 )
+                raise ValueError(msg)
 
-        client_params: dict = {
+        self._client_params = {
             k: v
             for k, v in {
                 "api_key": self.api_key.get_secret_value() if self.api_key else None,
-                "base_url": self.api_base,
+                "base_url": endpoints[0],
                 "timeout": self.request_timeout,
                 "max_retries": self.max_retries,
                 "default_headers": self.default_headers,
@@ -174,18 +267,66 @@ class ChatCustomOpenAILikeModel(BaseChatOpenAI):
             if v is not None
         }
 
+        # Clients are built on first use (see `__getattr__`), so instances
+        # that only ever run sync or async code never construct the other one.
         if not (self.client or None):
-            sync_specific: dict = {"http_client": self.http_client}
-            self.root_client = openai.OpenAI(**client_params, **sync_specific)
-            self.client = self.root_client.chat.completions
+            self.__dict__.pop("client", None)
+            self.__dict__.pop("root_client", None)
         if not (self.async_client or None):
-            async_specific: dict = {"http_client": self.http_async_client}
-            self.root_async_client = openai.AsyncOpenAI(
-                **client_params,
+            self.__dict__.pop("async_client", None)
+            self.__dict__.pop("root_async_client", None)
+        return self
+
+    def __getattr__(self, name: str) -> Any:
+        if name in ("client", "root_client"):
+            self._init_sync_client()
+            return self.__dict__[name]
+        if name in ("async_client", "root_async_client"):
+            self._init_async_client()
+            return self.__dict__[name]
+        return super().__getattr__(name)  # type: ignore[misc]
+
+    def _init_sync_client(self) -> None:
+        if self.share_client and self.http_client is None:
+            root_client = client_registry.get_sync_client(
+                self._api_name,
+                self._client_params,
+                owner=self,
+                balancer=self._balancer,
+            )
+        else:
+            sync_specific: dict = {
+                "http_client": self.http_client or _balanced_client(self._balancer),
+            }
+            root_client = openai.OpenAI(**self._client_params, **sync_specific)
+        self.__dict__["root_client"] = root_client
+        self.__dict__["client"] = root_client.chat.completions
+
+    def _init_async_client(self) -> None:
+        # httpx connections are bound to an event loop, so the async client
+        # is only shared when we know which loop it will run on.
+        if (
+            self.share_client
+            and self.http_async_client is None
+            and _running_loop() is not None
+        ):
+            root_async_client = client_registry.get_async_client(
+                self._api_name,
+                self._client_params,
+                owner=self,
+                balancer=self._balancer,
+            )
+        else:
+            async_specific: dict = {
+                "http_client": self.http_async_client
+                or _balanced_async_client(self._balancer),
+            }
+            root_async_client = openai.AsyncOpenAI(
+                **self._client_params,
                 **async_specific,
             )
-            self.async_client = self.root_async_client.chat.completions
-        return self
+        self.__dict__["root_async_client"] = root_async_client
+        self.__dict__["async_client"] = root_async_client.chat.completions
 
     def _create_chat_result(
         self,
@@ -194,25 +335,38 @@ class ChatCustomOpenAILikeModel(BaseChatOpenAI):
     ) -> ChatResult:
         rtn = super()._create_chat_result(response, generation_info)
 
+        reasoning = None
         if not isinstance(response, openai.BaseModel):
-            return rtn
-
-        if hasattr(response.choices[0].message, "reasoning_content"):  # type:ignore
-            rtn.generations[0].message.additional_kwargs["reasoning_content"] = (
-                response.choices[0].message.reasoning_content  # type:ignore
-            )
+            # Raw dicts, e.g. responses read from a batch output file.
+            choices = response.get("choices") or [{}]
+            message = choices[0].get("message") or {}
+            reasoning = message.get("reasoning_content") or message.get("reasoning")
+        elif hasattr(response.choices[0].message, "reasoning_content"):  # type:ignore
+            reasoning = response.choices[0].message.reasoning_content  # type:ignore
         # Handle use via OpenRouter
         elif hasattr(response.choices[0].message, "model_extra"):  # type:ignore
             model_extra = response.choices[0].message.model_extra  # type:ignore
-            if isinstance(model_extra, dict) and (
-                reasoning := model_extra.get("reasoning")
-            ):
-                rtn.generations[0].message.additional_kwargs["reasoning_content"] = (
-                    reasoning
-                )
+            if isinstance(model_extra, dict):
+                reasoning = model_extra.get("reasoning")
 
+        if reasoning is not None and self.reasoning_mode != "keep":
+            self._divert_reasoning(reasoning)
+            reasoning = None
+        if reasoning is not None:
+            rtn.generations[0].message.additional_kwargs["reasoning_content"] = (
+                reasoning
+            )
         return rtn
 
+    def _divert_reasoning(self, reasoning: str) -> None:
+        """Hand reasoning text to the sink (or nowhere) instead of a message."""
+        if self.reasoning_mode == "sink" and reasoning:
+            sink = self.reasoning_sink
+            if callable(sink):
+                sink(reasoning)
+            elif sink is not None:
+                sink.write(reasoning)
+
     @property
     def _default_params(self) -> Dict[str, Any]:
         if self.enable_thinking is not None:
@@ -240,6 +394,28 @@ class ChatCustomOpenAILikeModel(BaseChatOpenAI):
         chunk: dict,
         default_chunk_class: Type,
         base_generation_info: Optional[Dict],
+    ) -> Optional[ChatGenerationChunk]:
+        delta = _parse_text_delta(chunk, default_chunk_class, base_generation_info)
+        if delta is None:
+            return self._convert_any_chunk(
+                chunk,
+                default_chunk_class,
+                base_generation_info,
+            )
+        content, reasoning, id_ = delta
+        if reasoning and self.reasoning_mode != "keep":
+            self._divert_reasoning(reasoning)
+            reasoning = None
+            if not content:
+                # Nothing is left to yield.
+                return None
+        return text_chunk(content, reasoning, id_)
+
+    def _convert_any_chunk(
+        self,
+        chunk: dict,
+        default_chunk_class: Type,
+        base_generation_info: Optional[Dict],
     ) -> Optional[ChatGenerationChunk]:
         generation_chunk = super()._convert_chunk_to_generation_chunk(
             chunk,
@@ -249,12 +425,13 @@ class ChatCustomOpenAILikeModel(BaseChatOpenAI):
         if (choices := chunk.get("choices")) and generation_chunk:
             top = choices[0]
             if isinstance(generation_chunk.message, AIMessageChunk):
-                if reasoning_content := top.get("delta", {}).get("reasoning_content"):
-                    generation_chunk.message.additional_kwargs["reasoning_content"] = (
-                        reasoning_content
-                    )
-                # Handle use via OpenRouter
-                elif reasoning := top.get("delta", {}).get("reasoning"):
+                delta = top.get("delta") or {}
+                # OpenRouter sends `reasoning` instead of `reasoning_content`.
+                reasoning = delta.get("reasoning_content") or delta.get("reasoning")
+                if reasoning and self.reasoning_mode != "keep":
+                    self._divert_reasoning(reasoning)
+                    reasoning = None
+                if reasoning:
                     generation_chunk.message.additional_kwargs["reasoning_content"] = (
                         reasoning
                     )
@@ -269,20 +446,63 @@ class ChatCustomOpenAILikeModel(BaseChatOpenAI):
         **kwargs: Any,
     ) -> Iterator[ChatGenerationChunk]:
         kwargs["stream_options"] = {"include_usage": True}
+        # Streams are not coalesced, so only a cache needs the key.
+        cache_key = (
+            self._get_request_key(messages, stop, **kwargs)
+            if self.response_cache is not None
+            else None
+        )
+        if cache_key is not None and self.response_cache is not None:
+            cached = self.response_cache.lookup(cache_key)
+            if cached is not None and len(cached.generations) == 1:
+                for chunk in result_to_chunks(cached):
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+                return
+        chunks: List[ChatGenerationChunk] = []
+        estimated = self._acquire_rate_limit(messages)
+        timer = self._start_timer()
+        coalescer = self._make_coalescer()
+        total_tokens = output_tokens = None
         try:
-            yield from super()._stream(
+            for chunk in super()._stream(
                 messages,
                 stop=stop,
-                run_manager=run_manager,
+                # Callbacks fire for the merged chunks below instead.
+                run_manager=None if coalescer else run_manager,
                 **kwargs,
-            )
+            ):
+                if timer is not None:
+                    timer.on_chunk(chunk.message)
+                if cache_key is not None:
+                    chunks.append(chunk)
+                if usage := getattr(chunk.message, "usage_metadata", None):
+                    total_tokens = usage["total_tokens"]
+                    output_tokens = usage["output_tokens"]
+                if coalescer is None:
+                    yield chunk
+                    continue
+                for merged in coalescer.push(chunk):
+                    if run_manager:
+                        run_manager.on_llm_new_token(merged.text, chunk=merged)
+                    yield merged
+            for merged in coalescer.flush() if coalescer else ():
+                if run_manager:
+                    run_manager.on_llm_new_token(merged.text, chunk=merged)
+                yield merged
         except JSONDecodeError as e:
-            raise JSONDecodeError(
+            msg = (
                 f"Your {self._api_name} API returned an invalid response. "
-                "Please check the API status and try again.",
-                e.doc,
-                e.pos,
-            ) from e
+                "Please check the API status and try again."
+            )
+            raise JSONDecodeError(msg, e.doc, e.pos) from e
+        if timer is not None:
+            timer.finish(output_tokens)
+        if self.quota_limiter is not None:
+            self.quota_limiter.reconcile(estimated, total_tokens)
+        if chunks and cache_key is not None and self.response_cache is not None:
+            self.response_cache.update(cache_key, generate_from_chunks(chunks))
 
     async def _astream(
         self,
@@ -292,21 +512,76 @@ class ChatCustomOpenAILikeModel(BaseChatOpenAI):
         **kwargs: Any,
     ) -> AsyncIterator[ChatGenerationChunk]:
         kwargs["stream_options"] = {"include_usage": True}
+        # Streams are not coalesced, so only a cache needs the key.
+        cache_key = (
+            self._get_request_key(messages, stop, **kwargs)
+            if self.response_cache is not None
+            else None
+        )
+        if cache_key is not None and self.response_cache is not None:
+            cached = await self.response_cache.alookup(cache_key)
+            if cached is not None and len(cached.generations) == 1:
+                for cached_chunk in result_to_chunks(cached):
+                    if run_manager:
+                        await run_manager.on_llm_new_token(
+                            cached_chunk.text,
+                            chunk=cached_chunk,
+                        )
+                    yield cached_chunk
+                return
+        chunks: List[ChatGenerationChunk] = []
+        estimated = await self._aacquire_rate_limit(messages)
+        timer = self._start_timer()
+        coalescer = self._make_coalescer()
+        total_tokens = output_tokens = None
         try:
-            async for chunk in super()._astream(
-                messages,
-                stop=stop,
-                run_manager=run_manager,
-                **kwargs,
-            ):
-                yield chunk
+            stream: AsyncIterator[Optional[ChatGenerationChunk]] = (
+                self._astream_upstream(
+                    messages,
+                    stop,
+                    # Callbacks fire for the merged chunks below instead.
+                    None if coalescer else run_manager,
+                    **kwargs,
+                )
+            )
+            if coalescer is not None:
+                stream = aiter_until_deadline(stream, coalescer)  # type: ignore[arg-type]
+            async for chunk in stream:
+                if chunk is None:
+                    # The coalescer's deadline passed while waiting.
+                    ready = coalescer.flush()  # type: ignore[union-attr]
+                else:
+                    if timer is not None:
+                        timer.on_chunk(chunk.message)
+                    if cache_key is not None:
+                        chunks.append(chunk)
+                    if usage := getattr(chunk.message, "usage_metadata", None):
+                        total_tokens = usage["total_tokens"]
+                        output_tokens = usage["output_tokens"]
+                    if coalescer is None:
+                        yield chunk
+                        continue
+                    ready = coalescer.push(chunk)
+                for merged in ready:
+                    if run_manager:
+                        await run_manager.on_llm_new_token(merged.text, chunk=merged)
+                    yield merged
+            for merged in coalescer.flush() if coalescer else ():
+                if run_manager:
+                    await run_manager.on_llm_new_token(merged.text, chunk=merged)
+                yield merged
         except JSONDecodeError as e:
-            raise JSONDecodeError(
+            msg = (
                 f"Your {self._api_name} API  returned an invalid response. "
-                "Please check the API status and try again.",
-                e.doc,
-                e.pos,
-            ) from e
+                "Please check the API status and try again."
+            )
+            raise JSONDecodeError(msg, e.doc, e.pos) from e
+        if timer is not None:
+            timer.finish(output_tokens)
+        if self.quota_limiter is not None:
+            self.quota_limiter.reconcile(estimated, total_tokens)
+        if chunks and cache_key is not None and self.response_cache is not None:
+            await self.response_cache.aupdate(cache_key, generate_from_chunks(chunks))
 
     def _generate(
         self,
@@ -315,42 +590,386 @@ class ChatCustomOpenAILikeModel(BaseChatOpenAI):
         run_manager: Optional[CallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> ChatResult:
+        request_key = self._get_request_key(messages, stop, **kwargs)
+        # With streaming on, `_stream` does the caching.
+        cache = None if self.streaming else self.response_cache
+        if (
+            request_key is not None
+            and cache is not None
+            and (cached := cache.lookup(request_key)) is not None
+        ):
+            return cached
+        if request_key is not None and self.single_flight:
+            result, shared = default_group.do(
+                (self._api_name, self._client_params["base_url"], request_key),
+                lambda: self._generate_upstream(messages, stop, run_manager, **kwargs),
+            )
+            if shared:
+                result = result.model_copy(deep=True)
+        else:
+            result = self._generate_upstream(messages, stop, run_manager, **kwargs)
+        if request_key is not None and cache is not None:
+            cache.update(request_key, result)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        request_key = self._get_request_key(messages, stop, **kwargs)
+        cache = None if self.streaming else self.response_cache
+        if (
+            request_key is not None
+            and cache is not None
+            and (cached := await cache.alookup(request_key)) is not None
+        ):
+            return cached
+        if request_key is not None and self.single_flight:
+            result, shared = await default_group.ado(
+                (self._api_name, self._client_params["base_url"], request_key),
+                lambda: self._agenerate_upstream(
+                    messages,
+                    stop,
+                    run_manager,
+                    **kwargs,
+                ),
+            )
+            if shared:
+                result = result.model_copy(deep=True)
+        else:
+            result = await self._agenerate_upstream(
+                messages,
+                stop,
+                run_manager,
+                **kwargs,
+            )
+        if request_key is not None and cache is not None:
+            await cache.aupdate(request_key, result)
+        return result
+
+    def _generate_upstream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # With streaming on, the answer comes from `_stream`, which is limited
+        # and timed. Its chunks are merged in linear time, unlike the parent's
+        # `generate_from_stream`, which matters for long reasoning traces.
+        estimated = 0 if self.streaming else self._acquire_rate_limit(messages)
+        timer = None if self.streaming else self._start_timer()
         try:
-            return super()._generate(
+            if self.streaming:
+                accumulator = StreamAccumulator()
+                accumulator.extend(
+                    self._stream(
+                        messages,
+                        stop=stop,
+                        run_manager=run_manager,
+                        **kwargs,
+                    ),
+                )
+                return accumulator.result()
+            result = super()._generate(
                 messages,
                 stop=stop,
                 run_manager=run_manager,
                 **kwargs,
             )
         except JSONDecodeError as e:
-            raise JSONDecodeError(
+            msg = (
                 f"Your {self._api_name} API returned an invalid response. "
-                "Please check the API status and try again.",
-                e.doc,
-                e.pos,
-            ) from e
+                "Please check the API status and try again."
+            )
+            raise JSONDecodeError(msg, e.doc, e.pos) from e
+        self._reconcile_rate_limit(estimated, result)
+        if timer is not None:
+            timer.finish(_output_tokens(result))
+        return result
 
-    async def _agenerate(
+    def _astream_upstream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.hedging is None:
+            return super()._astream(
+                messages,
+                stop=stop,
+                run_manager=run_manager,
+                **kwargs,
+            )
+        return self._astream_hedged(messages, stop, run_manager, **kwargs)
+
+    async def _astream_hedged(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        assert self.hedging is not None  # noqa: S101
+        parent_astream = super()._astream
+        # Callbacks are fired here, so the losing stream never reports tokens.
+        async for chunk in self.hedging.race_stream(
+            (self._api_name, self.model_name, "first_token"),
+            lambda: parent_astream(messages, stop=stop, **kwargs),
+        ):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _agenerate_upstream(
         self,
         messages: List[BaseMessage],
         stop: Optional[List[str]] = None,
         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> ChatResult:
+        # With streaming on, the answer comes from `_astream`, which hedges
+        # and is timed.
+        timer = None if self.streaming else self._start_timer()
+        if self.hedging is None or self.streaming:
+            result = await self._agenerate_attempt(
+                messages,
+                stop,
+                run_manager,
+                **kwargs,
+            )
+        else:
+            result = await self.hedging.run(
+                (self._api_name, self.model_name, "generate"),
+                lambda: self._agenerate_attempt(messages, stop, run_manager, **kwargs),
+            )
+        if timer is not None:
+            timer.finish(_output_tokens(result))
+        return result
+
+    async def _agenerate_attempt(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        estimated = 0 if self.streaming else await self._aacquire_rate_limit(messages)
         try:
-            return await super()._agenerate(
+            if self.streaming:
+                accumulator = StreamAccumulator()
+                async for chunk in self._astream(
+                    messages,
+                    stop=stop,
+                    run_manager=run_manager,
+                    **kwargs,
+                ):
+                    accumulator.add(chunk)
+                return accumulator.result()
+            result = await super()._agenerate(
                 messages,
                 stop=stop,
                 run_manager=run_manager,
                 **kwargs,
             )
         except JSONDecodeError as e:
-            raise JSONDecodeError(
+            msg = (
                 f"Your {self._api_name} API returned an invalid response. "
-                "Please check the API status and try again.",
-                e.doc,
-                e.pos,
-            ) from e
+                "Please check the API status and try again."
+            )
+            raise JSONDecodeError(msg, e.doc, e.pos) from e
+        self._reconcile_rate_limit(estimated, result)
+        return result
+
+    def _make_coalescer(self) -> Optional[ChunkCoalescer]:
+        if self.coalesce_interval_ms is None and self.coalesce_max_chars is None:
+            return None
+        return ChunkCoalescer(
+            interval=(
+                None
+                if self.coalesce_interval_ms is None
+                else self.coalesce_interval_ms / 1000
+            ),
+            max_chars=self.coalesce_max_chars,
+        )
+
+    def _start_timer(self) -> Optional[StreamTimer]:
+        if self.metrics is None:
+            return None
+        return StreamTimer(self.metrics, self._api_name, self.model_name)
+
+    def _estimate_tokens(self, messages: List[BaseMessage]) -> int:
+        prompt = sum(estimate_tokens(message.text()) for message in messages)
+        return prompt + (self.max_tokens or 0)
+
+    def _acquire_rate_limit(self, messages: List[BaseMessage]) -> int:
+        if self.quota_limiter is None:
+            return 0
+        estimated = self._estimate_tokens(messages)
+        self.quota_limiter.acquire(estimated)
+        return estimated
+
+    async def _aacquire_rate_limit(self, messages: List[BaseMessage]) -> int:
+        if self.quota_limiter is None:
+            return 0
+        estimated = self._estimate_tokens(messages)
+        await self.quota_limiter.aacquire(estimated)
+        return estimated
+
+    def _reconcile_rate_limit(self, estimated: int, result: ChatResult) -> None:
+        if self.quota_limiter is None or self.streaming:
+            return
+        usage = (result.llm_output or {}).get("token_usage") or {}
+        self.quota_limiter.reconcile(estimated, usage.get("total_tokens"))
+
+    def _get_request_key(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> Optional[str]:
+        """Hash of the request, only computed when caching or coalescing is on."""
+        if self.response_cache is None and not self.single_flight:
+            return None
+        return response_cache_key(
+            self._get_request_payload(messages, stop=stop, **kwargs),
+        )
+
+    def batch_adaptive(
+        self,
+        inputs: Iterable[LanguageModelInput],
+        config: Optional[RunnableConfig] = None,
+        *,
+        controller: Optional[AIMDController] = None,
+        max_attempts: int = 3,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> Iterator[Tuple[int, Union[BaseMessage, Exception]]]:
+        """Invoke the model on many inputs with self-tuning concurrency.
+
+        Concurrency grows while requests succeed at stable latency and is
+        halved on 429/5xx/timeouts or rising latency; overloaded inputs are
+        retried. Set `max_retries=0` on the model so rate limit errors reach
+        the controller instead of being retried by the openai client.
+
+        Args:
+            inputs: Inputs to invoke the model on, consumed lazily.
+            config: Config passed to every `invoke`.
+            controller: AIMD controller to use, e.g. to share one between
+                jobs on the same provider or inspect `controller.limit`.
+            max_attempts: Attempts per input on overload errors.
+            return_exceptions: Yield failed inputs' exceptions instead of
+                raising the first one.
+            **kwargs: Passed to every `invoke`.
+
+        Returns:
+            An iterator of `(index, output)` pairs in completion order.
+
+        """
+        return run_adaptive(
+            lambda item: self.invoke(item, config, **kwargs),
+            inputs,
+            controller or AIMDController(),
+            max_attempts=max_attempts,
+            return_exceptions=return_exceptions,
+        )
+
+    def abatch_adaptive(
+        self,
+        inputs: Iterable[LanguageModelInput],
+        config: Optional[RunnableConfig] = None,
+        *,
+        controller: Optional[AIMDController] = None,
+        max_attempts: int = 3,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> AsyncIterator[Tuple[int, Union[BaseMessage, Exception]]]:
+        """Async variant of `batch_adaptive`."""
+        return arun_adaptive(
+            lambda item: self.ainvoke(item, config, **kwargs),
+            inputs,
+            controller or AIMDController(),
+            max_attempts=max_attempts,
+            return_exceptions=return_exceptions,
+        )
+
+    def batch_offline(
+        self,
+        inputs: Sequence[LanguageModelInput],
+        *,
+        state_path: Optional[Union[str, Path]] = None,
+        shard_size: int = 50_000,
+        poll_interval: float = 5.0,
+        max_poll_interval: float = 60.0,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> List[Union[ChatResult, Exception]]:
+        """Run the inputs through the provider's offline batch API.
+
+        Much cheaper than online calls, but results can take up to the
+        provider's completion window (usually 24h). See `BatchJob`.
+
+        Args:
+            inputs: One prompt or list of messages per request.
+            state_path: JSON file to save progress to, so the job can be
+                resumed after a crash by calling this again.
+            shard_size: Maximum number of requests per batch file.
+            poll_interval: First delay between status checks.
+            max_poll_interval: Longest delay between status checks.
+            return_exceptions: Return a `BatchRequestError` for failed
+                requests instead of raising the first one.
+            **kwargs: Extra request params, as for `invoke`.
+
+        Returns:
+            One `ChatResult` per input, in input order.
+
+        """
+        return BatchJob(
+            self,
+            inputs,
+            state_path=state_path,
+            shard_size=shard_size,
+            poll_interval=poll_interval,
+            max_poll_interval=max_poll_interval,
+            **kwargs,
+        ).run(return_exceptions=return_exceptions)
+
+    async def abatch_offline(
+        self,
+        inputs: Sequence[LanguageModelInput],
+        *,
+        state_path: Optional[Union[str, Path]] = None,
+        shard_size: int = 50_000,
+        poll_interval: float = 5.0,
+        max_poll_interval: float = 60.0,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> List[Union[ChatResult, Exception]]:
+        """Async variant of `batch_offline`."""
+        return await BatchJob(
+            self,
+            inputs,
+            state_path=state_path,
+            shard_size=shard_size,
+            poll_interval=poll_interval,
+            max_poll_interval=max_poll_interval,
+            **kwargs,
+        ).arun(return_exceptions=return_exceptions)
+
+    def bind_tools(
+        self,
+        tools: Sequence[Any],
+        *,
+        strict: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        # Already converted tools are passed through by the parent as they are.
+        formatted = [convert_tool(tool, strict=strict) for tool in tools]
+        return super().bind_tools(formatted, strict=strict, **kwargs)
 
     def with_structured_output(
         self,
@@ -363,132 +982,791 @@ class ChatCustomOpenAILikeModel(BaseChatOpenAI):
         ] = "function_calling",
         include_raw: bool = False,
         strict: Optional[bool] = None,
+        stream_partial: bool = False,
         **kwargs: Any,
     ) -> Runnable[LanguageModelInput, _DictOrPydantic]:
-        if method != "function_calling":
-            method = "function_calling"
-
+        """Model wrapper that returns outputs formatted to match the given schema.
+
+        Models whose provider supports `response_format={"type": "json_schema"}`
+        (see `ModelCapabilities.json_schema`) get the schema as a decoding
+        constraint when `method="json_schema"` is asked for, or when they
+        cannot be forced to call a tool. Their answer then always parses. If
+        the provider rejects the constraint, the tool calling path is used
+        instead; it is also used for every other model.
+
+        Args:
+            schema: Pydantic class, TypedDict, JSON schema or OpenAI function.
+            method: `"json_schema"` to prefer guided decoding; anything else
+                uses function calling where the model can be forced to call
+                the tool.
+            include_raw: Also return the raw message and any parsing error.
+            strict: Passed on with the tool or the `json_schema`.
+            stream_partial: When streaming, parse the output as it arrives
+                and yield dicts of the fields received so far, followed by
+                the validated result. Cannot be combined with `include_raw`.
+            **kwargs: Not supported; passing any raises a `ValueError`.
+
+        Returns:
+            A runnable returning the parsed output.
+
+        """
         if kwargs:
             raise ValueError(f"Received unsupported arguments {kwargs}")  # noqa: EM102
+        if schema is None:
+            raise ValueError(
+                "schema must be specified when method is not 'json_mode'. "
+                "Received None.",
+            )
+        if stream_partial and include_raw:
+            raise ValueError("stream_partial cannot be used with include_raw")
+
+        capabilities = self.model_capabilities
+        tool_chain = self._tool_calling_chain(
+            schema,
+            include_raw=include_raw,
+            strict=strict,
+            stream_partial=stream_partial,
+        )
+        if capabilities.json_schema and (
+            method == "json_schema" or not capabilities.tool_choice
+        ):
+            guided_chain = self._guided_chain(
+                schema,
+                include_raw=include_raw,
+                strict=strict,
+                stream_partial=stream_partial,
+            )
+            return guided_chain.with_fallbacks(
+                [tool_chain],
+                exceptions_to_handle=(openai.BadRequestError,),
+            )
+        return tool_chain
 
+    def _tool_calling_chain(
+        self,
+        schema: _DictOrPydanticClass,
+        *,
+        include_raw: bool,
+        strict: Optional[bool],
+        stream_partial: bool,
+    ) -> Runnable:
+        method = "function_calling"
         is_pydantic_schema = _is_pydantic_class(schema)
+        tool = convert_tool(schema)
+        tool_name = tool["function"]["name"]
+
+        capabilities = self.model_capabilities
+        tool_choice = bool(capabilities.tool_choice)
+
+        extra_kwargs: Dict[str, Any] = {}
+        if tool_choice:
+            extra_kwargs["tool_choice"] = tool_name
+        if tool_choice and "qwen" in self.model_name:
+            # Bound rather than set on `self`, which other chains still use.
+            extra_body = self._default_params.get("extra_body") or {}
+            extra_kwargs["extra_body"] = {**extra_body, "enable_thinking": False}
+        if capabilities.parallel_tool_calls is not False:
+            extra_kwargs["parallel_tool_calls"] = False
+        bind_kwargs = self._filter_disabled_params(
+            strict=strict,
+            ls_structured_output_format={
+                "kwargs": {"method": method, "strict": strict},
+                # Converted again for tracing on every call otherwise.
+                "schema": tool if _cacheable(schema) else schema,
+            },
+            **extra_kwargs,
+        )
 
-        if method == "function_calling":
-            if schema is None:
-                raise ValueError(
-                    "schema must be specified when method is not 'json_mode'. "
-                    "Received None.",
-                )
-
-            tool_name = convert_to_openai_tool(schema)["function"]["name"]
-
-            tool_choice = _check_support_tool_choice(self.model_name)
-
-            if tool_choice and "qwen" in self.model_name:
-                self.enable_thinking = False
-
-            if tool_choice:
-                bind_kwargs = self._filter_disabled_params(
-                    parallel_tool_calls=False,
-                    tool_choice=tool_name,
-                    strict=strict,
-                    ls_structured_output_format={
-                        "kwargs": {"method": method, "strict": strict},
-                        "schema": schema,
-                    },
-                )
-            else:
-                bind_kwargs = self._filter_disabled_params(
-                    parallel_tool_calls=False,
-                    strict=strict,
-                    ls_structured_output_format={
-                        "kwargs": {"method": method, "strict": strict},
-                        "schema": schema,
-                    },
-                )
-
-            llm = self.bind_tools([schema], **bind_kwargs)
-            if is_pydantic_schema:
-                output_parser: Runnable = PydanticToolsParser(
-                    tools=[schema],  # type: ignore[list-item]
-                    first_tool_only=True,  # type: ignore[list-item]
-                )
-            else:
-                output_parser = JsonOutputKeyToolsParser(
-                    key_name=tool_name,
-                    first_tool_only=True,
-                )
-
-            if include_raw:
-                parser_assign = RunnablePassthrough.assign(
-                    parsed=itemgetter("raw") | output_parser,
-                    parsing_error=lambda _: None,
-                )
-                parser_none = RunnablePassthrough.assign(parsed=lambda _: None)
-                parser_with_fallback = parser_assign.with_fallbacks(
-                    [parser_none],
-                    exception_key="parsing_error",
-                )
-                chain = RunnableMap(raw=llm) | parser_with_fallback
-            else:
-                chain = llm | output_parser
+        llm = self.bind_tools([schema], **bind_kwargs)
+        if stream_partial:
+            output_parser: Runnable = PartialToolsParser(
+                tool_schema=schema,
+                key_name=tool_name,
+                pydantic=is_pydantic_schema,
+            )
+        else:
+            output_parser = tools_parser(
+                schema,
+                tool_name,
+                pydantic=is_pydantic_schema,
+            )
+        return _structured_chain(llm, output_parser, include_raw=include_raw)
 
-        return chain
+    def _guided_chain(
+        self,
+        schema: _DictOrPydanticClass,
+        *,
+        include_raw: bool,
+        strict: Optional[bool],
+        stream_partial: bool,
+    ) -> Runnable:
+        is_pydantic_schema = _is_pydantic_class(schema)
+        tool = convert_tool(schema, strict=strict)
+        function = tool["function"]
+        json_schema: Dict[str, Any] = {
+            "name": function["name"],
+            "schema": function.get("parameters") or {},
+        }
+        if function.get("description"):
+            json_schema["description"] = function["description"]
+        if strict is not None:
+            json_schema["strict"] = strict
+
+        llm = self.bind(
+            response_format={"type": "json_schema", "json_schema": json_schema},
+            ls_structured_output_format={
+                "kwargs": {"method": "json_schema", "strict": strict},
+                "schema": convert_tool(schema) if _cacheable(schema) else schema,
+            },
+        )
+        output_parser = PartialJsonOutputParser(
+            tool_schema=schema,
+            pydantic=is_pydantic_schema,
+            stream_partial=stream_partial,
+        )
+        return _structured_chain(llm, output_parser, include_raw=include_raw)
+
+
+def _structured_chain(
+    llm: Runnable,
+    output_parser: Runnable,
+    *,
+    include_raw: bool,
+) -> Runnable:
+    if not include_raw:
+        return llm | output_parser
+    parser_assign = RunnablePassthrough.assign(
+        parsed=itemgetter("raw") | output_parser,
+        parsing_error=lambda _: None,
+    )
+    parser_none = RunnablePassthrough.assign(parsed=lambda _: None)
+    parser_with_fallback = parser_assign.with_fallbacks(
+        [parser_none],
+        exception_key="parsing_error",
+    )
+    return RunnableMap(raw=llm) | parser_with_fallback
 
 
 class OpenAILikeEmbedding(OpenAIEmbeddings):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     check_embedding_ctx_length: bool = False
+    share_client: bool = True
+    """Reuse the process-wide client pool for this provider, endpoint and key."""
+    embedding_cache: Optional[MmapEmbeddingCache] = Field(default=None, exclude=True)
+    """On-disk cache so unchanged texts are not embedded again."""
+    max_concurrency: Optional[int] = None
+    """Maximum number of chunks embedded at the same time. None sends them one
+    after another."""
+    chunk_max_retries: int = 2
+    """How often a single failed chunk is retried before the whole call fails."""
+    max_batch_tokens: Optional[int] = None
+    """Estimated token budget per request. `chunk_size` caps the number of
+    inputs per request; both default to the provider's limits."""
+    supports_base64: bool = True
+    """Whether the provider accepts `encoding_format="base64"`, used by
+    `embed_documents_array`."""
+    single_flight: bool = False
+    """Let concurrent identical embedding requests share one upstream call."""
+    # Widened to take a list of endpoints to balance across.
+    openai_api_base: Optional[Union[str, List[str]]] = Field(  # type: ignore[assignment]
+        default_factory=from_env("OPENAI_API_BASE", default=None),
+        alias="base_url",
+    )
+    """Base URL of the API. A list (or comma separated string) of several
+    endpoints spreads requests over them, see `load_balancing`."""
+    load_balancing: BalancingStrategy = "least_outstanding"
+    """How requests are spread when `openai_api_base` lists several endpoints."""
+    quota_limiter: Optional[QuotaLimiter] = Field(default=None, exclude=True)
+    """RPM/TPM limiter. Defaults to the one set with `configure_rate_limit`
+    for this provider."""
+    metrics: Optional[MetricsRegistry] = Field(
+        default_factory=lambda: metrics_registry,
+        exclude=True,
+    )
+    """Registry request latencies are recorded in, None to record nothing."""
     _api_name: str = PrivateAttr(default="CUSTOM")
-    
-    
+    _client_params: dict = PrivateAttr(default_factory=dict)
+    _balancer: Optional[LoadBalancer] = PrivateAttr(default=None)
+    # Limits learned from batches the provider rejected as too large.
+    _learned_max_items: Optional[int] = PrivateAttr(default=None)
+    _learned_max_tokens: Optional[int] = PrivateAttr(default=None)
+
+    @model_validator(mode="before")
+    @classmethod
+    def validate_batch_size(cls, values: dict[str, Any]) -> Any:
+        if "chunk_size" not in values:
+            api_name = cls.__private_attributes__["_api_name"].get_default()
+            capabilities = capability_registry._lookup(  # noqa: SLF001
+                api_name,
+                values.get("model") or "",
+            )
+            if capabilities.max_batch_size:
+                values["chunk_size"] = capabilities.max_batch_size
+        return values
+
     @model_validator(mode="after")
     def validate_environment(self) -> Self:
         """Validate that api key and python package exists in environment."""
-        if not self.openai_api_key and self._api_name=="ollama" or self._api_name=="vllm":
-            self.openai_api_key=SecretStr("sk"+self._api_name)
-        
-        client_params: dict = {
+        if (
+            not self.openai_api_key and self._api_name == "ollama"
+        ) or self._api_name == "vllm":
+            self.openai_api_key = SecretStr("sk" + self._api_name)
+        if self.quota_limiter is None:
+            self.quota_limiter = get_quota_limiter(self._api_name)
+
+        endpoints = split_endpoints(self.openai_api_base or [])
+        self._balancer = _make_balancer(
+            endpoints,
+            self.load_balancing,
+            self.http_client or self.http_async_client,
+        )
+        self._client_params = {
             "api_key": (
                 self.openai_api_key.get_secret_value() if self.openai_api_key else None
             ),
             "organization": self.openai_organization,
-            "base_url": self.openai_api_base,
+            "base_url": endpoints[0] if endpoints else None,
             "timeout": self.request_timeout,
             "max_retries": self.max_retries,
             "default_headers": self.default_headers,
             "default_query": self.default_query,
         }
-        
 
         if not self.client:
-            if self.openai_proxy and not self.http_client:
-                try:
-                    import httpx
-                except ImportError as e:
-                    raise ImportError(
-                        "Could not import httpx python package. "
-                        "Please install it with `pip install httpx`."
-                    ) from e
-                self.http_client = httpx.Client(proxy=self.openai_proxy)
-            sync_specific = {"http_client": self.http_client}
-            self.client = openai.OpenAI(**client_params, **sync_specific).embeddings  # type: ignore[arg-type]
+            self.__dict__.pop("client", None)
         if not self.async_client:
-            if self.openai_proxy and not self.http_async_client:
-                try:
-                    import httpx
-                except ImportError as e:
-                    raise ImportError(
-                        "Could not import httpx python package. "
-                        "Please install it with `pip install httpx`."
-                    ) from e
-                self.http_async_client = httpx.AsyncClient(proxy=self.openai_proxy)
-            async_specific = {"http_client": self.http_async_client}
-            self.async_client = openai.AsyncOpenAI(
-                **client_params, # type: ignore[arg-type]
-                **async_specific,  # type: ignore[arg-type]
-            ).embeddings
+            self.__dict__.pop("async_client", None)
         return self
 
+    def __getattr__(self, name: str) -> Any:
+        if name == "client":
+            self._init_sync_client()
+            return self.__dict__[name]
+        if name == "async_client":
+            self._init_async_client()
+            return self.__dict__[name]
+        return super().__getattr__(name)  # type: ignore[misc]
+
+    def _init_sync_client(self) -> None:
+        if self.openai_proxy and not self.http_client:
+            try:
+                import httpx
+            except ImportError as e:
+                raise ImportError(
+                    "Could not import httpx python package. "
+                    "Please install it with `pip install httpx`.",
+                ) from e
+            self.http_client = httpx.Client(proxy=self.openai_proxy)
+        if self.share_client and self.http_client is None:
+            client = client_registry.get_sync_client(
+                self._api_name,
+                self._client_params,
+                owner=self,
+                balancer=self._balancer,
+            )
+        else:
+            sync_specific = {
+                "http_client": self.http_client or _balanced_client(self._balancer),
+            }
+            client = openai.OpenAI(**self._client_params, **sync_specific)  # type: ignore[arg-type]
+        self.__dict__["client"] = client.embeddings
+
+    def _init_async_client(self) -> None:
+        if self.openai_proxy and not self.http_async_client:
+            try:
+                import httpx
+            except ImportError as e:
+                raise ImportError(
+                    "Could not import httpx python package. "
+                    "Please install it with `pip install httpx`.",
+                ) from e
+            self.http_async_client = httpx.AsyncClient(proxy=self.openai_proxy)
+        if (
+            self.share_client
+            and self.http_async_client is None
+            and _running_loop() is not None
+        ):
+            async_client = client_registry.get_async_client(
+                self._api_name,
+                self._client_params,
+                owner=self,
+                balancer=self._balancer,
+            )
+        else:
+            async_specific = {
+                "http_client": self.http_async_client
+                or _balanced_async_client(self._balancer),
+            }
+            async_client = openai.AsyncOpenAI(
+                **self._client_params,  # type: ignore[arg-type]
+                **async_specific,  # type: ignore[arg-type]
+            )
+        self.__dict__["async_client"] = async_client.embeddings
+
+    def _split_cached(
+        self,
+        texts: List[str],
+        **kwargs: Any,
+    ) -> tuple[List[Optional[memoryview[float]]], Dict[bytes, List[int]]]:
+        """Split `texts` into cached vectors and the unique texts still to embed.
+
+        Returns:
+            The cached float32 view (or None) for every text, and the indexes
+            of the missing texts grouped by cache key.
+
+        """
+        assert self.embedding_cache is not None  # noqa: S101
+        dimensions = kwargs.get("dimensions", self.dimensions)
+        keys = [
+            self.embedding_cache.make_key(self._api_name, self.model, dimensions, text)
+            for text in texts
+        ]
+        views = self.embedding_cache.get_many(keys)
+        missing: Dict[bytes, List[int]] = {}
+        for i, (key, view) in enumerate(zip(keys, views)):
+            if view is None:
+                missing.setdefault(key, []).append(i)
+        return views, missing
+
+    def _merge_embedded(
+        self,
+        views: List[Optional[memoryview[float]]],
+        missing: Dict[bytes, List[int]],
+        vectors: List[List[float]],
+    ) -> List[List[float]]:
+        assert self.embedding_cache is not None  # noqa: S101
+        # tolist() of a float32 view returns floats.
+        results: List[Any] = [
+            view.tolist() if view is not None else None for view in views
+        ]
+        if missing:
+            self.embedding_cache.put_many(list(missing), vectors)
+        for indexes, vector in zip(missing.values(), vectors):
+            for i in indexes:
+                results[i] = vector
+        return results
+
+    def embed_documents(
+        self,
+        texts: List[str],
+        chunk_size: Optional[int] = None,
+        **kwargs: Any,
+    ) -> List[List[float]]:
+        if self.embedding_cache is None:
+            return self._embed_texts(texts, chunk_size, **kwargs)
+        views, missing = self._split_cached(texts, **kwargs)
+        vectors = (
+            self._embed_texts(
+                [texts[indexes[0]] for indexes in missing.values()],
+                chunk_size,
+                **kwargs,
+            )
+            if missing
+            else []
+        )
+        return self._merge_embedded(views, missing, vectors)
+
+    async def aembed_documents(
+        self,
+        texts: List[str],
+        chunk_size: Optional[int] = None,
+        **kwargs: Any,
+    ) -> List[List[float]]:
+        if self.embedding_cache is None:
+            return await self._aembed_texts(texts, chunk_size, **kwargs)
+        # The cache is local disk plus a memory map, cheap enough to use
+        # directly from the event loop.
+        views, missing = self._split_cached(texts, **kwargs)
+        vectors = (
+            await self._aembed_texts(
+                [texts[indexes[0]] for indexes in missing.values()],
+                chunk_size,
+                **kwargs,
+            )
+            if missing
+            else []
+        )
+        return self._merge_embedded(views, missing, vectors)
+
+    def embed_documents_array(
+        self,
+        texts: List[str],
+        chunk_size: Optional[int] = None,
+        **kwargs: Any,
+    ) -> np.ndarray:
+        """Embed `texts` into one contiguous `(len(texts), dim)` float32 array.
+
+        Vectors are requested base64 encoded where the provider supports it and
+        decoded straight into the array, so no Python float objects are built.
+        Requires numpy.
+        """
+        np = _import_numpy()
+        views, missing = self._split_array_inputs(texts, **kwargs)
+        pending = [texts[indexes[0]] for indexes in missing.values()]
+        raw: List[Any] = []
+        if pending:
+            if self._use_base64:
+                try:
+                    raw = self._embed_texts(
+                        pending,
+                        chunk_size,
+                        **{**kwargs, "encoding_format": "base64"},
+                    )
+                except openai.BadRequestError as e:
+                    if not _rejects_base64(e):
+                        raise
+                    self.supports_base64 = False
+            if not raw:
+                raw = self._embed_texts(pending, chunk_size, **kwargs)
+        return self._build_array(np, views, missing, raw)
+
+    async def aembed_documents_array(
+        self,
+        texts: List[str],
+        chunk_size: Optional[int] = None,
+        **kwargs: Any,
+    ) -> np.ndarray:
+        """Async version of `embed_documents_array`."""
+        np = _import_numpy()
+        views, missing = self._split_array_inputs(texts, **kwargs)
+        pending = [texts[indexes[0]] for indexes in missing.values()]
+        raw: List[Any] = []
+        if pending:
+            if self._use_base64:
+                try:
+                    raw = await self._aembed_texts(
+                        pending,
+                        chunk_size,
+                        **{**kwargs, "encoding_format": "base64"},
+                    )
+                except openai.BadRequestError as e:
+                    if not _rejects_base64(e):
+                        raise
+                    self.supports_base64 = False
+            if not raw:
+                raw = await self._aembed_texts(pending, chunk_size, **kwargs)
+        return self._build_array(np, views, missing, raw)
+
+    @property
+    def _use_base64(self) -> bool:
+        # The length-safe path averages float vectors itself.
+        return self.supports_base64 and not self.check_embedding_ctx_length
+
+    def _split_array_inputs(
+        self,
+        texts: List[str],
+        **kwargs: Any,
+    ) -> tuple[List[Optional[memoryview[float]]], Dict[Any, List[int]]]:
+        if self.embedding_cache is not None:
+            return self._split_cached(texts, **kwargs)
+        return [None] * len(texts), {i: [i] for i in range(len(texts))}
+
+    def _build_array(
+        self,
+        np: Any,
+        views: List[Optional[memoryview[float]]],
+        missing: Dict[Any, List[int]],
+        raw: List[Any],
+    ) -> np.ndarray:
+        decoded = [_decode_embedding(np, item) for item in raw]
+        first = next((view for view in views if view is not None), None)
+        if decoded:
+            dim = len(decoded[0])
+        elif first is not None:
+            dim = len(first)
+        else:
+            dim = 0
+        out = np.empty((len(views), dim), dtype=np.float32)
+        for i, view in enumerate(views):
+            if view is not None:
+                out[i] = np.frombuffer(view, dtype=np.float32)
+        for indexes, vector in zip(missing.values(), decoded):
+            out[indexes] = vector
+        if self.embedding_cache is not None and decoded:
+            self.embedding_cache.put_many(list(missing), decoded)
+        return out
+
+    def _embed_texts(
+        self,
+        texts: List[str],
+        chunk_size: Optional[int] = None,
+        **kwargs: Any,
+    ) -> List[List[float]]:
+        if self.check_embedding_ctx_length:
+            return super().embed_documents(texts, chunk_size, **kwargs)
+        client_kwargs = {**self._invocation_params, **kwargs}
+        chunks = self._pack_batches(texts, chunk_size)
+        if self.max_concurrency and self.max_concurrency > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_concurrency, len(chunks)),
+            ) as executor:
+                embedded = list(
+                    executor.map(
+                        lambda chunk: self._embed_batch(chunk, client_kwargs),
+                        chunks,
+                    ),
+                )
+        else:
+            embedded = [self._embed_batch(chunk, client_kwargs) for chunk in chunks]
+        return [vector for chunk in embedded for vector in chunk]
+
+    async def _aembed_texts(
+        self,
+        texts: List[str],
+        chunk_size: Optional[int] = None,
+        **kwargs: Any,
+    ) -> List[List[float]]:
+        if self.check_embedding_ctx_length:
+            return await super().aembed_documents(texts, chunk_size, **kwargs)
+        client_kwargs = {**self._invocation_params, **kwargs}
+        chunks = self._pack_batches(texts, chunk_size)
+        semaphore = asyncio.Semaphore(self.max_concurrency or 1)
+
+        async def _run(chunk: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._aembed_batch(chunk, client_kwargs)
+
+        # gather keeps the input order no matter which chunk finishes first.
+        embedded = await asyncio.gather(*(_run(chunk) for chunk in chunks))
+        return [vector for chunk in embedded for vector in chunk]
+
+    def _pack_batches(
+        self,
+        texts: List[str],
+        chunk_size: Optional[int] = None,
+    ) -> List[List[str]]:
+        max_items = chunk_size or self.chunk_size
+        max_tokens = self.max_batch_tokens
+        if self._learned_max_items is not None:
+            max_items = min(max_items, self._learned_max_items)
+        if self._learned_max_tokens is not None:
+            max_tokens = min(
+                max_tokens or self._learned_max_tokens,
+                self._learned_max_tokens,
+            )
+        return pack_batches(texts, max_items, max_tokens)
+
+    def _learn_batch_limit(self, chunk: List[str]) -> None:
+        """Remember that the provider rejected `chunk` but took its halves.
+
+        Later batches stay just below the smallest such batch, so we keep
+        sending the largest batch the provider has not refused. Nothing is
+        learned until both halves went through, as the batch may have failed
+        for one bad input instead.
+        """
+        items = len(chunk) - 1
+        tokens = sum(estimate_tokens(text) for text in chunk) - 1
+        if self._learned_max_items is None or items < self._learned_max_items:
+            self._learned_max_items = items
+        if self._learned_max_tokens is None or tokens < self._learned_max_tokens:
+            self._learned_max_tokens = tokens
+
+    def _embed_batch(
+        self,
+        chunk: List[str],
+        client_kwargs: Dict[str, Any],
+    ) -> List[List[float]]:
+        try:
+            return self._embed_chunk(chunk, client_kwargs)
+        except openai.APIStatusError as e:
+            if len(chunk) < 2 or not is_batch_too_large(e):
+                raise
+        half = len(chunk) // 2
+        vectors = self._embed_batch(chunk[:half], client_kwargs)
+        vectors += self._embed_batch(chunk[half:], client_kwargs)
+        self._learn_batch_limit(chunk)
+        return vectors
+
+    async def _aembed_batch(
+        self,
+        chunk: List[str],
+        client_kwargs: Dict[str, Any],
+    ) -> List[List[float]]:
+        try:
+            return await self._aembed_chunk(chunk, client_kwargs)
+        except openai.APIStatusError as e:
+            if len(chunk) < 2 or not is_batch_too_large(e):
+                raise
+        half = len(chunk) // 2
+        vectors = await self._aembed_batch(chunk[:half], client_kwargs)
+        vectors += await self._aembed_batch(chunk[half:], client_kwargs)
+        self._learn_batch_limit(chunk)
+        return vectors
+
+    def _single_flight_key(
+        self,
+        chunk: List[str],
+        client_kwargs: Dict[str, Any],
+    ) -> tuple:
+        return (
+            self._api_name,
+            self._client_params["base_url"],
+            response_cache_key({"input": chunk, **client_kwargs}),
+        )
+
+    def _embed_chunk(
+        self,
+        chunk: List[str],
+        client_kwargs: Dict[str, Any],
+    ) -> List[Any]:
+        if not self.single_flight:
+            return self._embed_chunk_upstream(chunk, client_kwargs)
+        vectors, shared = default_group.do(
+            self._single_flight_key(chunk, client_kwargs),
+            lambda: self._embed_chunk_upstream(chunk, client_kwargs),
+        )
+        return _copy_vectors(vectors) if shared else vectors
+
+    async def _aembed_chunk(
+        self,
+        chunk: List[str],
+        client_kwargs: Dict[str, Any],
+    ) -> List[Any]:
+        if not self.single_flight:
+            return await self._aembed_chunk_upstream(chunk, client_kwargs)
+        vectors, shared = await default_group.ado(
+            self._single_flight_key(chunk, client_kwargs),
+            lambda: self._aembed_chunk_upstream(chunk, client_kwargs),
+        )
+        return _copy_vectors(vectors) if shared else vectors
+
+    def _embed_chunk_upstream(
+        self,
+        chunk: List[str],
+        client_kwargs: Dict[str, Any],
+    ) -> List[Any]:
+        estimated = sum(map(estimate_tokens, chunk)) if self.quota_limiter else 0
+        for attempt in range(self.chunk_max_retries + 1):
+            if self.quota_limiter is not None:
+                self.quota_limiter.acquire(estimated)
+            try:
+                start = time.perf_counter()
+                response = self.client.create(input=chunk, **client_kwargs)
+                break
+            except _RETRYABLE_ERRORS:
+                if attempt == self.chunk_max_retries:
+                    raise
+                time.sleep(_retry_delay(attempt))
+        self._record_latency(len(chunk), time.perf_counter() - start)
+        self._reconcile_rate_limit(estimated, response)
+        if isinstance(response, dict):
+            return [r["embedding"] for r in response["data"]]
+        # Read the parsed objects directly: model_dump would copy every float
+        # and warns about base64 strings.
+        return [r.embedding for r in response.data]
+
+    async def _aembed_chunk_upstream(
+        self,
+        chunk: List[str],
+        client_kwargs: Dict[str, Any],
+    ) -> List[Any]:
+        estimated = sum(map(estimate_tokens, chunk)) if self.quota_limiter else 0
+        for attempt in range(self.chunk_max_retries + 1):
+            if self.quota_limiter is not None:
+                await self.quota_limiter.aacquire(estimated)
+            try:
+                start = time.perf_counter()
+                response = await self.async_client.create(input=chunk, **client_kwargs)
+                break
+            except _RETRYABLE_ERRORS:
+                if attempt == self.chunk_max_retries:
+                    raise
+                await asyncio.sleep(_retry_delay(attempt))
+        self._record_latency(len(chunk), time.perf_counter() - start)
+        self._reconcile_rate_limit(estimated, response)
+        if isinstance(response, dict):
+            return [r["embedding"] for r in response["data"]]
+        # Read the parsed objects directly: model_dump would copy every float
+        # and warns about base64 strings.
+        return [r.embedding for r in response.data]
+
+    def _record_latency(self, size: int, duration: float) -> None:
+        if self.metrics is None:
+            return
+        labels = {"provider": self._api_name, "model": self.model}
+        self.metrics.observe("embedding_request_duration_seconds", duration, **labels)
+        self.metrics.observe("embedding_batch_size", size, **labels)
+
+    def _reconcile_rate_limit(self, estimated: int, response: Any) -> None:
+        if self.quota_limiter is None:
+            return
+        usage = response.get("usage") if isinstance(response, dict) else response.usage
+        if isinstance(usage, dict):
+            self.quota_limiter.reconcile(estimated, usage.get("total_tokens"))
+        elif usage is not None:
+            self.quota_limiter.reconcile(estimated, usage.total_tokens)
+
+
+def _output_tokens(result: ChatResult) -> Optional[int]:
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    return usage.get("completion_tokens")
+
+
+def _copy_vectors(vectors: List[Any]) -> List[Any]:
+    # base64 strings are immutable, float lists are copied per caller.
+    return [v if isinstance(v, str) else list(v) for v in vectors]
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError(
+            "Could not import numpy python package. "
+            "Please install it with `pip install numpy`.",
+        ) from e
+    return np
+
+
+def _rejects_base64(error: openai.BadRequestError) -> bool:
+    # Other 400s (bad input, wrong model) must not turn base64 off for good.
+    return "encoding_format" in str(error)
+
+
+def _decode_embedding(np: Any, item: Union[str, List[float]]) -> np.ndarray:
+    if isinstance(item, str):
+        # base64 of little-endian float32, decoded without per-float objects.
+        return np.frombuffer(base64.b64decode(item), dtype="<f4")
+    return np.asarray(item, dtype=np.float32)
+
+
+_RETRYABLE_ERRORS = (
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+def _make_balancer(
+    endpoints: List[str],
+    strategy: BalancingStrategy,
+    http_client: Any,
+) -> Optional[LoadBalancer]:
+    if len(endpoints) < 2:
+        return None
+    if http_client is not None:
+        raise ValueError(
+            "Several api_base endpoints can not be combined with a custom http_client",
+        )
+    return get_load_balancer(endpoints, strategy)
+
+
+def _balanced_client(balancer: Optional[LoadBalancer]) -> Any:
+    if balancer is None:
+        return None
+    return openai.DefaultHttpxClient(transport=BalancedTransport(balancer))
+
+
+def _balanced_async_client(balancer: Optional[LoadBalancer]) -> Any:
+    if balancer is None:
+        return None
+    return openai.DefaultAsyncHttpxClient(transport=AsyncBalancedTransport(balancer))
+
+
+def _retry_delay(attempt: int) -> float:
+    return min(0.5 * 2**attempt, 8.0) * (0.5 + random.random())  # noqa: S311
+
 
 class ChatModelExtraParams(TypedDict, total=False):
     temperature: float
@@ -505,7 +1783,18 @@ class ChatModelExtraParams(TypedDict, total=False):
     model_kwargs: dict[str, Any]
     disabled_params: dict[str, Any]
     api_key: SecretStr
-    api_base: str
+    api_base: Union[str, List[str]]
+    share_client: bool
+    response_cache: BaseResponseCache
+    single_flight: bool
+    load_balancing: BalancingStrategy
+    quota_limiter: QuotaLimiter
+    hedging: HedgePolicy
+    metrics: Optional[MetricsRegistry]
+    coalesce_interval_ms: float
+    coalesce_max_chars: int
+    reasoning_mode: Literal["keep", "drop", "sink"]
+    reasoning_sink: Union[Callable[[str], Any], IO[str]]
 
 
 @cache
@@ -515,8 +1804,11 @@ def _create_openai_like_chat_model(provider: str) -> Type[ChatCustomOpenAILikeMo
 
     API_NAME = providers[provider]["api_id"]
 
-    API_KEY_NAME = f"{API_NAME.upper()}_API_KEY"
-    API_BASE_NAME = f"{API_NAME.upper()}_API_BASE"
+    API_KEY_NAME = providers[provider].get("api_key_env", f"{API_NAME.upper()}_API_KEY")
+    API_BASE_NAME = providers[provider].get(
+        "api_base_env",
+        f"{API_NAME.upper()}_API_BASE",
+    )
 
     DEFAULT_API_BASE = providers[provider]["default_url"]
 
@@ -529,7 +1821,7 @@ def _create_openai_like_chat_model(provider: str) -> Type[ChatCustomOpenAILikeMo
             Field(default_factory=secret_from_env(API_KEY_NAME, default=None)),
         ),
         api_base=(
-            str,
+            Union[str, List[str]],
             Field(default_factory=from_env(API_BASE_NAME, default=DEFAULT_API_BASE)),
         ),
         _api_name=(str, PrivateAttr(default=API_NAME)),
@@ -544,10 +1836,15 @@ def _create_openai_like_embbeding(provider: str) -> Type[OpenAILikeEmbedding]:
 
     API_NAME = providers[provider]["api_id"]
 
-    API_KEY_NAME = f"{API_NAME.upper()}_API_KEY"
-    API_BASE_NAME = f"{API_NAME.upper()}_API_BASE"
+    API_KEY_NAME = providers[provider].get("api_key_env", f"{API_NAME.upper()}_API_KEY")
+    API_BASE_NAME = providers[provider].get(
+        "api_base_env",
+        f"{API_NAME.upper()}_API_BASE",
+    )
 
     DEFAULT_API_BASE = providers[provider]["default_url"]
+    MAX_BATCH_TOKENS = providers[provider].get("embedding_max_batch_tokens")
+    SUPPORTS_BASE64 = providers[provider].get("embedding_base64", True)
 
     chat_model_name = f"{API_NAME.title()}Embedding"
 
@@ -558,9 +1855,14 @@ def _create_openai_like_embbeding(provider: str) -> Type[OpenAILikeEmbedding]:
             Field(default_factory=secret_from_env(API_KEY_NAME, default=None)),
         ),
         openai_api_base=(
-            str,
-            Field(default_factory=from_env(API_BASE_NAME, default=DEFAULT_API_BASE)),
+            Union[str, List[str]],
+            Field(
+                default_factory=from_env(API_BASE_NAME, default=DEFAULT_API_BASE),
+                alias="base_url",
+            ),
         ),
+        max_batch_tokens=(Optional[int], MAX_BATCH_TOKENS),
+        supports_base64=(bool, SUPPORTS_BASE64),
         _api_name=(str, PrivateAttr(default=API_NAME)),
         __base__=OpenAILikeEmbedding,
     )
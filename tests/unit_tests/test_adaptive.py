@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+from typing import Any
+from unittest.mock import patch
+
+import httpx
+import openai
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_openai.chat_models.base import BaseChatOpenAI
+
+from langchain_openailike_llms_adapters import get_openai_like_llm_instance
+from langchain_openailike_llms_adapters.adaptive import AIMDController, run_adaptive
+
+_RESPONSE = httpx.Response(429, request=httpx.Request("POST", "http://x"))
+
+
+def test_controller_increases_and_cuts() -> None:
+    controller = AIMDController(initial=4)
+    for _ in range(40):
+        controller.on_success(0.1)
+    assert controller.limit >= 8
+    before = controller.limit
+    controller.on_overload()
+    assert controller.limit == before // 2
+    # A second overload within the same round is ignored.
+    controller.on_overload()
+    assert controller.limit == before // 2
+
+
+def test_controller_cuts_on_latency_growth() -> None:
+    controller = AIMDController(initial=16, decay=1.0)
+    controller.on_success(0.1)
+    controller.on_success(0.5)
+    assert controller.limit == 8
+
+
+def test_run_adaptive_converges_below_capacity() -> None:
+    capacity = 8
+    lock = threading.Lock()
+    active = 0
+
+    def fn(item: int) -> int:
+        nonlocal active
+        with lock:
+            active += 1
+            overloaded = active > capacity
+        try:
+            time.sleep(0.005)
+            if overloaded:
+                raise openai.RateLimitError("slow down", response=_RESPONSE, body=None)
+            return item * 2
+        finally:
+            with lock:
+                active -= 1
+
+    controller = AIMDController(initial=2, maximum=64)
+    results = dict(
+        run_adaptive(fn, range(300), controller, max_attempts=100),
+    )
+    assert results == {i: i * 2 for i in range(300)}
+    assert 2 <= controller.limit <= 2 * capacity
+
+
+def test_model_abatch_adaptive_streams_results() -> None:
+    def fake_generate(*args: Any, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="hi"))])
+
+    model = get_openai_like_llm_instance("qwen-plus")
+
+    async def collect() -> Any:
+        return [item async for item in model.abatch_adaptive(["a", "b", "c"])]
+
+    with patch.object(BaseChatOpenAI, "_agenerate", side_effect=fake_generate):
+        results = asyncio.run(collect())
+    assert sorted(index for index, _ in results) == [0, 1, 2]
+    assert {message.content for _, message in results} == {"hi"}
@@ -0,0 +1,84 @@
+import httpx
+
+from langchain_openailike_llms_adapters import (
+    get_openai_like_embedding,
+    get_openai_like_llm_instance,
+)
+from langchain_openailike_llms_adapters.balancer import (
+    BalancedTransport,
+    LoadBalancer,
+)
+
+ENDPOINTS = ["http://gpu-1:8000/v1", "http://gpu-2:8000/v1"]
+
+
+def _client(balancer: LoadBalancer, handler) -> httpx.Client:  # type: ignore[no-untyped-def]
+    transport = BalancedTransport(balancer, transport=httpx.MockTransport(handler))
+    return httpx.Client(transport=transport)
+
+
+def test_requests_are_rewritten_and_spread() -> None:
+    hosts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        hosts.append((request.url.host, request.url.path, request.headers["Host"]))
+        return httpx.Response(200, json={})
+
+    balancer = LoadBalancer(ENDPOINTS)
+    with _client(balancer, handler) as client:
+        for _ in range(20):
+            client.post("http://gpu-1:8000/v1/chat/completions")
+    assert {path for _, path, _ in hosts} == {"/v1/chat/completions"}
+    assert {host for host, _, _ in hosts} == {"gpu-1", "gpu-2"}
+    assert all(header.startswith(host) for host, _, header in hosts)
+
+
+def test_failing_endpoint_is_ejected_and_readmitted() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "gpu-2":
+            raise httpx.ConnectError("refused")
+        return httpx.Response(200, json={})
+
+    balancer = LoadBalancer(ENDPOINTS, max_failures=2, cooldown=60)
+    with _client(balancer, handler) as client:
+        failures = 0
+        for _ in range(30):
+            try:
+                client.get("http://gpu-1:8000/v1/models")
+            except httpx.ConnectError:  # noqa: PERF203
+                failures += 1
+    assert failures == 2
+    assert [e["healthy"] for e in balancer.stats()] == [True, False]
+
+    balancer.endpoints[1].ejected_until = 0.0
+    balancer.release(balancer.acquire(), ok=True)
+    assert all(e["healthy"] for e in balancer.stats())
+
+
+def test_stream_counts_as_outstanding_until_closed() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=b"data: {}\n\n")
+
+    balancer = LoadBalancer(ENDPOINTS[:1])
+    with _client(balancer, handler) as client:
+        with client.stream("POST", "http://gpu-1:8000/v1/chat/completions") as r:
+            assert balancer.stats()[0]["outstanding"] == 1
+            r.read()
+        assert balancer.stats()[0]["outstanding"] == 0
+
+
+def test_models_accept_endpoint_lists(monkeypatch) -> None:  # type: ignore[no-untyped-def]
+    llm = get_openai_like_llm_instance(
+        "qwen3-32b",
+        provider="vllm",
+        model_kwargs={"api_base": ENDPOINTS, "load_balancing": "ewma"},
+    )
+    assert llm._balancer is not None
+    assert llm._balancer.strategy == "ewma"
+    assert str(llm.root_client.base_url).rstrip("/") == ENDPOINTS[0]
+    assert isinstance(llm.root_client._client._transport, BalancedTransport)
+
+    monkeypatch.setenv("OLLAMA_API_BASE", ",".join(ENDPOINTS))
+    emb = get_openai_like_embedding("bge-m3", provider="ollama")
+    assert emb._balancer is not None
+    assert emb._balancer is get_openai_like_embedding("bge-m3", "ollama")._balancer
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, cast
+
+import httpx
+import openai
+import pytest
+from langchain_core.outputs import ChatResult
+
+from langchain_openailike_llms_adapters import get_openai_like_llm_instance
+from langchain_openailike_llms_adapters.batch import BatchRequestError
+from langchain_openailike_llms_adapters.utils import ChatModelExtraParams
+
+
+class _BatchServer:
+    """Stand-in for a provider's `/files` and `/batches` endpoints."""
+
+    def __init__(self) -> None:
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.fail_batch_after: Optional[int] = None
+        self.lose_batch_after: Optional[int] = None
+
+    def _complete(self, batch: Dict[str, Any]) -> None:
+        output, errors = [], []
+        for line in self.files[batch["input_file_id"]].splitlines():
+            request = json.loads(line)
+            prompt = request["body"]["messages"][-1]["content"]
+            if prompt == "fail":
+                errors.append(
+                    {"custom_id": request["custom_id"], "error": {"message": "bad"}},
+                )
+                continue
+            body = {
+                "id": "chatcmpl",
+                "object": "chat.completion",
+                "created": 0,
+                "model": request["body"]["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": prompt.upper()},
+                        "finish_reason": "stop",
+                    },
+                ],
+            }
+            output.append(
+                {
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "body": body},
+                },
+            )
+        batch["status"] = "completed"
+        for key, items in (("output_file_id", output), ("error_file_id", errors)):
+            if items:
+                file_id = f"file-{len(self.files)}"
+                self.files[file_id] = "\n".join(map(json.dumps, items)).encode()
+                batch[key] = file_id
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.endswith("/files") and request.method == "POST":
+            data = b"\n".join(re.findall(rb'\{"custom_id".*', request.content))
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = data
+            return httpx.Response(
+                200,
+                json={
+                    "id": file_id,
+                    "object": "file",
+                    "bytes": len(data),
+                    "created_at": 0,
+                    "filename": "batch.jsonl",
+                    "purpose": "batch",
+                    "status": "uploaded",
+                },
+            )
+        if path.endswith("/content"):
+            return httpx.Response(200, content=self.files[path.split("/")[-2]])
+        if path.endswith("/batches") and request.method == "GET":
+            batches = sorted(
+                self.batches.values(),
+                key=lambda batch: batch["created_at"],
+                reverse=True,
+            )
+            return httpx.Response(
+                200,
+                json={"object": "list", "data": batches, "has_more": False},
+            )
+        if path.endswith("/batches"):
+            if self.fail_batch_after == len(self.batches):
+                self.fail_batch_after = None
+                return httpx.Response(500, json={"error": {"message": "crash"}})
+            body = json.loads(request.content)
+            batch_id = f"batch-{len(self.batches)}"
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": body["endpoint"],
+                "input_file_id": body["input_file_id"],
+                "completion_window": body["completion_window"],
+                "created_at": int(time.time()),
+                "status": "validating",
+                "metadata": body.get("metadata"),
+            }
+            if self.lose_batch_after == len(self.batches) - 1:
+                # Created, but the client never learns about it.
+                self.lose_batch_after = None
+                return httpx.Response(500, json={"error": {"message": "crash"}})
+            return httpx.Response(200, json=self.batches[batch_id])
+        batch = self.batches[path.split("/")[-1]]
+        if batch["status"] == "validating":
+            batch["status"] = "in_progress"
+        elif batch["status"] == "in_progress":
+            self._complete(batch)
+        return httpx.Response(200, json=batch)
+
+
+def _model(server: _BatchServer, **kwargs: Any) -> Any:
+    # `http_client` is passed through to `ChatOpenAI`, outside the typed params.
+    params = {
+        "max_retries": 0,
+        "http_client": httpx.Client(transport=httpx.MockTransport(server.handle)),
+        **kwargs,
+    }
+    return get_openai_like_llm_instance(
+        "qwen-plus",
+        model_kwargs=cast(ChatModelExtraParams, params),
+    )
+
+
+def test_batch_results_in_input_order() -> None:
+    server = _BatchServer()
+    results = _model(server).batch_offline(
+        ["a", "b", "fail", "c", "d"],
+        shard_size=2,
+        poll_interval=0,
+        return_exceptions=True,
+    )
+    assert len(server.batches) == 3
+    assert [r.generations[0].text for r in results if not isinstance(r, Exception)] == [
+        "A",
+        "B",
+        "C",
+        "D",
+    ]
+    assert isinstance(results[2], BatchRequestError)
+    assert results[2].index == 2
+
+
+def test_batch_resumes_after_crash(tmp_path: Path) -> None:
+    server = _BatchServer()
+    state_path = tmp_path / "job.json"
+    # Creating the second shard's batch fails, as if the process died there.
+    server.fail_batch_after = 1
+    with pytest.raises(openai.InternalServerError):
+        _model(server).batch_offline(
+            ["a", "b", "c"],
+            shard_size=2,
+            state_path=state_path,
+        )
+    assert (len(server.files), len(server.batches)) == (2, 1)
+
+    results = _model(server).batch_offline(
+        ["a", "b", "c"],
+        shard_size=2,
+        state_path=state_path,
+        poll_interval=0,
+    )
+    assert [r.generations[0].text for r in results] == ["A", "B", "C"]
+    # Neither the files nor the first batch were submitted again.
+    assert len(server.batches) == 2
+    assert len(server.files) == 2 + 2
+
+
+def test_batch_resume_finds_batch_created_before_crash(tmp_path: Path) -> None:
+    server = _BatchServer()
+    state_path = tmp_path / "job.json"
+    server.lose_batch_after = 1
+    with pytest.raises(openai.InternalServerError):
+        _model(server).batch_offline(
+            ["a", "b", "c"],
+            shard_size=2,
+            state_path=state_path,
+        )
+    assert len(server.batches) == 2
+    shard = json.loads(state_path.read_text())["shards"][1]
+    assert "batch_id" not in shard
+    assert "submitting" in shard
+
+    results = _model(server).batch_offline(
+        ["a", "b", "c"],
+        shard_size=2,
+        state_path=state_path,
+        poll_interval=0,
+    )
+    assert [r.generations[0].text for r in results] == ["A", "B", "C"]
+    # The batch the provider accepted was picked up, not paid for again.
+    assert len(server.batches) == 2
+
+
+def test_abatch_offline() -> None:
+    server = _BatchServer()
+    params = {
+        "http_async_client": httpx.AsyncClient(
+            transport=httpx.MockTransport(server.handle),
+        ),
+    }
+    model = get_openai_like_llm_instance(
+        "qwen-plus",
+        model_kwargs=cast(ChatModelExtraParams, params),
+    )
+    results = asyncio.run(model.abatch_offline(["x", "y"], poll_interval=0))
+    texts = []
+    for result in results:
+        assert isinstance(result, ChatResult)
+        texts.append(result.generations[0].text)
+    assert texts == ["X", "Y"]
@@ -0,0 +1,69 @@
+from pathlib import Path
+from typing import Any, Iterator, List
+from unittest.mock import patch
+
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai.chat_models.base import BaseChatOpenAI
+
+from langchain_openailike_llms_adapters import (
+    InMemoryResponseCache,
+    SQLiteResponseCache,
+    get_openai_like_llm_instance,
+)
+
+
+def _fake_generate(*args: Any, **kwargs: Any) -> ChatResult:
+    return ChatResult(generations=[ChatGeneration(message=AIMessage(content="hi"))])
+
+
+def _fake_stream(*args: Any, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+    for token in ["h", "i"]:
+        yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+def test_in_memory_cache_hits() -> None:
+    cache = InMemoryResponseCache(max_size=2)
+    model = get_openai_like_llm_instance(
+        "qwen-plus",
+        model_kwargs={"response_cache": cache},
+    )
+    with patch.object(BaseChatOpenAI, "_generate", side_effect=_fake_generate) as m:
+        assert model.invoke("hello").content == "hi"
+        assert model.invoke("hello").content == "hi"
+        assert model.invoke("other").content == "hi"
+    assert m.call_count == 2
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 1 / 3}
+
+
+def test_cache_key_includes_thinking_params() -> None:
+    model = get_openai_like_llm_instance(
+        "qwen-plus",
+        model_kwargs={"response_cache": InMemoryResponseCache()},
+    )
+    messages: List[BaseMessage] = [HumanMessage("hello")]
+    key = model._get_request_key(messages)
+    model.thinking_budget = 100
+    assert model._get_request_key(messages) != key
+
+
+def test_stream_replays_cached_result(tmp_path: Path) -> None:
+    cache = SQLiteResponseCache(tmp_path / "cache.db")
+    model = get_openai_like_llm_instance(
+        "qwen-plus",
+        model_kwargs={"response_cache": cache},
+    )
+    with patch.object(BaseChatOpenAI, "_stream", side_effect=_fake_stream) as m:
+        first = "".join(chunk.text() for chunk in model.stream("hello"))
+        second = "".join(chunk.text() for chunk in model.stream("hello"))
+    assert first == second == "hi"
+    assert m.call_count == 1
+    assert cache.hits == 1
+    with patch.object(BaseChatOpenAI, "_generate", side_effect=_fake_generate) as m:
+        assert model.invoke("hello").content == "hi"
+    assert m.call_count == 0
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Optional
+from unittest.mock import patch
+
+import httpx
+from pydantic import SecretStr
+
+from langchain_openailike_llms_adapters import get_openai_like_llm_instance
+from langchain_openailike_llms_adapters.capabilities import (
+    CapabilityRegistry,
+    capability_registry,
+)
+from langchain_openailike_llms_adapters.utils import ChatModelExtraParams
+
+
+def test_exact_entries_override_patterns() -> None:
+    registry = CapabilityRegistry()
+    registry.update(
+        {
+            "vllm": {
+                "*": {"tool_choice": True, "context_length": 8192},
+                "llama-*": {"parallel_tool_calls": False},
+                "llama-3-70b": {"context_length": 131072},
+            },
+        },
+    )
+    capabilities = registry.lookup("vllm", "Llama-3-70B")
+    assert capabilities.tool_choice is True
+    assert capabilities.parallel_tool_calls is False
+    assert capabilities.context_length == 131072
+    assert registry.lookup("vllm", "mistral").context_length == 8192
+    assert registry.lookup("ollama", "llama-3-70b").tool_choice is None
+
+    registry.register("vllm", "llama-*", tool_choice=False)
+    assert registry.lookup("vllm", "llama-3-70b").tool_choice is False
+
+
+def test_bundled_rules_force_streaming_for_dashscope_thinking() -> None:
+    def streaming(model: str, *, enable_thinking: Optional[bool] = None) -> bool:
+        params: ChatModelExtraParams = {"api_key": SecretStr("sk")}
+        if enable_thinking is not None:
+            params["enable_thinking"] = enable_thinking
+        return get_openai_like_llm_instance(
+            model,
+            provider="dashscope",
+            model_kwargs=params,
+        ).streaming
+
+    assert streaming("qwen3-32b")
+    assert not streaming("qwen3-32b", enable_thinking=False)
+    assert streaming("qwq-plus", enable_thinking=False)
+    assert streaming("qwen-plus", enable_thinking=True)
+    assert not streaming("qwen-plus")
+    assert capability_registry.lookup("dashscope", "qwen-max").tool_choice
+    assert not get_openai_like_llm_instance(
+        "qwen3-32b",
+        provider="vllm",
+    ).streaming
+
+
+def test_model_rules_apply_behind_other_providers() -> None:
+    model = get_openai_like_llm_instance(
+        "qwen3-32b",
+        provider="custom",
+        model_kwargs={
+            "api_base": "http://localhost:8000/v1",
+            "api_key": SecretStr("sk"),
+        },
+    )
+    assert model.model_capabilities.tool_choice
+    # DashScope's provider-wide defaults do not carry over.
+    assert not model.streaming
+    assert capability_registry.lookup("vllm", "qwen3-32b").tool_choice
+    assert capability_registry.lookup("vllm", "mistral").tool_choice is None
+
+    registry = CapabilityRegistry()
+    registry.update(
+        {
+            "dashscope": {"qwen3-32b": {"tool_choice": True}},
+            "vllm": {"qwen3-32b": {"context_length": 8192}},
+        },
+    )
+    assert registry.lookup("vllm", "qwen3-32b").tool_choice is None
+
+
+def test_load_models_endpoint_caches_response(tmp_path: Path) -> None:
+    payload = {
+        "data": [
+            {"id": "served-model", "max_model_len": 32768},
+            {
+                "id": "router/model",
+                "context_length": 65536,
+                "supported_parameters": ["tools", "tool_choice", "structured_outputs"],
+            },
+        ],
+    }
+    registry = CapabilityRegistry()
+    cache_path = tmp_path / "models.json"
+    response = httpx.Response(
+        200,
+        json=payload,
+        request=httpx.Request("GET", "http://x/v1/models"),
+    )
+    with patch.object(httpx, "get", return_value=response) as get:
+        assert (
+            registry.load_models_endpoint(
+                "vllm",
+                "http://x/v1",
+                cache_path=cache_path,
+            )
+            == 2
+        )
+        registry.load_models_endpoint("vllm", "http://x/v1", cache_path=cache_path)
+    assert get.call_count == 1
+    assert json.loads(cache_path.read_text())[0]["id"] == "served-model"
+    assert registry.lookup("vllm", "served-model").context_length == 32768
+    routed = registry.lookup("vllm", "router/model")
+    assert routed.json_schema and routed.tool_choice
+    assert routed.parallel_tool_calls is False
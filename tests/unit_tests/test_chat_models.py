@@ -1,14 +1,36 @@
 """Test chat model integration."""
 
+from __future__ import annotations
+
+from typing import List
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessageChunk
 from langchain_core.runnables import RunnableBinding
 from langchain_core.tools import tool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langchain_tests.unit_tests.chat_models import generate_schema_pydantic
 from pydantic import BaseModel
 
-
 from langchain_openailike_llms_adapters.adapters import get_openai_like_llm_instance
 
 
+def _chunk(delta: dict, finish_reason: str | None = None) -> dict:
+    return {
+        "id": "chatcmpl-1",
+        "model": "qwen3-32b",
+        "choices": [
+            {
+                "index": 0,
+                "delta": delta,
+                "finish_reason": finish_reason,
+                "logprobs": None,
+            },
+        ],
+        "usage": None,
+    }
+
+
 TEST_PYDANTIC_MODELS = [generate_schema_pydantic()]
 model = get_openai_like_llm_instance("qwen3-32b")
 
@@ -20,11 +42,11 @@ def test_init() -> None:
 def test_bind_tool_pydantic() -> None:
     @tool
     def my_adder(a: int, b: int) -> int:
-        """Add a and b to result"""
+        """Add a and b to result."""
         return a + b
 
     def my_adder_tool(a: int, b: int) -> int:
-        """Add a and b to result"""
+        """Add a and b to result."""
         return a + b
 
     tools = [my_adder_tool, my_adder]
@@ -55,3 +77,125 @@ def test_with_structured_output() -> None:
         strict_values = [None, False, True] if method != "json_mode" else [None]
         for strict in strict_values:
             assert model.with_structured_output(Schema, method=method, strict=strict)  # type:ignore
+
+
+def test_with_structured_output_converts_schema_once() -> None:
+    class Cached(BaseModel):
+        """A schema converted once."""
+
+        foo: str
+
+    with patch(
+        "langchain_openailike_llms_adapters.tools.convert_to_openai_tool",
+        wraps=convert_to_openai_tool,
+    ) as convert:
+        structured = model.with_structured_output(Cached)
+        model.with_structured_output(Cached, include_raw=True)
+        bound = model.bind_tools([Cached])
+    assert convert.call_count == 1
+    tool_dict = structured.first.kwargs["tools"][0]  # type: ignore[attr-defined]
+    assert tool_dict == convert_to_openai_tool(Cached)
+    # Every bind gets its own copy, so changing one leaves the cache intact.
+    bound_dict = bound.kwargs["tools"][0]  # type: ignore[attr-defined]
+    assert bound_dict == tool_dict
+    bound_dict["function"]["parameters"]["properties"].clear()
+    assert model.bind_tools([Cached]).kwargs["tools"][0] == tool_dict  # type: ignore[attr-defined]
+
+
+def test_text_delta_fast_path_matches_full_conversion() -> None:
+    for delta in (
+        {"role": "assistant", "content": ""},
+        {"content": "Hello", "role": None, "tool_calls": None},
+        {"content": None, "reasoning_content": "Let me think"},
+        {"content": "", "reasoning": "OpenRouter reasoning"},
+    ):
+        chunk = _chunk(delta)
+        fast = model._convert_chunk_to_generation_chunk(chunk, AIMessageChunk, {})
+        full = model._convert_any_chunk(chunk, AIMessageChunk, {})
+        assert fast == full
+        assert fast is not None and full is not None
+        assert isinstance(fast.message, AIMessageChunk)
+        assert fast.message.tool_call_chunks == []
+        assert fast.message.additional_kwargs is not full.message.additional_kwargs
+
+
+def test_other_chunks_take_full_conversion() -> None:
+    tool_delta = {
+        "tool_calls": [
+            {"index": 0, "id": "call_1", "function": {"name": "f", "arguments": "{"}},
+        ],
+    }
+    tool_chunk = model._convert_chunk_to_generation_chunk(
+        _chunk(tool_delta),
+        AIMessageChunk,
+        {},
+    )
+    assert tool_chunk is not None
+    assert isinstance(tool_chunk.message, AIMessageChunk)
+    assert tool_chunk.message.tool_call_chunks[0]["name"] == "f"
+
+    last = model._convert_chunk_to_generation_chunk(
+        _chunk({"content": ""}, finish_reason="stop"),
+        AIMessageChunk,
+        {},
+    )
+    assert last is not None and last.generation_info == {
+        "finish_reason": "stop",
+        "model_name": "qwen3-32b",
+    }
+
+
+def test_reasoning_mode_sink() -> None:
+    received: List[str] = []
+    sinking = get_openai_like_llm_instance(
+        "qwen3-32b",
+        model_kwargs={"reasoning_mode": "sink", "reasoning_sink": received.append},
+    )
+    convert = sinking._convert_chunk_to_generation_chunk
+    assert convert(_chunk({"reasoning_content": "Hmm"}), AIMessageChunk, {}) is None
+    answer = convert(
+        _chunk({"content": "Hi", "reasoning_content": "!"}),
+        AIMessageChunk,
+        {},
+    )
+    assert answer is not None and answer.message.additional_kwargs == {}
+    final = convert(
+        _chunk({"reasoning": "done"}, finish_reason="stop"),
+        AIMessageChunk,
+        {},
+    )
+    assert final is not None
+    assert "reasoning_content" not in final.message.additional_kwargs
+    assert received == ["Hmm", "!", "done"]
+
+    result = sinking._create_chat_result(
+        {
+            "model": "qwen3-32b",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {
+                        "role": "assistant",
+                        "content": "Hi",
+                        "reasoning_content": "all of it",
+                    },
+                    "finish_reason": "stop",
+                },
+            ],
+        },
+    )
+    assert result.generations[0].message.additional_kwargs == {}
+    assert received[-1] == "all of it"
+
+    dropping = get_openai_like_llm_instance(
+        "qwen3-32b",
+        model_kwargs={"reasoning_mode": "drop"},
+    )
+    assert (
+        dropping._convert_chunk_to_generation_chunk(
+            _chunk({"reasoning_content": "Hmm"}),
+            AIMessageChunk,
+            {},
+        )
+        is None
+    )
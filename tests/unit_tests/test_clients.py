@@ -0,0 +1,57 @@
+from pydantic import SecretStr
+
+from langchain_openailike_llms_adapters import get_openai_like_llm_instance
+from langchain_openailike_llms_adapters.clients import ClientRegistry, client_registry
+
+
+def test_instances_share_client() -> None:
+    first = get_openai_like_llm_instance(
+        "qwen3-32b",
+        model_kwargs={"api_key": SecretStr("sk-a")},
+    )
+    second = get_openai_like_llm_instance(
+        "qwen-plus",
+        model_kwargs={"api_key": SecretStr("sk-a")},
+    )
+    other = get_openai_like_llm_instance(
+        "qwen-plus",
+        model_kwargs={"api_key": SecretStr("sk-b")},
+    )
+    assert first.root_client is second.root_client
+    assert first.root_client is not other.root_client
+
+
+def test_share_client_disabled() -> None:
+    first = get_openai_like_llm_instance(
+        "qwen3-32b",
+        model_kwargs={"api_key": SecretStr("sk-a"), "share_client": False},
+    )
+    second = get_openai_like_llm_instance(
+        "qwen3-32b",
+        model_kwargs={"api_key": SecretStr("sk-a")},
+    )
+    assert first.root_client is not second.root_client
+
+
+def test_evict_idle_and_close_all() -> None:
+    registry = ClientRegistry()
+    params = {"api_key": "sk-a", "base_url": "http://localhost:8080/v1"}
+    client = registry.get_sync_client("vllm", params)
+    assert registry.get_sync_client("vllm", params) is client
+    registry.configure(idle_timeout=0)
+    assert registry.evict_idle() == 1
+    assert registry.stats()["sync_clients"] == 0
+    assert client.is_closed()
+
+    registry.get_sync_client("vllm", params)
+    registry.close_all()
+    assert registry.stats() == {
+        "sync_clients": 0,
+        "async_clients": 0,
+        "references": 0,
+    }
+
+
+def test_api_key_not_in_key() -> None:
+    key = client_registry.make_key("vllm", {"api_key": "sk-secret"})
+    assert "sk-secret" not in repr(key)
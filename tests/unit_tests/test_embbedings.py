@@ -1,4 +1,243 @@
+import asyncio
+import base64
+import threading
+from array import array
+from typing import Any, Dict, List
+
+import httpx
+import openai
+import pytest
+
 from langchain_openailike_llms_adapters import get_openai_like_embedding
-def test_init()->None:
+
+
+def test_init() -> None:
     emb = get_openai_like_embedding("text-embedding-v4", "dashscope")
-    assert emb is not None
\ No newline at end of file
+    assert emb is not None
+
+
+class _EmbeddingsResponder:
+    """Answers with the text length and fails the first call for "flaky"."""
+
+    def __init__(self) -> None:
+        self.calls: List[List[str]] = []
+        self.failed = False
+        self.lock = threading.Lock()
+
+    def _response(self, input: List[str]) -> Dict[str, Any]:  # noqa: A002
+        with self.lock:
+            self.calls.append(input)
+            if "flaky" in input and not self.failed:
+                self.failed = True
+                raise openai.APIConnectionError(
+                    request=httpx.Request("POST", "http://test"),
+                )
+        return {"data": [{"embedding": [float(len(text))]} for text in input]}
+
+
+class _FakeEmbeddings(_EmbeddingsResponder):
+    def create(self, input: List[str], **kwargs: Any) -> Dict[str, Any]:  # noqa: A002
+        return self._response(input)
+
+
+class _FakeAsyncEmbeddings(_EmbeddingsResponder):
+    async def create(self, input: List[str], **kwargs: Any) -> Dict[str, Any]:  # noqa: A002
+        await asyncio.sleep(0.01 * (3 - len(self.calls) % 3))
+        return self._response(input)
+
+
+TEXTS = ["a", "bb", "flaky", "dddd", "eeeee", "ffffff", "g"]
+EXPECTED = [[float(len(text))] for text in TEXTS]
+
+
+def test_embed_documents_concurrently() -> None:
+    client = _FakeEmbeddings()
+    emb = get_openai_like_embedding(
+        "text-embedding-v4",
+        "dashscope",
+        chunk_size=2,
+        model_kwargs={"client": client, "max_concurrency": 3},
+    )
+    assert emb.embed_documents(TEXTS) == EXPECTED
+    # Four chunks plus one retry of the failed chunk.
+    assert len(client.calls) == 5
+
+
+async def test_aembed_documents_concurrently() -> None:
+    client = _FakeAsyncEmbeddings()
+    emb = get_openai_like_embedding(
+        "text-embedding-v4",
+        "dashscope",
+        chunk_size=2,
+        model_kwargs={"async_client": client, "max_concurrency": 3},
+    )
+    assert await emb.aembed_documents(TEXTS) == EXPECTED
+    assert len(client.calls) == 5
+
+
+def test_pack_batches_by_count_and_tokens() -> None:
+    from langchain_openailike_llms_adapters.batching import pack_batches
+
+    texts = ["a" * 40, "b" * 40, "c" * 40, "d"]
+    assert pack_batches(texts, 3) == [texts[:3], texts[3:]]
+    assert pack_batches(texts, 3, max_tokens=25) == [texts[:2], texts[2:]]
+    assert pack_batches(["x" * 400], 3, max_tokens=25) == [["x" * 400]]
+
+
+def test_provider_batch_defaults() -> None:
+    emb = get_openai_like_embedding("text-embedding-v4", "dashscope")
+    assert emb.chunk_size == 10
+    assert get_openai_like_embedding("m", "vllm").chunk_size == 256
+    assert get_openai_like_embedding("m", "vllm", chunk_size=4).chunk_size == 4
+
+
+class _LimitedEmbeddings(_FakeEmbeddings):
+    """Rejects requests with more than two inputs."""
+
+    def create(self, input: List[str], **kwargs: Any) -> Dict[str, Any]:  # noqa: A002
+        if len(input) > 2:
+            self.calls.append(input)
+            raise openai.BadRequestError(
+                "batch size is invalid, it should not be larger than 2",
+                response=httpx.Response(
+                    400,
+                    request=httpx.Request("POST", "http://test"),
+                ),
+                body=None,
+            )
+        return super().create(input, **kwargs)
+
+
+def test_split_batch_rejected_as_too_large() -> None:
+    client = _LimitedEmbeddings()
+    emb = get_openai_like_embedding(
+        "m",
+        "vllm",
+        chunk_size=5,
+        model_kwargs={"client": client},
+    )
+    texts = ["a", "bb", "ccc", "dddd", "eeeee", "ffffff", "g"]
+    assert emb.embed_documents(texts) == [[float(len(text))] for text in texts]
+    assert emb._learned_max_items == 2
+    client.calls.clear()
+    emb.embed_documents(texts)
+    assert [len(call) for call in client.calls] == [2, 2, 2, 1]
+
+
+class _OversizedInputEmbeddings(_FakeEmbeddings):
+    """Rejects any request containing a text longer than ten characters."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__()
+        self.status = status
+        self.message = message
+
+    def create(self, input: List[str], **kwargs: Any) -> Dict[str, Any]:  # noqa: A002
+        if any(len(text) > 10 for text in input):
+            self.calls.append(input)
+            raise openai.APIStatusError(
+                self.message,
+                response=httpx.Response(
+                    self.status,
+                    request=httpx.Request("POST", "http://test"),
+                ),
+                body=None,
+            )
+        return super().create(input, **kwargs)
+
+
+def test_oversized_input_learns_no_batch_limit() -> None:
+    texts = ["a"] * 7 + ["x" * 20]
+    for status, message, calls in (
+        (
+            400,
+            (
+                "This model's maximum context length is 8 tokens. However, you "
+                "requested 12 tokens. Please reduce the length of the input."
+            ),
+            1,
+        ),
+        # Mentions the batch, but says nothing about its size.
+        (400, "Invalid input in batch: text must not be blank", 1),
+        # Split down to the bad input, which fails on its own.
+        (413, "Request entity too large", 7),
+    ):
+        client = _OversizedInputEmbeddings(status, message)
+        emb = get_openai_like_embedding(
+            "m",
+            "vllm",
+            chunk_size=8,
+            model_kwargs={"client": client},
+        )
+        with pytest.raises(openai.APIStatusError):
+            emb.embed_documents(texts)
+        assert len(client.calls) == calls
+        assert emb._learned_max_items is None
+        assert emb._learned_max_tokens is None
+
+
+class _Base64Embeddings:
+    def __init__(self) -> None:
+        self.formats: List[Any] = []
+
+    def create(self, input: List[str], **kwargs: Any) -> Dict[str, Any]:  # noqa: A002
+        fmt = kwargs.get("encoding_format")
+        self.formats.append(fmt)
+        vectors = [[float(len(text)), 0.5] for text in input]
+        if fmt == "base64":
+            return {
+                "data": [
+                    {"embedding": base64.b64encode(array("f", v).tobytes()).decode()}
+                    for v in vectors
+                ],
+            }
+        return {"data": [{"embedding": v} for v in vectors]}
+
+
+def test_embed_documents_array() -> None:
+    np = pytest.importorskip("numpy")
+    client = _Base64Embeddings()
+    emb = get_openai_like_embedding("m", "vllm", model_kwargs={"client": client})
+    result = emb.embed_documents_array(["a", "bb"])
+    assert result.dtype == np.float32
+    assert result.tolist() == [[1.0, 0.5], [2.0, 0.5]]
+    assert client.formats == ["base64"]
+
+    emb = get_openai_like_embedding("m", "zhipu-ai", model_kwargs={"client": client})
+    assert emb.embed_documents_array(["a"]).tolist() == [[1.0, 0.5]]
+    assert client.formats[-1] is None
+
+
+class _NoBase64Embeddings(_Base64Embeddings):
+    def __init__(self, message: str) -> None:
+        super().__init__()
+        self.message = message
+
+    def create(self, input: List[str], **kwargs: Any) -> Dict[str, Any]:  # noqa: A002
+        if kwargs.get("encoding_format") == "base64":
+            self.formats.append("base64")
+            raise openai.BadRequestError(
+                self.message,
+                response=httpx.Response(
+                    400,
+                    request=httpx.Request("POST", "http://test"),
+                ),
+                body=None,
+            )
+        return super().create(input, **kwargs)
+
+
+def test_embed_documents_array_base64_fallback() -> None:
+    pytest.importorskip("numpy")
+    client = _NoBase64Embeddings("Unsupported value for encoding_format: base64")
+    emb = get_openai_like_embedding("m", "vllm", model_kwargs={"client": client})
+    assert emb.embed_documents_array(["a"]).tolist() == [[1.0, 0.5]]
+    assert emb.embed_documents_array(["bb"]).tolist() == [[2.0, 0.5]]
+    assert client.formats == ["base64", None, None]
+
+    # Other bad requests are raised, and base64 stays on for later calls.
+    client = _NoBase64Embeddings("Input is too long")
+    emb = get_openai_like_embedding("m", "vllm", model_kwargs={"client": client})
+    with pytest.raises(openai.BadRequestError):
+        emb.embed_documents_array(["a"])
+    assert emb.supports_base64
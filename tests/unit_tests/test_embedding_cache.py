@@ -0,0 +1,58 @@
+from pathlib import Path
+from typing import Any, List
+from unittest.mock import patch
+
+from langchain_openailike_llms_adapters import (
+    MmapEmbeddingCache,
+    get_openai_like_embedding,
+)
+from langchain_openailike_llms_adapters.utils import OpenAILikeEmbedding
+
+
+def _fake_embed(
+    self: Any,
+    texts: List[str],
+    *args: Any,
+    **kwargs: Any,
+) -> List[List[float]]:
+    return [[float(len(text)), 0.5] for text in texts]
+
+
+def test_cache_round_trip(tmp_path: Path) -> None:
+    cache = MmapEmbeddingCache(tmp_path)
+    keys = [cache.make_key("vllm", "m", None, text) for text in ["a", "bb"]]
+    cache.put_many(keys, [[1.0, 2.0], [3.0, 4.0]])
+    cache.put_many(keys[:1], [[9.0, 9.0]])
+    views = cache.get_many([keys[1], b"missing", keys[0]])
+    assert views[0] is not None and views[0].tolist() == [3.0, 4.0]
+    assert views[1] is None
+    assert views[2] is not None and views[2].tolist() == [1.0, 2.0]
+    assert len(cache) == 2
+    assert cache.stats()["misses"] == 1
+
+    cache.clear()
+    assert cache.get_many(keys) == [None, None]
+    assert views[0].tolist() == [3.0, 4.0]
+
+
+def test_embed_documents_only_sends_misses(tmp_path: Path) -> None:
+    emb = get_openai_like_embedding(
+        "text-embedding-v4",
+        "dashscope",
+        model_kwargs={"embedding_cache": MmapEmbeddingCache(tmp_path)},
+    )
+    with patch.object(
+        OpenAILikeEmbedding,
+        "_embed_texts",
+        autospec=True,
+        side_effect=_fake_embed,
+    ) as m:
+        assert emb.embed_documents(["a", "bb", "a"]) == [
+            [1.0, 0.5],
+            [2.0, 0.5],
+            [1.0, 0.5],
+        ]
+        assert emb.embed_documents(["bb", "ccc"]) == [[2.0, 0.5], [3.0, 0.5]]
+    assert [call.args[1] for call in m.call_args_list] == [["a", "bb"], ["ccc"]]
+    assert emb.embedding_cache is not None
+    assert emb.embedding_cache.hits == 1
@@ -0,0 +1,94 @@
+from typing import Any, Iterator
+from unittest.mock import patch
+
+import httpx
+import openai
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import SecretStr
+
+from langchain_openailike_llms_adapters import (
+    CircuitBreaker,
+    NoAvailableProviderError,
+    get_openai_like_failover_llm,
+)
+from langchain_openailike_llms_adapters.failover import ChatFailoverModel
+from langchain_openailike_llms_adapters.utils import ChatCustomOpenAILikeModel
+
+_DOWN = openai.APIConnectionError(request=httpx.Request("POST", "http://down"))
+
+
+def _fake_generate(self: Any, *args: Any, **kwargs: Any) -> ChatResult:
+    if self._api_name == "deepseek":
+        raise _DOWN
+    return ChatResult(
+        generations=[ChatGeneration(message=AIMessage(content=self._api_name))],
+    )
+
+
+def _fake_stream(self: Any, *args: Any, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+    if self._api_name == "deepseek":
+        raise _DOWN
+    yield ChatGenerationChunk(message=AIMessageChunk(content=self._api_name))
+
+
+def _failover_model() -> ChatFailoverModel:
+    model = get_openai_like_failover_llm(
+        [("deepseek-ai", "deepseek-chat"), ("dashscope", "qwen-plus")],
+        model_kwargs={"api_key": SecretStr("sk-test")},
+        breaker_kwargs={"min_calls": 2, "recovery_timeout": 60},
+    )
+    for breaker in model.breakers:
+        breaker.reset()
+    return model
+
+
+def test_circuit_breaker_states() -> None:
+    breaker = CircuitBreaker(min_calls=2, recovery_timeout=60)
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    # Once recovery_timeout elapsed a single probe is let through.
+    breaker.recovery_timeout = 0
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failover_skips_open_circuit() -> None:
+    model = _failover_model()
+    with patch.object(
+        ChatCustomOpenAILikeModel,
+        "_generate",
+        autospec=True,
+        side_effect=_fake_generate,
+    ) as m:
+        for _ in range(5):
+            assert model.invoke("hello").content == "dashscope"
+    assert model.breakers[0].state == "open"
+    # Two calls to deepseek opened its circuit, later calls skip it.
+    assert m.call_count == 5 + 2
+
+
+def test_failover_streaming() -> None:
+    model = _failover_model()
+    with patch.object(
+        ChatCustomOpenAILikeModel,
+        "_stream",
+        autospec=True,
+        side_effect=_fake_stream,
+    ):
+        assert "".join(c.text() for c in model.stream("hello")) == "dashscope"
+
+
+def test_all_circuits_open() -> None:
+    model = _failover_model()
+    for breaker in model.breakers:
+        breaker.record_failure()
+        breaker.record_failure()
+    with pytest.raises(NoAvailableProviderError):
+        model.invoke("hello")
@@ -0,0 +1,76 @@
+import asyncio
+from typing import Any, AsyncIterator, List
+
+from langchain_openailike_llms_adapters.hedging import HedgePolicy
+
+
+def _warm(policy: HedgePolicy, key: str, latency: float = 0.01) -> None:
+    for _ in range(policy.min_samples):
+        policy.record(key, latency)
+        policy._start_request()
+
+
+def test_slow_request_is_hedged_and_loser_cancelled() -> None:
+    policy = HedgePolicy(percentile=0.9, budget=0.5, min_samples=10)
+    _warm(policy, "k")
+    delays = [1.0, 0.01]
+    cancelled: List[int] = []
+
+    async def call() -> float:
+        delay = delays.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+        return delay
+
+    async def main() -> Any:
+        start = asyncio.get_running_loop().time()
+        result = await policy.run("k", call)
+        await asyncio.sleep(0)
+        return result, asyncio.get_running_loop().time() - start
+
+    result, elapsed = asyncio.run(main())
+    assert result == 0.01
+    assert elapsed < 0.5
+    assert cancelled == [1]
+    assert policy.hedges == 1
+
+
+def test_budget_caps_hedges() -> None:
+    policy = HedgePolicy(budget=0.0, min_samples=1)
+    policy.record("k", 0.001)
+    calls = 0
+
+    async def call() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return 1
+
+    assert asyncio.run(policy.run("k", call)) == 1
+    assert calls == 1
+
+
+def test_stream_races_for_first_chunk() -> None:
+    policy = HedgePolicy(percentile=0.5, budget=1.0, min_samples=5)
+    _warm(policy, "ttft")
+    first_token_delays = [1.0, 0.01]
+    closed: List[str] = []
+
+    async def stream() -> AsyncIterator[str]:
+        delay = first_token_delays.pop(0)
+        name = "slow" if delay > 0.5 else "fast"
+        try:
+            await asyncio.sleep(delay)
+            for token in ("a", "b"):
+                yield f"{name}-{token}"
+        finally:
+            closed.append(name)
+
+    async def main() -> List[str]:
+        return [chunk async for chunk in policy.race_stream("ttft", stream)]
+
+    assert asyncio.run(main()) == ["fast-a", "fast-b"]
+    assert sorted(closed) == ["fast", "slow"]
@@ -0,0 +1,78 @@
+import time
+from typing import Any, Iterator, List, Tuple
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_openai.chat_models.base import BaseChatOpenAI
+from pydantic import SecretStr
+
+from langchain_openailike_llms_adapters import (
+    MetricsRegistry,
+    get_openai_like_llm_instance,
+)
+from langchain_openailike_llms_adapters.metrics import Histogram
+
+
+def test_histogram_quantile_and_prometheus_text() -> None:
+    histogram = Histogram((0.1, 1.0))
+    histogram.observe_many([0.05] * 9 + [0.5])
+    quantile = histogram.quantile(0.5)
+    assert quantile is not None and quantile <= 0.1
+
+    registry = MetricsRegistry()
+    registry.observe("llm_request_duration_seconds", 0.2, provider="vllm", model="m")
+    text = registry.to_prometheus()
+    assert "# TYPE llm_request_duration_seconds histogram" in text
+    assert (
+        'llm_request_duration_seconds_bucket{model="m",provider="vllm",le="0.25"} 1'
+        in text
+    )
+    assert 'llm_request_duration_seconds_count{model="m",provider="vllm"} 1' in text
+
+
+def test_stream_records_reasoning_and_content_latency() -> None:
+    registry = MetricsRegistry()
+    observed: List[Tuple[str, float]] = []
+    registry.add_listener(lambda name, value, labels: observed.append((name, value)))
+    model = get_openai_like_llm_instance(
+        "qwen-plus",
+        model_kwargs={"api_key": SecretStr("sk"), "metrics": registry},
+    )
+    model.streaming = True
+
+    def fake_stream(*args: Any, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        yield ChatGenerationChunk(message=AIMessageChunk(content=""))
+        time.sleep(0.02)
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                additional_kwargs={"reasoning_content": "hmm"},
+            ),
+        )
+        time.sleep(0.02)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="hi"))
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                usage_metadata={
+                    "input_tokens": 1,
+                    "output_tokens": 10,
+                    "total_tokens": 11,
+                },
+            ),
+        )
+
+    with patch.object(BaseChatOpenAI, "_stream", side_effect=fake_stream):
+        model.invoke("hello")
+
+    labels = {"provider": "dashscope", "model": "qwen-plus"}
+    reasoning = registry.get("llm_time_to_first_reasoning_token_seconds", **labels)
+    content = registry.get("llm_time_to_first_content_token_seconds", **labels)
+    first = registry.get("llm_time_to_first_token_seconds", **labels)
+    assert reasoning is not None and content is not None and first is not None
+    assert content.sum - reasoning.sum >= 0.015
+    assert first.sum == reasoning.sum
+    gaps = registry.get("llm_inter_chunk_seconds", **labels)
+    assert gaps is not None and gaps.count == 2
+    assert [name for name, _ in observed].count("llm_output_tokens_per_second") == 1
@@ -0,0 +1,52 @@
+import pytest
+from pydantic import SecretStr
+
+from langchain_openailike_llms_adapters import (
+    capability_registry,
+    get_openai_like_embedding,
+    get_openai_like_llm_instance,
+    register_provider,
+)
+from langchain_openailike_llms_adapters.provider import _get_provider_with_model
+
+
+def test_builtin_resolution_keeps_priority() -> None:
+    assert _get_provider_with_model("Qwen3-32B") == "dashscope"
+    assert _get_provider_with_model("qwen-deepseek-distill") == "deepseek-ai"
+    assert _get_provider_with_model("kimi-k2") == "moonshot-ai"
+    assert _get_provider_with_model("llama-3") == "custom"
+
+
+def test_register_provider(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("EXAMPLE_KEY", "sk-example")
+    register_provider(
+        "example-ai",
+        api_id="example",
+        default_url="https://api.example.com/v1",
+        api_key_env="EXAMPLE_KEY",
+        model_patterns=[r"examplegpt-\d"],
+        capabilities={"examplegpt-*": {"tool_choice": True}},
+        embedding_max_batch_size=8,
+    )
+    assert _get_provider_with_model("ExampleGPT-4-qwen") == "example-ai"
+    assert _get_provider_with_model("examplegpt") == "custom"
+
+    model = get_openai_like_llm_instance("examplegpt-4")
+    assert model.api_base == "https://api.example.com/v1"
+    assert model.api_key.get_secret_value() == "sk-example"  # type: ignore[union-attr]
+    assert model.model_capabilities.tool_choice
+    assert capability_registry.lookup("example-ai", "examplegpt-5").tool_choice
+    embeddings = get_openai_like_embedding("example-embed", "example-ai")
+    assert embeddings.chunk_size == 8
+
+    register_provider("example-ai", default_url="https://eu.example.com/v1")
+    model = get_openai_like_llm_instance(
+        "any",
+        provider="example-ai",
+        model_kwargs={"api_key": SecretStr("sk")},
+    )
+    assert model.api_base == "https://eu.example.com/v1"
+    assert _get_provider_with_model("examplegpt-4") == "custom"
+
+    with pytest.raises(ValueError):
+        register_provider("custom", default_url="http://localhost")
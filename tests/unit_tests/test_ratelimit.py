@@ -0,0 +1,56 @@
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_openai.chat_models.base import BaseChatOpenAI
+from pydantic import SecretStr
+
+from langchain_openailike_llms_adapters import (
+    QuotaLimiter,
+    configure_rate_limit,
+    get_openai_like_llm_instance,
+)
+from langchain_openailike_llms_adapters.ratelimit import _limiters
+
+
+def test_bucket_waits_for_debt() -> None:
+    limiter = QuotaLimiter(requests_per_minute=60, tokens_per_minute=600)
+    assert limiter._draw({"requests": 1, "tokens": 600}) == 0
+    # The token bucket is empty and refills at 10 tokens per second.
+    assert abs(limiter._draw({"requests": 1, "tokens": 50}) - 5) < 0.1
+    limiter.reconcile(50, 0)
+    assert limiter._draw({"tokens": 0}) == 0
+
+
+def test_buckets_shared_through_database(tmp_path: Path) -> None:
+    path = tmp_path / "limits.db"
+    first = QuotaLimiter(requests_per_minute=2, database_path=path, name="moonshot")
+    second = QuotaLimiter(requests_per_minute=2, database_path=path, name="moonshot")
+    assert first._draw({"requests": 1}) == 0
+    assert second._draw({"requests": 1}) == 0
+    assert first._draw({"requests": 1}) > 0
+
+
+def test_model_uses_provider_limiter() -> None:
+    limiter = configure_rate_limit("moonshot-ai", tokens_per_minute=10_000)
+    model = get_openai_like_llm_instance(
+        "kimi-k2",
+        model_kwargs={"api_key": SecretStr("sk")},
+    )
+    assert model.quota_limiter is limiter
+
+    def fake_generate(*args: Any, **kwargs: Any) -> ChatResult:
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content="hi"))],
+            llm_output={"token_usage": {"total_tokens": 1234}},
+        )
+
+    try:
+        with patch.object(BaseChatOpenAI, "_generate", side_effect=fake_generate):
+            model.invoke("hello")
+        level, _ = limiter._buckets["moonshot:tokens"]
+        assert abs(level - (10_000 - 1234)) < 5
+    finally:
+        _limiters.clear()
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+from typing import Any
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_openai.chat_models.base import BaseChatOpenAI
+
+from langchain_openailike_llms_adapters import get_openai_like_llm_instance
+from langchain_openailike_llms_adapters.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution() -> None:
+    group = SingleFlight()
+    calls = 0
+    results = []
+
+    def slow() -> int:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.2)
+        return 42
+
+    threads = [
+        threading.Thread(target=lambda: results.append(group.do("k", slow)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == 1
+    assert [result for result, _ in results] == [42] * 4
+    assert all(shared for _, shared in results)
+    assert len(group) == 0
+
+
+def test_async_calls_share_one_execution() -> None:
+    group = SingleFlight()
+    calls = 0
+
+    async def slow() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main() -> Any:
+        return await asyncio.gather(*(group.ado("k", slow) for _ in range(3)))
+
+    assert asyncio.run(main()) == [(42, True)] * 3
+    assert calls == 1
+
+
+def test_chat_model_coalesces_identical_requests() -> None:
+    calls = 0
+
+    def fake_generate(*args: Any, **kwargs: Any) -> ChatResult:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.2)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content="hi"))],
+        )
+
+    model = get_openai_like_llm_instance(
+        "qwen-plus",
+        model_kwargs={"single_flight": True},
+    )
+    with patch.object(BaseChatOpenAI, "_generate", side_effect=fake_generate):
+        messages = model.batch(["hello"] * 3)
+    assert calls == 1
+    assert [message.content for message in messages] == ["hi"] * 3
+    assert len({id(message) for message in messages}) == 3
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Iterator, List
+from unittest.mock import patch
+
+from langchain_core.language_models.chat_models import generate_from_stream
+from langchain_core.messages import AIMessageChunk
+from langchain_core.messages.tool import tool_call_chunk
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_openai.chat_models.base import BaseChatOpenAI
+from pydantic import SecretStr
+
+from langchain_openailike_llms_adapters import get_openai_like_llm_instance
+from langchain_openailike_llms_adapters.streaming import (
+    ChunkCoalescer,
+    generate_from_chunks,
+    text_chunk,
+)
+
+
+def _tool_chunk() -> ChatGenerationChunk:
+    return ChatGenerationChunk(
+        message=AIMessageChunk(
+            content="",
+            tool_call_chunks=[tool_call_chunk(name="f", args="{}", id="1", index=0)],
+        ),
+    )
+
+
+def _usage_chunk() -> ChatGenerationChunk:
+    return ChatGenerationChunk(
+        message=AIMessageChunk(
+            content="",
+            usage_metadata={"input_tokens": 1, "output_tokens": 2, "total_tokens": 3},
+        ),
+    )
+
+
+def _texts(chunks: List[ChatGenerationChunk]) -> List[Any]:
+    return [
+        c.message.additional_kwargs.get("reasoning_content") or c.message.content
+        for c in chunks
+    ]
+
+
+def test_coalescer_merges_text_and_keeps_other_chunks() -> None:
+    coalescer = ChunkCoalescer(max_chars=4)
+    stream = [
+        text_chunk(""),
+        *(text_chunk("", reasoning="r") for _ in range(5)),
+        *(text_chunk("ab") for _ in range(5)),
+        _tool_chunk(),
+        _usage_chunk(),
+    ]
+    out: List[ChatGenerationChunk] = []
+    for chunk in stream:
+        out.extend(coalescer.push(chunk))
+    out.extend(coalescer.flush())
+
+    # The first delta of each kind is not held back.
+    assert _texts(out)[:8] == ["", "r", "rrrr", "ab", "abab", "abab", "", ""]
+    tool, usage = out[6].message, out[7].message
+    assert isinstance(tool, AIMessageChunk) and isinstance(usage, AIMessageChunk)
+    assert tool.tool_call_chunks[0]["name"] == "f"
+    assert usage.usage_metadata == {
+        "input_tokens": 1,
+        "output_tokens": 2,
+        "total_tokens": 3,
+    }
+    merged = sum(out[1:], out[0])
+    assert merged.message.additional_kwargs["reasoning_content"] == "rrrrr"
+    assert merged.message.content == "ab" * 5
+
+
+def test_model_stream_coalesces_with_callbacks() -> None:
+    model = get_openai_like_llm_instance(
+        "qwen-plus",
+        model_kwargs={"api_key": SecretStr("sk"), "coalesce_max_chars": 10},
+    )
+
+    def fake_stream(*args: Any, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        assert kwargs["run_manager"] is None
+        for _ in range(50):
+            yield text_chunk("x")
+        yield _usage_chunk()
+
+    with patch.object(BaseChatOpenAI, "_stream", side_effect=fake_stream):
+        chunks = list(model.stream("hello"))
+    assert len(chunks) == 7
+    assert "".join(str(c.content) for c in chunks) == "x" * 50
+    assert isinstance(chunks[-1], AIMessageChunk)
+    assert chunks[-1].usage_metadata is not None
+
+
+def test_async_stream_flushes_held_text_when_stalled() -> None:
+    model = get_openai_like_llm_instance(
+        "qwen-plus",
+        model_kwargs={"api_key": SecretStr("sk"), "coalesce_interval_ms": 20},
+    )
+
+    async def fake_astream(
+        *args: Any,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for _ in range(3):
+            yield text_chunk("x")
+        await asyncio.sleep(0.3)
+        yield text_chunk("y")
+
+    async def main() -> List[Any]:
+        start = time.monotonic()
+        return [
+            (chunk.content, time.monotonic() - start)
+            async for chunk in model.astream("hello")
+        ]
+
+    with patch.object(BaseChatOpenAI, "_astream", side_effect=fake_astream):
+        arrivals = asyncio.run(main())
+    assert [content for content, _ in arrivals] == ["x", "xx", "y"]
+    assert arrivals[1][1] < 0.2
+
+
+def _reasoning_stream() -> List[ChatGenerationChunk]:
+    return [
+        ChatGenerationChunk(
+            message=AIMessageChunk(content="", id="chatcmpl-1"),
+            generation_info={"headers": {"x": "1"}},
+        ),
+        *(text_chunk("", reasoning=f"step {i}. ", id="chatcmpl-1") for i in range(50)),
+        *(text_chunk(f"word{i} ", id="chatcmpl-1") for i in range(50)),
+        ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="!",
+                additional_kwargs={"reasoning_content": "done"},
+                tool_call_chunks=[
+                    tool_call_chunk(name="f", args='{"a"', id="1", index=0),
+                ],
+            ),
+        ),
+        ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[tool_call_chunk(args=": 1}", index=0)],
+            ),
+            generation_info={"finish_reason": "tool_calls"},
+        ),
+        _usage_chunk(),
+    ]
+
+
+def test_accumulator_matches_generate_from_stream() -> None:
+    expected = generate_from_stream(iter(_reasoning_stream()))
+    assert generate_from_chunks(_reasoning_stream()) == expected
+    message = expected.generations[0].message
+    assert message.additional_kwargs["reasoning_content"].endswith("step 49. done")
+    assert message.tool_calls[0]["args"] == {"a": 1}  # type: ignore[attr-defined]
+
+
+def test_streaming_generate_uses_accumulator() -> None:
+    model = get_openai_like_llm_instance(
+        "qwen-plus",
+        model_kwargs={"api_key": SecretStr("sk")},
+    )
+    model.streaming = True
+
+    def fake_stream(*args: Any, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        yield from _reasoning_stream()
+
+    with (
+        patch.object(BaseChatOpenAI, "_stream", side_effect=fake_stream),
+        patch(
+            "langchain_openai.chat_models.base.generate_from_stream",
+            side_effect=AssertionError("chunks merged with `+`"),
+        ),
+    ):
+        message = model.invoke("hello")
+    assert message.additional_kwargs["reasoning_content"].startswith("step 0. ")
+    assert message.content.startswith("word0 ")  # type: ignore[union-attr]
@@ -0,0 +1,200 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Iterator, List
+from unittest.mock import patch
+
+import httpx
+import openai
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.messages.tool import tool_call_chunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai.chat_models.base import BaseChatOpenAI
+from pydantic import BaseModel, SecretStr
+
+from langchain_openailike_llms_adapters import get_openai_like_llm_instance
+from langchain_openailike_llms_adapters.structured import PartialJsonParser
+
+
+class Person(BaseModel):
+    """A person."""
+
+    name: str
+    tags: List[str]
+    age: int
+
+
+def test_partial_json_parser_any_split() -> None:
+    document = {"a": [1, -2.5e3, True, None, 'x"\\\né\U0001f600'], "b": {}}
+    for text in (json.dumps(document), json.dumps(document, ensure_ascii=False)):
+        for size in (1, 2, 3, 7):
+            parser = PartialJsonParser()
+            for start in range(0, len(text), size):
+                parser.feed(text[start : start + size])
+            assert parser.complete
+            assert parser.finish() == document
+
+    parser = PartialJsonParser()
+    parser.feed('{"name": "Al')
+    assert parser.value() == {"name": "Al"}
+    parser.feed('ice", "age": 4')
+    assert parser.value() == {"name": "Alice"}
+    parser.feed("2}")
+    assert parser.value() == {"name": "Alice", "age": 42}
+    with pytest.raises(ValueError):
+        PartialJsonParser().feed('{"a" 1}')
+
+
+def _tool_stream(arguments: str) -> List[ChatGenerationChunk]:
+    pieces = [arguments[i : i + 3] for i in range(0, len(arguments), 3)]
+    return [
+        ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    tool_call_chunk(
+                        name="Person" if i == 0 else None,
+                        args=piece,
+                        id="call_1" if i == 0 else None,
+                        index=0,
+                    ),
+                ],
+            ),
+        )
+        for i, piece in enumerate(pieces)
+    ]
+
+
+def test_stream_partial_yields_growing_values() -> None:
+    model = get_openai_like_llm_instance(
+        "qwen-plus",
+        model_kwargs={"api_key": SecretStr("sk")},
+    )
+    structured = model.with_structured_output(Person, stream_partial=True)
+    arguments = json.dumps({"name": "Alice", "tags": ["a", "b"], "age": 42})
+
+    async def fake_astream(
+        *args: Any,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for chunk in _tool_stream(arguments):
+            yield chunk
+
+    async def collect() -> List[Any]:
+        return [value async for value in structured.astream("hi")]
+
+    with (
+        patch.object(BaseChatOpenAI, "_astream", side_effect=fake_astream),
+        patch.object(
+            Person,
+            "model_validate",
+            wraps=Person.model_validate,
+        ) as validate,
+    ):
+        values = asyncio.run(collect())
+    assert validate.call_count == 1
+    assert values[-1] == Person(name="Alice", tags=["a", "b"], age=42)
+    partials = values[:-1]
+    assert {"name": "Al"} in partials
+    assert {"name": "Alice", "tags": ["a"]} in partials
+    assert all(isinstance(value, dict) for value in partials)
+    assert all(a != b for a, b in zip(partials, partials[1:]))
+
+    def fake_stream(*args: Any, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        yield from _tool_stream(arguments)
+
+    with patch.object(BaseChatOpenAI, "_stream", side_effect=fake_stream):
+        assert list(structured.stream("hi"))[-1] == values[-1]
+    parser = structured.last  # type: ignore[attr-defined]
+    assert parser.parse(arguments) == values[-1]
+
+
+def test_guided_decoding_falls_back_to_tools() -> None:
+    # Accepts tool_choice by its name, and json_schema as served by vLLM.
+    model = get_openai_like_llm_instance(
+        "qwen2.5-7b-instruct",
+        provider="vllm",
+        model_kwargs={
+            "api_base": "http://localhost:8000/v1",
+            "api_key": SecretStr("sk"),
+        },
+    )
+    document = {"name": "Alice", "tags": [], "age": 42}
+    requests: List[dict] = []
+
+    def fake_generate(*args: Any, **kwargs: Any) -> ChatResult:
+        requests.append(kwargs)
+        if "response_format" in kwargs:
+            message = AIMessage(content=json.dumps(document))
+        else:
+            message = AIMessage(
+                content="",
+                tool_calls=[{"name": "Person", "args": document, "id": "call_1"}],
+            )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    guided = model.with_structured_output(Person, method="json_schema")
+    with patch.object(BaseChatOpenAI, "_generate", side_effect=fake_generate):
+        assert guided.invoke("hi") == Person.model_validate(document)
+        model.with_structured_output(Person).invoke("hi")
+    response_format = requests[0]["response_format"]
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["name"] == "Person"
+    assert response_format["json_schema"]["schema"]["required"] == [
+        "name",
+        "tags",
+        "age",
+    ]
+    assert "tools" not in requests[0]
+    # Function calling is used unless json_schema is asked for.
+    assert "response_format" not in requests[1]
+
+    rejected = openai.BadRequestError(
+        "response_format is not supported",
+        response=httpx.Response(400, request=httpx.Request("POST", "http://x")),
+        body=None,
+    )
+
+    def reject_guided(*args: Any, **kwargs: Any) -> ChatResult:
+        if "response_format" in kwargs:
+            raise rejected
+        return fake_generate(*args, **kwargs)
+
+    requests.clear()
+    with patch.object(BaseChatOpenAI, "_generate", side_effect=reject_guided):
+        assert guided.invoke("hi") == Person.model_validate(document)
+    assert requests[0]["tools"][0]["function"]["name"] == "Person"
+
+
+def test_tool_calling_turns_thinking_off_for_its_chain_only() -> None:
+    model = get_openai_like_llm_instance(
+        "qwen2.5-7b-instruct",
+        provider="vllm",
+        model_kwargs={
+            "api_base": "http://localhost:8000/v1",
+            "api_key": SecretStr("sk"),
+            "enable_thinking": True,
+        },
+    )
+    requests: List[dict] = []
+
+    def fake_generate(*args: Any, **kwargs: Any) -> ChatResult:
+        requests.append(kwargs)
+        message = AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": "Person",
+                    "args": {"name": "Alice", "tags": [], "age": 42},
+                    "id": "call_1",
+                },
+            ],
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    structured = model.with_structured_output(Person)
+    assert model.enable_thinking
+    with patch.object(BaseChatOpenAI, "_generate", side_effect=fake_generate):
+        structured.invoke("hi")
+    assert requests[0]["extra_body"] == {"enable_thinking": False}
+    assert model._default_params["extra_body"] == {"enable_thinking": True}